@@ -0,0 +1,30 @@
+"""
+LinkedIn Enhancer - HTTP API entry point
+Serves the agents over HTTP with uvicorn (see src/api/server.py for the endpoints)
+"""
+
+import argparse
+import os
+import sys
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import uvicorn
+
+from src.config.settings import settings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the LinkedIn Enhancer agents over HTTP")
+    parser.add_argument("--host", default=settings.API_HOST)
+    parser.add_argument("--port", type=int, default=settings.API_PORT)
+    parser.add_argument("--workers", type=int, default=settings.API_WORKERS, help="Worker processes, each with its own event loop")
+    args = parser.parse_args()
+
+    # Workers import the app themselves, so it is passed by name
+    uvicorn.run("src.api.server:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+"""
+LinkedIn Enhancer - Headless batch analysis
+Runs agent tasks over a cohort of profiles without the UI, e.g. for nightly re-analysis:
+
+    python batch.py --input cohort.csv --output results/2026-10-19.parquet
+    python batch.py --input cohort.jsonl --tasks profile_analysis,career_advice --concurrency 16
+
+Input rows (CSV or JSONL) name a profile by any of:
+    user_id       a profile in the memory store, analyzed with that user's memory context
+    profile_url   a LinkedIn URL, scraped when no stored profile is found
+    profile_data  an already normalized profile (JSONL, or a JSON string in CSV)
+    raw           a raw Apify dataset item, normalized here
+
+Normalization and prompt building run in a process pool, LLM calls run on one
+event loop with bounded concurrency. Every finished task is appended to a
+checkpoint file, so rerunning the same command after an interruption only does
+what is left; tasks that failed are retried.
+"""
+
+import argparse
+import asyncio
+import csv
+import importlib.util
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.agents.career_counselor import CareerCounselorAgent
+from src.agents.content_generator import ContentGeneratorAgent
+from src.agents.job_matcher import JobMatcherAgent
+from src.agents.memory_manager import MemoryManagerAgent
+from src.agents.orchestrator import QUICK_ACTION_QUERIES
+from src.agents.profile_analyzer import ProfileAnalyzerAgent
+from src.config.settings import settings
+from src.services.gemini_client import GeminiClient
+from src.services.linkedin_scraper import LinkedInScraperService, ScrapeError
+from src.services.token_usage import get_token_usage_tracker
+from src.utils import telemetry
+from src.utils.intent_router import classify_intent
+from src.utils.profile_scoring import score_profile
+
+OK = "ok"
+ERROR = "error"
+SKIPPED = "skipped"
+
+RESULT_COLUMNS = [
+    "item_id", "user_id", "profile_url", "full_name", "task", "query", "agent", "route", "status",
+    "response", "error", "profile_score", "completeness_score", "prompt_chars", "latency_seconds", "completed_at"
+]
+
+
+def load_items(path: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Read input rows from a CSV or JSONL file, giving each a stable item_id"""
+    items = []
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if path.endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+
+    for index, row in enumerate(rows):
+        row = {key: value for key, value in row.items() if value not in (None, "")}
+        if isinstance(row.get("profile_data"), str):
+            row["profile_data"] = json.loads(row["profile_data"])
+        if not any(row.get(key) for key in ("user_id", "profile_url", "profile_data", "raw")):
+            print(f"Skipping input row {index + 1}: no user_id, profile_url, profile_data or raw")
+            continue
+        row["item_id"] = str(row.get("id") or row.get("user_id") or row.get("profile_url") or f"row-{index + 1}")
+        items.append(row)
+        if limit and len(items) >= limit:
+            break
+    return items
+
+
+def load_tasks(task_names: str, tasks_file: Optional[str] = None) -> List[Dict[str, str]]:
+    """Quick Action tasks by name, plus custom {"name", "query"} tasks from a JSONL file"""
+    tasks = []
+    for name in [name.strip() for name in task_names.split(",") if name.strip()]:
+        if name not in QUICK_ACTION_QUERIES:
+            raise ValueError(f"Unknown task '{name}', expected one of: {', '.join(QUICK_ACTION_QUERIES)}")
+        tasks.append({"name": name, "query": QUICK_ACTION_QUERIES[name]})
+    if tasks_file:
+        with open(tasks_file, 'r', encoding='utf-8') as f:
+            tasks.extend(json.loads(line) for line in f if line.strip())
+
+    # Route every task once, the way the chat would route it
+    for task in tasks:
+        intent = classify_intent(task["query"])
+        task.update(agent=intent.agent, route=intent.route, mode=intent.mode)
+    return tasks
+
+
+def load_checkpoint(path: str) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    """Latest record per (item_id, task) from the checkpoint; a torn last line from a crash is ignored"""
+    records = {}
+    if not os.path.exists(path):
+        return records
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            records[(record["item_id"], record["task"])] = record
+    return records
+
+
+# Prompt building runs in worker processes, each with its own set of model-less agents
+_worker_agents: Dict[str, Any] = {}
+_worker_scraper: Optional[LinkedInScraperService] = None
+
+
+def _init_worker():
+    global _worker_scraper
+    for agent in (ProfileAnalyzerAgent(None, None), JobMatcherAgent(None, None), ContentGeneratorAgent(None, None), CareerCounselorAgent(None, None)):
+        _worker_agents[agent.name] = agent
+    _worker_scraper = LinkedInScraperService(settings.APIFY_API_TOKEN)
+
+
+def prepare_item(item: Dict[str, Any], tasks: List[Dict[str, str]], contexts: Dict[str, str]) -> Dict[str, Any]:
+    """Normalize and score one profile and build the prompt of each task (runs in a worker process)"""
+    profile_data = item.get("profile_data")
+    if profile_data is None and item.get("raw"):
+        profile_data = _worker_scraper._normalize_profile_data(item["raw"], item.get("profile_url", "")).dict()
+
+    local_score = score_profile(profile_data)
+    prompts = {}
+    for task in tasks:
+        task_data = {"query": task["query"], "profile_data": profile_data, "intent": task["route"], "mode": task["mode"]}
+        prompts[task["name"]] = _worker_agents[task["agent"]].build_prompt(task_data, contexts.get(task["agent"], ""))
+
+    return {
+        "profile_data": profile_data,
+        "profile_score": local_score["overall"],
+        "completeness_score": local_score["completeness"]["score"],
+        "prompts": prompts
+    }
+
+
+class BatchRunner:
+    """Scrapes, prepares and analyzes a cohort, appending each finished task to a checkpoint"""
+
+    def __init__(self, args: argparse.Namespace, tasks: List[Dict[str, str]]):
+        self.args = args
+        self.tasks = tasks
+        self.usage_tracker = get_token_usage_tracker(args.memory_store)
+        self.gemini_client = GeminiClient(settings.GEMINI_API_KEY, usage_tracker=self.usage_tracker)
+        self.memory_manager = MemoryManagerAgent(args.memory_store)
+        self.scraper = LinkedInScraperService(settings.APIFY_API_TOKEN)
+        # The checkpoint is written from the start, long before write_output creates the output directory
+        for path in (args.checkpoint, args.output):
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.checkpoint = open(args.checkpoint, 'a', encoding='utf-8')
+        self.counts = {OK: 0, ERROR: 0, SKIPPED: 0}
+        self.total = 0
+
+    def close(self):
+        self.checkpoint.close()
+
+    def _record(self, item: Dict[str, Any], task: Dict[str, str], **fields):
+        """Append one task result to the checkpoint; flushed at once so a killed run loses nothing"""
+        record = {
+            "item_id": item["item_id"],
+            "user_id": item.get("user_id"),
+            "profile_url": item.get("profile_url") or (item.get("profile_data") or {}).get("profile_url"),
+            "full_name": (item.get("profile_data") or {}).get("full_name"),
+            "task": task["name"],
+            "query": task["query"],
+            "agent": task["agent"],
+            "route": task["route"],
+            "response": None,
+            "error": None,
+            "profile_score": None,
+            "completeness_score": None,
+            "prompt_chars": None,
+            "latency_seconds": None,
+            "completed_at": datetime.now().isoformat(),
+            **fields
+        }
+        self.checkpoint.write(json.dumps(record, default=str) + "\n")
+        self.checkpoint.flush()
+        self.counts[record["status"]] += 1
+        print(f"[{sum(self.counts.values())}/{self.total}] {record['status']:7} {task['name']} for {item['item_id']}"
+              + (f" ({record['error']})" if record["error"] else ""))
+
+    async def _resolve_profile(self, item: Dict[str, Any], scrape_semaphore: asyncio.Semaphore) -> Optional[str]:
+        """Fill in item["profile_data"] from the store or a scrape; returns an error message on failure"""
+        if item.get("profile_data") or item.get("raw"):
+            return None
+        if item.get("user_id"):
+            item["profile_data"] = self.memory_manager.get_profile(item["user_id"])
+            if item["profile_data"]:
+                return None
+        if not item.get("profile_url"):
+            return f"No stored profile for user {item.get('user_id')}"
+
+        async with scrape_semaphore:
+            # scrape_profile makes blocking Apify calls, so each scrape gets its own thread and loop
+            try:
+                profile = await asyncio.to_thread(asyncio.run, self.scraper.scrape_profile(item["profile_url"]))
+            except ScrapeError as e:
+                return f"Scraping {item['profile_url']} failed: {e}"
+        item["profile_data"] = profile.dict()
+        return None
+
+    async def _process_item(
+        self,
+        item: Dict[str, Any],
+        pending_tasks: List[Dict[str, str]],
+        pool: ProcessPoolExecutor,
+        scrape_semaphore: asyncio.Semaphore,
+        llm_semaphore: asyncio.Semaphore
+    ):
+        try:
+            error = await self._resolve_profile(item, scrape_semaphore)
+            if error:
+                for task in pending_tasks:
+                    self._record(item, task, status=ERROR, error=error)
+                return
+
+            contexts = {}
+            if item.get("user_id"):
+                contexts = await self.memory_manager.get_contexts(item["user_id"], list({task["agent"] for task in pending_tasks}))
+            prepared = await asyncio.get_running_loop().run_in_executor(pool, prepare_item, item, pending_tasks, contexts)
+            item["profile_data"] = prepared["profile_data"]
+        except Exception as e:
+            for task in pending_tasks:
+                self._record(item, task, status=ERROR, error=f"Preparing profile failed: {e}")
+            return
+
+        await asyncio.gather(*(
+            self._run_task(item, task, prepared, llm_semaphore) for task in pending_tasks
+        ))
+
+    async def _run_task(self, item: Dict[str, Any], task: Dict[str, str], prepared: Dict[str, Any], llm_semaphore: asyncio.Semaphore):
+        scores = {"profile_score": prepared["profile_score"], "completeness_score": prepared["completeness_score"]}
+        prompt = prepared["prompts"][task["name"]]
+        if prompt is None:
+            self._record(item, task, status=SKIPPED, **scores)
+            return
+
+        async with llm_semaphore:
+            start_time = time.perf_counter()
+            with telemetry.request_context(), telemetry.tagged(agent=task["agent"], user_id=item.get("user_id") or item["item_id"]), \
+                    telemetry.span("batch_task", agent=task["agent"]):
+                try:
+                    response = await self.gemini_client.generate_response(prompt, raise_errors=True)
+                    status, error = OK, None
+                except Exception as e:
+                    response, status, error = None, ERROR, str(e)
+            latency = round(time.perf_counter() - start_time, 3)
+
+        self._record(
+            item, task, status=status, error=error, response=response,
+            prompt_chars=len(prompt), latency_seconds=latency, **scores
+        )
+
+    async def run(self, items: List[Dict[str, Any]], done: Dict[Tuple[str, str], Dict[str, Any]]):
+        work = []
+        for item in items:
+            pending_tasks = [
+                task for task in self.tasks
+                if done.get((item["item_id"], task["name"]), {}).get("status") not in (OK, SKIPPED)
+            ]
+            if pending_tasks:
+                work.append((item, pending_tasks))
+        self.total = sum(len(pending_tasks) for _, pending_tasks in work)
+        print(f"{len(items)} profiles x {len(self.tasks)} tasks: {self.total} to run, {len(items) * len(self.tasks) - self.total} already done")
+
+        scrape_semaphore = asyncio.Semaphore(self.args.scrape_concurrency)
+        llm_semaphore = asyncio.Semaphore(self.args.concurrency)
+        with ProcessPoolExecutor(max_workers=self.args.workers, initializer=_init_worker) as pool:
+            await asyncio.gather(*(
+                self._process_item(item, pending_tasks, pool, scrape_semaphore, llm_semaphore)
+                for item, pending_tasks in work
+            ))
+
+
+def write_output(records: List[Dict[str, Any]], path: str):
+    """Write results as Parquet (by extension) or JSONL, replacing the file atomically"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temp_path = f"{path}.tmp"
+    if path.endswith(".parquet"):
+        import pandas as pd
+        pd.DataFrame(records, columns=RESULT_COLUMNS).to_parquet(temp_path, index=False)
+    else:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, default=str) + "\n")
+    os.replace(temp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run LinkedIn Enhancer agent tasks over a cohort of profiles")
+    parser.add_argument("--input", required=True, help="CSV or JSONL with user_id, profile_url, profile_data or raw per row")
+    parser.add_argument("--output", default="batch_results.jsonl", help="Results file, .parquet or .jsonl")
+    parser.add_argument("--tasks", default=",".join(QUICK_ACTION_QUERIES), help="Comma-separated Quick Action tasks")
+    parser.add_argument("--tasks-file", help="JSONL of extra {\"name\", \"query\"} tasks")
+    parser.add_argument("--memory-store", default=settings.MEMORY_STORE_PATH, help="Memory store holding stored profiles and budgets")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <output>.checkpoint.jsonl)")
+    parser.add_argument("--restart", action="store_true", help="Discard the checkpoint and start over")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processes normalizing profiles and building prompts")
+    parser.add_argument("--concurrency", type=int, default=settings.GEMINI_MAX_CONCURRENCY or 8, help="LLM calls in flight")
+    parser.add_argument("--scrape-concurrency", type=int, default=max(settings.SCRAPE_MAX_CONCURRENT_RUNS, 1), help="Apify runs in flight")
+    parser.add_argument("--limit", type=int, help="Only process the first N input rows")
+    args = parser.parse_args()
+    args.checkpoint = args.checkpoint or f"{args.output}.checkpoint.jsonl"
+
+    settings.validate_settings()
+    if args.output.endswith(".parquet") and not (importlib.util.find_spec("pyarrow") or importlib.util.find_spec("fastparquet")):
+        parser.error("Parquet output needs pyarrow (pip install pyarrow); use a .jsonl output instead")
+
+    tasks = load_tasks(args.tasks, args.tasks_file)
+    items = load_items(args.input, args.limit)
+    if args.restart and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    done = load_checkpoint(args.checkpoint)
+
+    start_time = time.perf_counter()
+    runner = BatchRunner(args, tasks)
+    try:
+        asyncio.run(runner.run(items, done))
+    except KeyboardInterrupt:
+        print(f"\nInterrupted; finished tasks are in {args.checkpoint}, rerun the same command to resume")
+        sys.exit(130)
+    finally:
+        runner.close()
+
+    # Results of this input only, in input order
+    records = load_checkpoint(args.checkpoint)
+    results = [
+        records[(item["item_id"], task["name"])] for item in items for task in tasks
+        if (item["item_id"], task["name"]) in records
+    ]
+    write_output(results, args.output)
+
+    failed = sum(1 for record in results if record["status"] == ERROR)
+    print(
+        f"Wrote {len(results)} results to {args.output} in {time.perf_counter() - start_time:.1f}s "
+        f"({runner.counts[OK]} ok, {runner.counts[SKIPPED]} skipped, {runner.counts[ERROR]} failed this run)"
+    )
+    if failed:
+        print(f"{failed} tasks failed; rerun the same command to retry them")
+    else:
+        os.remove(args.checkpoint)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Shared helpers for the offline benchmarks: synthetic memory stores,
+a stub Gemini client and latency statistics
+"""
+
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+from datetime import datetime
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.services.gemini_client import GeminiClient
+from src.services.gemini_transport import ReplayGeminiTransport
+from src.services.replay import Cassette, FailureInjector, LatencyModel
+from src.services.token_usage import TokenUsageTracker
+
+# Representative queries per agent, taken from the Quick Actions and Enhanced Features
+AGENT_QUERIES = {
+    "ProfileAnalyzer": [
+        "Please provide a comprehensive analysis of my LinkedIn profile including strengths, weaknesses, and improvement suggestions."
+    ],
+    "JobMatcher": [
+        "Based on my profile, what job opportunities would be the best match for me?",
+        "Analyze how well my profile matches this job description and provide detailed insights and improvement suggestions:\n\n"
+        "Senior Data Scientist. Requirements: 5+ years of Python, SQL and machine learning experience."
+    ],
+    "ContentGenerator": [
+        "Generate content ideas for my LinkedIn posts to increase engagement.",
+        "Please rewrite and enhance my About Section for better alignment with industry best practices and to make it more compelling to recruiters."
+    ],
+    "CareerCounselor": [
+        "What career development advice do you have based on my current profile?",
+        "Perform a detailed skill gap analysis for the role of 'Senior Data Scientist'. Identify missing skills I need to develop and suggest specific learning resources and career paths."
+    ]
+}
+
+SKILL_POOL = [
+    "Python", "SQL", "Machine Learning", "Data Analysis", "Project Management", "AWS", "Docker",
+    "Kubernetes", "Leadership", "Communication", "TensorFlow", "PyTorch", "React", "Java",
+    "Product Strategy", "Agile Methodologies", "Statistics", "Deep Learning", "NLP", "Tableau"
+]
+TITLES = ["Software Engineer", "Data Scientist", "Product Manager", "ML Engineer", "Data Analyst", "Engineering Manager"]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Labs", "Stark Industries", "Wayne Enterprises"]
+
+
+def synthetic_profile(index: int, rng: random.Random) -> Dict:
+    """A normalized profile shaped like LinkedInProfile.dict()"""
+    return {
+        "full_name": f"Benchmark User {index}",
+        "headline": f"{rng.choice(TITLES)} at {rng.choice(COMPANIES)}",
+        "about": "Builds data products and leads cross-functional teams. " * rng.randint(0, 6),
+        "experience": [
+            {
+                "title": rng.choice(TITLES),
+                "company": rng.choice(COMPANIES),
+                "description": "Delivered measurable impact on key projects. " * rng.randint(0, 3),
+                "duration": f"{2012 + position} - {2014 + position}",
+                "location": "Remote"
+            }
+            for position in range(rng.randint(0, 5))
+        ],
+        "education": [{"school": "State University", "degree": "BSc", "field": "Computer Science", "duration": "2008 - 2012"}],
+        "skills": rng.sample(SKILL_POOL, k=rng.randint(0, 15)),
+        "location": "San Francisco Bay Area",
+        "connections_count": rng.randint(10, 500),
+        "profile_url": f"https://www.linkedin.com/in/benchmark-user-{index}",
+        "profile_image": ""
+    }
+
+
+def build_synthetic_store(path: str, num_users: int, interactions_per_user: int = 2, seed: int = 7) -> List[str]:
+    """Write profiles.json and conversations.json for num_users users and return their IDs"""
+    rng = random.Random(seed)
+    os.makedirs(path, exist_ok=True)
+
+    profiles = {}
+    conversations = {}
+    agent_names = list(AGENT_QUERIES)
+    timestamp = datetime.now().isoformat()
+
+    for index in range(num_users):
+        user_id = f"bench-user-{index}"
+        profile = synthetic_profile(index, rng)
+        profiles[user_id] = {"profile_data": profile, "timestamp": timestamp}
+
+        history = []
+        for _ in range(interactions_per_user):
+            agent_name = rng.choice(agent_names)
+            # Matches what execute_with_memory stores: the full task data and the agent result
+            history.append({
+                "user_id": user_id,
+                "agent_name": agent_name,
+                "query": {"query": rng.choice(AGENT_QUERIES[agent_name]), "profile_data": profile},
+                "response": {"analysis": "Synthetic earlier response. " * 20, "success": True},
+                "timestamp": timestamp
+            })
+        conversations[user_id] = history
+
+    with open(os.path.join(path, "profiles.json"), 'w') as f:
+        json.dump(profiles, f)
+    with open(os.path.join(path, "conversations.json"), 'w') as f:
+        json.dump(conversations, f)
+
+    return list(profiles)
+
+
+def create_stub_gemini_client(latency_spec: str = "fixed:0", seed: Optional[int] = 7, rate_limit_rate: float = 0.0,
+                              timeout_rate: float = 0.0, store_path: Optional[str] = None) -> GeminiClient:
+    """GeminiClient backed by an empty replay cassette, so every call gets a synthetic response offline
+
+    Token usage is recorded in store_path, so benchmarks can keep it out of the real memory store.
+    """
+    transport = ReplayGeminiTransport(
+        Cassette(os.devnull),
+        latency=LatencyModel(latency_spec, seed=seed),
+        failures=FailureInjector(rate_limit_rate, timeout_rate, seed=seed)
+    )
+    usage_tracker = TokenUsageTracker(store_path) if store_path else None
+    return GeminiClient(api_key="offline", transport=transport, usage_tracker=usage_tracker)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100.0 * len(ordered)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def summarize(values: List[float]) -> Dict:
+    """Count, mean and tail percentiles of a list of samples"""
+    return {
+        "samples": len(values),
+        "mean": sum(values) / len(values) if values else 0.0,
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else 0.0
+    }
+
+
+def run_metadata(config: Dict) -> Dict:
+    """Environment details stored next to benchmark results"""
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, cwd=os.path.dirname(__file__)
+        ).stdout.strip() or "unknown"
+    except Exception:
+        revision = "unknown"
+
+    return {
+        "git_revision": revision,
+        "python": sys.version.split()[0],
+        "timestamp": datetime.now().isoformat(),
+        "config": config
+    }
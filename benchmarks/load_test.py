@@ -0,0 +1,249 @@
+"""
+Trace-driven load test for LinkedInEnhancerApp.process_user_query
+
+Replays the user queries recorded in data/memory_store/conversations.json as
+N concurrent simulated sessions, with Gemini and Apify on the offline replay
+transport. Each session runs in its own thread and each query goes through
+asyncio.run, the way Streamlit executes a click. Reports throughput, tail
+latency and process memory growth per concurrency level.
+
+Drivers:
+    headless  builds LinkedInEnhancerApp per query, as main() does on every rerun,
+              and calls process_user_query directly (default)
+    apptest   drives the real script through streamlit.testing AppTest, including
+              the full script re-execution on every chat message
+
+Usage:
+    python -m benchmarks.load_test --concurrency 1,4,16 --requests-per-session 10
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from benchmarks.common import run_metadata, summarize
+from src.config.settings import settings
+
+REPO_ROOT = os.path.join(os.path.dirname(__file__), '..')
+APP_PATH = os.path.abspath(os.path.join(REPO_ROOT, "app.py"))
+TRACE_STORE = os.path.join(REPO_ROOT, "data", "memory_store")
+
+# Route names produced by route_query, per agent name stored in the trace
+AGENT_ROUTES = {
+    "ProfileAnalyzer": {"profile_analysis"},
+    "JobMatcher": {"job_matching", "job_fit_analysis"},
+    "ContentGenerator": {"content_generation", "content_enhancement"},
+    "CareerCounselor": {"career_counseling", "skill_gap_analysis"}
+}
+
+
+def load_trace(path: str) -> List[Dict]:
+    """Flatten the conversation store into (query, profile, agent) requests in timestamp order"""
+    with open(path, 'r') as f:
+        conversations = json.load(f)
+
+    requests = []
+    for user_id, interactions in conversations.items():
+        for interaction in interactions:
+            query = interaction.get("query", {})
+            if not isinstance(query, dict) or not query.get("query"):
+                continue
+            requests.append({
+                "user_id": user_id,
+                "query": query["query"],
+                "profile_data": query.get("profile_data"),
+                "agent_name": interaction.get("agent_name"),
+                "timestamp": interaction.get("timestamp", "")
+            })
+    return sorted(requests, key=lambda request: request["timestamp"])
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process in MB"""
+    try:
+        with open("/proc/self/statm", 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        # ru_maxrss is the peak, in KB on Linux and bytes on macOS
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def configure_offline_backends(store_dir: str, args):
+    """Point the app at a scratch memory store and the replay transports"""
+    settings.TRANSPORT_MODE = "replay"
+    settings.MEMORY_STORE_PATH = store_dir
+    settings.REPLAY_LLM_LATENCY = args.llm_latency
+    settings.REPLAY_RATE_LIMIT_RATE = args.rate_limit_rate
+    settings.REPLAY_TIMEOUT_RATE = args.timeout_rate
+    settings.REPLAY_SEED = args.seed
+
+
+class SessionStats:
+    """Thread-safe collection of per-request results"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.misrouted = 0
+
+    def add(self, latency: float, error: bool = False, misrouted: bool = False):
+        with self.lock:
+            self.latencies.append(latency)
+            self.errors += int(error)
+            self.misrouted += int(misrouted)
+
+
+def run_headless_session(session_index: int, requests: List[Dict], stats: SessionStats, args):
+    """One simulated browser session calling process_user_query directly"""
+    from src.ui.streamlit_app import LinkedInEnhancerApp
+
+    user_id = f"load-session-{session_index}"
+    for request in requests:
+        start_time = time.perf_counter()
+        try:
+            # main() builds a fresh app, services and memory manager on every rerun
+            app = LinkedInEnhancerApp()
+            route = asyncio.run(app.route_query(request["query"]))
+            response = asyncio.run(app.process_user_query(request["query"], user_id, request["profile_data"]))
+            error = response.startswith("I apologize")
+        except Exception as e:
+            print(f"Session {session_index} request failed: {e}")
+            route, error = None, True
+
+        misrouted = bool(request["agent_name"]) and route not in AGENT_ROUTES.get(request["agent_name"], {route})
+        stats.add(time.perf_counter() - start_time, error, misrouted)
+        if args.think_time:
+            time.sleep(args.think_time)
+
+
+def run_apptest_session(session_index: int, requests: List[Dict], stats: SessionStats, args):
+    """One simulated browser session driving the full Streamlit script through AppTest"""
+    from streamlit.testing.v1 import AppTest
+
+    app_test = AppTest.from_file(APP_PATH, default_timeout=args.timeout)
+    # The chat input only renders once a profile is loaded
+    app_test.session_state["user_id"] = f"load-session-{session_index}"
+    app_test.session_state["profile_data"] = requests[0]["profile_data"] if requests else None
+    app_test.run()
+
+    for request in requests:
+        start_time = time.perf_counter()
+        error = False
+        try:
+            app_test.session_state["profile_data"] = request["profile_data"]
+            app_test.chat_input[0].set_value(request["query"]).run()
+            error = bool(app_test.exception)
+        except Exception as e:
+            print(f"Session {session_index} request failed: {e}")
+            error = True
+
+        stats.add(time.perf_counter() - start_time, error)
+        if args.think_time:
+            time.sleep(args.think_time)
+
+
+def run_level(concurrency: int, trace: List[Dict], args) -> Dict:
+    """Replay the trace with `concurrency` simultaneous sessions"""
+    store_dir = tempfile.mkdtemp(prefix=f"load-store-{concurrency}-")
+    try:
+        # Seed the scratch store with the recorded data so context lookups are realistic
+        for name in os.listdir(TRACE_STORE):
+            if name.endswith(".json"):
+                shutil.copy(os.path.join(TRACE_STORE, name), store_dir)
+        configure_offline_backends(store_dir, args)
+
+        sessions = [
+            [trace[(session_index + offset) % len(trace)] for offset in range(args.requests_per_session)]
+            for session_index in range(concurrency)
+        ]
+        run_session = run_apptest_session if args.driver == "apptest" else run_headless_session
+
+        stats = SessionStats()
+        rss_start = current_rss_mb()
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = [
+                executor.submit(run_session, session_index, requests, stats, args)
+                for session_index, requests in enumerate(sessions)
+            ]
+            for future in futures:
+                future.result()
+        elapsed = time.perf_counter() - start_time
+        rss_end = current_rss_mb()
+
+        latency = summarize([value * 1000 for value in stats.latencies])
+        return {
+            "concurrency": concurrency,
+            "driver": args.driver,
+            "requests": latency["samples"],
+            "errors": stats.errors,
+            "misrouted": stats.misrouted,
+            "elapsed_s": elapsed,
+            "throughput_rps": latency["samples"] / elapsed if elapsed else 0.0,
+            "p50_ms": latency["p50"],
+            "p95_ms": latency["p95"],
+            "p99_ms": latency["p99"],
+            "max_ms": latency["max"],
+            "rss_start_mb": rss_start,
+            "rss_end_mb": rss_end,
+            "rss_growth_mb": rss_end - rss_start
+        }
+    finally:
+        shutil.rmtree(store_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trace-driven load test for process_user_query")
+    parser.add_argument("--trace", default=os.path.join(TRACE_STORE, "conversations.json"), help="Conversation store to replay")
+    parser.add_argument("--concurrency", default="1,2,4,8,16", help="Comma-separated concurrent session counts")
+    parser.add_argument("--requests-per-session", type=int, default=10)
+    parser.add_argument("--driver", choices=["headless", "apptest"], default="headless")
+    parser.add_argument("--llm-latency", default="lognormal:0.0,0.3", help="Replay latency distribution for Gemini calls")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of Gemini calls failing with 429")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="Fraction of Gemini calls timing out")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Pause between a session's requests, in seconds")
+    parser.add_argument("--timeout", type=float, default=120.0, help="AppTest script run timeout, in seconds")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default="load_test.json", help="Where to write machine-readable results")
+    args = parser.parse_args()
+
+    trace = load_trace(args.trace)
+    if not trace:
+        raise SystemExit(f"No queries found in {args.trace}")
+    print(f"Loaded {len(trace)} recorded queries from {args.trace}")
+
+    # The scrape queue is a process-wide singleton, so it gets one scratch database for the whole run
+    queue_dir = tempfile.mkdtemp(prefix="load-queue-")
+    settings.SCRAPE_QUEUE_PATH = os.path.join(queue_dir, "scrape_jobs.db")
+
+    rows = []
+    try:
+        for concurrency in [int(level) for level in args.concurrency.split(",") if level.strip()]:
+            print(f"Running {concurrency} concurrent session(s)...")
+            rows.append(run_level(concurrency, trace, args))
+    finally:
+        shutil.rmtree(queue_dir, ignore_errors=True)
+
+    with open(args.output, 'w') as f:
+        json.dump({"meta": run_metadata(vars(args)), "results": rows}, f, indent=2)
+
+    print(f"{'sessions':>8} {'reqs':>5} {'req/s':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'RSS +MB':>8} {'errors':>6} {'misrouted':>9}")
+    for row in rows:
+        print(
+            f"{row['concurrency']:>8} {row['requests']:>5} {row['throughput_rps']:>7.2f} {row['p50_ms']:>9.1f} "
+            f"{row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f} {row['rss_growth_mb']:>8.1f} {row['errors']:>6} {row['misrouted']:>9}"
+        )
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+Per-stage latency and allocation benchmark for BaseLinkedInAgent.execute_with_memory
+
+Runs offline against a stub LLM and synthetic memory stores of increasing size,
+timing each stage of the pipeline separately:
+
+    get_context -> build_prompt (per agent) -> LLM call -> store_interaction
+
+Usage:
+    python -m benchmarks.pipeline_benchmark --sizes 10,1000,100000 --output results.json
+    python -m benchmarks.pipeline_benchmark --compare old_results.json --output results.json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List
+
+from benchmarks.common import (
+    AGENT_QUERIES,
+    build_synthetic_store,
+    create_stub_gemini_client,
+    run_metadata,
+    summarize,
+)
+from src.agents.career_counselor import CareerCounselorAgent
+from src.agents.content_generator import ContentGeneratorAgent
+from src.agents.job_matcher import JobMatcherAgent
+from src.agents.memory_manager import MemoryManagerAgent
+from src.agents.profile_analyzer import ProfileAnalyzerAgent
+
+STAGES = ("get_context", "build_prompt", "llm_call", "store_interaction")
+
+
+class StageRecorder:
+    """Collects durations and allocations per (agent, stage)"""
+
+    def __init__(self, track_allocations: bool):
+        self.track_allocations = track_allocations
+        self.durations: Dict[tuple, List[float]] = {}
+        self.allocations: Dict[tuple, List[float]] = {}
+
+    async def measure(self, agent_name: str, stage: str, coroutine_or_callable):
+        """Run one stage, recording wall time or allocated bytes"""
+        if self.track_allocations:
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+
+        start_time = time.perf_counter()
+        result = coroutine_or_callable()
+        if asyncio.iscoroutine(result):
+            result = await result
+        elapsed = time.perf_counter() - start_time
+
+        key = (agent_name, stage)
+        if self.track_allocations:
+            _, peak = tracemalloc.get_traced_memory()
+            self.allocations.setdefault(key, []).append(max(peak - before, 0))
+        else:
+            self.durations.setdefault(key, []).append(elapsed)
+        return result
+
+
+async def run_pipeline_once(agent, memory_manager, recorder: StageRecorder, user_id: str, profile_data: Dict, query: str):
+    """One execute_with_memory call, split into its timed stages"""
+    task_data = {"query": query, "profile_data": profile_data}
+
+    context = await recorder.measure(agent.name, "get_context", lambda: memory_manager.get_context(user_id, agent.name))
+    prompt = await recorder.measure(agent.name, "build_prompt", lambda: agent.build_prompt(task_data, context))
+    response = ""
+    if prompt is not None:
+        response = await recorder.measure(agent.name, "llm_call", lambda: agent.gemini_client.generate_response(prompt))
+    await recorder.measure(
+        agent.name, "store_interaction",
+        lambda: memory_manager.store_interaction(user_id, agent.name, task_data, {"response": response, "success": True})
+    )
+
+
+async def run_size(store_size: int, args) -> List[Dict]:
+    """Benchmark every agent against a synthetic store of store_size users"""
+    store_dir = tempfile.mkdtemp(prefix=f"bench-store-{store_size}-")
+    try:
+        user_ids = build_synthetic_store(store_dir, store_size, args.interactions_per_user, seed=args.seed)
+
+        load_start = time.perf_counter()
+        memory_manager = MemoryManagerAgent(store_dir)
+        load_seconds = time.perf_counter() - load_start
+
+        gemini_client = create_stub_gemini_client(args.llm_latency, seed=args.seed, store_path=store_dir)
+        agents = [
+            ProfileAnalyzerAgent(gemini_client, memory_manager),
+            JobMatcherAgent(gemini_client, memory_manager),
+            ContentGeneratorAgent(gemini_client, memory_manager),
+            CareerCounselorAgent(gemini_client, memory_manager)
+        ]
+        profiles = memory_manager.memory_manager.all_profiles()
+        rng = random.Random(args.seed)
+
+        recorders = []
+        for track_allocations, iterations in ((False, args.iterations), (True, args.alloc_iterations)):
+            recorder = StageRecorder(track_allocations)
+            if track_allocations:
+                tracemalloc.start()
+            deadline = time.perf_counter() + args.max_seconds_per_size
+            try:
+                for _ in range(iterations):
+                    if time.perf_counter() > deadline:
+                        break
+                    for agent in agents:
+                        user_id = rng.choice(user_ids)
+                        query = rng.choice(AGENT_QUERIES[agent.name])
+                        await run_pipeline_once(
+                            agent, memory_manager, recorder, user_id, profiles[user_id]["profile_data"], query
+                        )
+            finally:
+                if track_allocations:
+                    tracemalloc.stop()
+            recorders.append(recorder)
+
+        timing, allocation = recorders
+        rows = [{
+            "store_size": store_size, "agent": "*", "stage": "store_load",
+            "samples": 1, "mean_ms": load_seconds * 1000, "p50_ms": load_seconds * 1000,
+            "p95_ms": load_seconds * 1000, "p99_ms": load_seconds * 1000, "max_ms": load_seconds * 1000
+        }]
+        for agent in agents:
+            for stage in STAGES:
+                durations = timing.durations.get((agent.name, stage), [])
+                if not durations:
+                    continue
+                stats = summarize([value * 1000 for value in durations])
+                allocations = summarize([value / 1024 for value in allocation.allocations.get((agent.name, stage), [])])
+                rows.append({
+                    "store_size": store_size,
+                    "agent": agent.name,
+                    "stage": stage,
+                    "samples": stats["samples"],
+                    "mean_ms": stats["mean"],
+                    "p50_ms": stats["p50"],
+                    "p95_ms": stats["p95"],
+                    "p99_ms": stats["p99"],
+                    "max_ms": stats["max"],
+                    "alloc_samples": allocations["samples"],
+                    "alloc_mean_kb": allocations["mean"],
+                    "alloc_p95_kb": allocations["p95"]
+                })
+        return rows
+    finally:
+        shutil.rmtree(store_dir, ignore_errors=True)
+
+
+def print_rows(rows: List[Dict]):
+    """Human-readable results table"""
+    print(f"{'users':>7} {'agent':<17} {'stage':<18} {'n':>4} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'alloc KB':>9}")
+    for row in rows:
+        print(
+            f"{row['store_size']:>7} {row['agent']:<17} {row['stage']:<18} {row['samples']:>4} "
+            f"{row['p50_ms']:>9.3f} {row['p95_ms']:>9.3f} {row['p99_ms']:>9.3f} {row.get('alloc_mean_kb', 0):>9.1f}"
+        )
+
+
+def compare_results(baseline_path: str, rows: List[Dict]):
+    """Print p50/p95 changes against an earlier results file"""
+    with open(baseline_path, 'r') as f:
+        baseline = {(row["store_size"], row["agent"], row["stage"]): row for row in json.load(f)["results"]}
+
+    print(f"\nComparison against {baseline_path}:")
+    print(f"{'users':>7} {'agent':<17} {'stage':<18} {'p50 change':>11} {'p95 change':>11}")
+    for row in rows:
+        old = baseline.get((row["store_size"], row["agent"], row["stage"]))
+        if not old:
+            continue
+        changes = []
+        for metric in ("p50_ms", "p95_ms"):
+            changes.append(f"{(row[metric] - old[metric]) / old[metric] * 100:+10.1f}%" if old[metric] else f"{'n/a':>11}")
+        print(f"{row['store_size']:>7} {row['agent']:<17} {row['stage']:<18} {changes[0]} {changes[1]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage latency benchmark for the agent pipeline")
+    parser.add_argument("--sizes", default="10,100,1000,10000,100000", help="Comma-separated memory store sizes (users)")
+    parser.add_argument("--iterations", type=int, default=50, help="Timed pipeline runs per agent and store size")
+    parser.add_argument("--alloc-iterations", type=int, default=10, help="Runs per agent with allocation tracing")
+    parser.add_argument("--interactions-per-user", type=int, default=2, help="Stored interactions per synthetic user")
+    parser.add_argument("--llm-latency", default="fixed:0", help="Stub LLM latency distribution, e.g. lognormal:0.0,0.5")
+    parser.add_argument("--max-seconds-per-size", type=float, default=120.0, help="Time budget per pass and store size")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default="pipeline_benchmark.json", help="Where to write machine-readable results")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    rows = []
+    for store_size in [int(size) for size in args.sizes.split(",") if size.strip()]:
+        print(f"Benchmarking store with {store_size} users...")
+        rows.extend(asyncio.run(run_size(store_size, args)))
+
+    results = {"meta": run_metadata(vars(args)), "results": rows}
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    print_rows(rows)
+    print(f"\nResults written to {args.output}")
+    if args.compare:
+        compare_results(args.compare, rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,57 @@
 from agno.agent import Agent
 from typing import Dict, Any, Optional
 from abc import ABC, abstractmethod
+from ..services.response_cache import get_response_cache, response_key
+from ..utils import telemetry
+from ..utils.intent_router import get_intent_router
+from ..utils.prompt_templates import compact_profile
+from ..utils.response_parser import parse_response
+from ..utils.skill_taxonomy import get_skill_taxonomy
 
 class BaseLinkedInAgent(Agent):
+    # Result key holding the model's markdown answer, parsed into "insights" once per result
+    response_field = None
+    
     def __init__(self, name: str, gemini_client, memory_manager=None):
         super().__init__(name=name)
         self.gemini_client = gemini_client
         self.memory_manager = memory_manager
     
-    async def execute_with_memory(self, task_data: Dict[str, Any], user_id: str) -> Dict[str, Any]:
+    async def execute_with_memory(self, task_data: Dict[str, Any], user_id: str, context: Optional[str] = None) -> Dict[str, Any]:
+        """Run the task with memory context and store the interaction
+
+        Pass context to skip the lookup when the caller already fetched it.
+        """
         try:
-            # Retrieve relevant context from memory manager if available
-            context = ""
-            if self.memory_manager:
-                context = await self.memory_manager.get_context(user_id, self.name)
-            
-            # Execute agent-specific logic
-            result = await self.execute_task(task_data, context)
-            
-            # Store result in memory manager if available
-            if self.memory_manager:
-                await self.memory_manager.store_interaction(user_id, self.name, task_data, result)
-            
-            return result
+            with telemetry.tagged(agent=self.name, user_id=user_id):
+                # Retrieve relevant context from memory manager if available
+                if context is None:
+                    context = ""
+                    if self.memory_manager:
+                        with telemetry.span("context"):
+                            context = await self.memory_manager.get_context(user_id, self.name)
+                
+                # Serve an answer precomputed for exactly this prompt, if there is one
+                result = None
+                response_cache = get_response_cache()
+                if response_cache.has_entries(user_id):
+                    result = await response_cache.fetch(user_id, response_key(self.name, task_data, context))
+                
+                # Execute agent-specific logic
+                if result is None:
+                    result = await self.execute_task(task_data, context)
+                
+                # Sections, items and scores are stored with the interaction, so nothing re-parses the text
+                if self.response_field and isinstance(result.get(self.response_field), str) and "insights" not in result:
+                    with telemetry.span("parse_response"):
+                        result["insights"] = parse_response(result[self.response_field])
+                
+                # Store result in memory manager if available
+                if self.memory_manager:
+                    with telemetry.span("store", kind="interaction"):
+                        await self.memory_manager.store_interaction(user_id, self.name, task_data, result)
+                
+                return result
             
         except Exception as e:
             print(f"Error in {self.name} agent: {e}")
@@ -33,6 +62,18 @@ class BaseLinkedInAgent(Agent):
         """Execute the specific task for this agent"""
         pass
     
+    @abstractmethod
+    def build_prompt(self, task_data: Dict[str, Any], context: Optional[str]) -> Optional[str]:
+        """Build the prompt execute_task would send, without calling the model
+
+        Returns None when the task is answered without an LLM call.
+        """
+        pass
+    
+    def _resolve_mode(self, task_data: Dict[str, Any]) -> str:
+        """Sub-mode chosen by the intent router; the query is only classified here if the caller did not pass one"""
+        return task_data.get("mode") or get_intent_router().mode_for(self.name, task_data.get("query", ""))
+    
     def _format_experience_summary(self, experience_list: list) -> str:
         """Helper method to format experience for prompts"""
         if not experience_list:
@@ -48,51 +89,18 @@ class BaseLinkedInAgent(Agent):
         
         return "; ".join(summary)
     
-    def _format_skills_list(self, skills_list: list) -> str:
-        """Helper method to format skills for prompts"""
+    def _render_profile(self, profile_data: Optional[Dict[str, Any]], **limits) -> str:
+        """Compact profile lines for prompts, with skills as canonical names; limits as in compact_profile"""
+        skills = (profile_data or {}).get("skills")
+        canonical = get_skill_taxonomy().canonicalize(skills) if isinstance(skills, list) else None
+        return compact_profile(profile_data, skills=canonical, **limits)
+    
+    def _format_skills_list(self, skills_list: list, limit: Optional[int] = None, empty: str = "No skills data available") -> str:
+        """Helper method to format skills for prompts, as canonical names with aliases and duplicates folded"""
         if not skills_list:
-            return "No skills data available"
+            return empty
         
         if isinstance(skills_list, list):
-            return ", ".join(skills_list)
+            return ", ".join(get_skill_taxonomy().canonicalize(skills_list)[:limit])
         
         return str(skills_list)
-    
-    def _extract_key_insights(self, response_text: str) -> Dict[str, Any]:
-        """Helper method to extract structured insights from LLM response"""
-        insights = {
-            "recommendations": [],
-            "strengths": [],
-            "improvements": [],
-            "score": None
-        }
-        
-        lines = response_text.split('\n')
-        current_section = None
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-                
-            # Look for section headers
-            if "recommendation" in line.lower() or "suggest" in line.lower():
-                current_section = "recommendations"
-            elif "strength" in line.lower() or "positive" in line.lower():
-                current_section = "strengths" 
-            elif "improvement" in line.lower() or "area" in line.lower():
-                current_section = "improvements"
-            elif "score" in line.lower() and any(char.isdigit() for char in line):
-                # Extract score
-                import re
-                numbers = re.findall(r'\d+', line)
-                if numbers:
-                    insights["score"] = int(numbers[0])
-            
-            # Add content to current section
-            if current_section and line.startswith(('-', '•', '*', '1.', '2.', '3.')):
-                content = line.lstrip('-•* 123456789.')
-                if content:
-                    insights[current_section].append(content)
-        
-        return insights 
\ No newline at end of file
@@ -1,10 +1,45 @@
 import os
 import json
+import sqlite3
 from datetime import datetime
-from typing import Dict, List, Optional
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from ..utils.profile_diff import split_profile_sections, diff_profile_sections, diff_skills
+from ..utils import telemetry
+
+# Number of profile versions kept per profile
+MAX_PROFILE_VERSIONS = 20
+
+# Kinds of stored entries and the JSON files earlier versions kept them in
+PROFILES = "profiles"
+CONVERSATIONS = "conversations"
+GOALS = "goals"
+PROFILE_VERSIONS = "profile_versions"
+SECTION_ANALYSES = "section_analyses"
+JSON_FILES = {
+    PROFILES: "profiles.json",
+    CONVERSATIONS: "conversations.json",
+    GOALS: "goals.json",
+    PROFILE_VERSIONS: "profile_versions.json",
+    SECTION_ANALYSES: "section_analyses.json"
+}
+
+# Called as listener(memory_store_path, user_id, record) after every stored profile, from any session
+_profile_listeners: List[Callable[[str, str, Dict], None]] = []
+
+
+def add_profile_listener(listener: Callable[[str, str, Dict], None]):
+    """Subscribe to profiles stored by any memory manager in this process"""
+    _profile_listeners.append(listener)
 
 class SimpleMemoryManager:
-    """Simplified memory manager using JSON-based storage"""
+    """Simplified memory manager storing one JSON value per user in SQLite
+
+    Several processes (API workers, batch runs) can share one store. Each
+    entry (a user's profile, conversations or goals, a profile's versions or
+    section analyses) is its own row, so a write reads and rewrites only that
+    row, in a transaction, and reads always see what other processes stored.
+    """
     
     def __init__(self, memory_store_path: str):
         self.memory_store_path = memory_store_path
@@ -12,52 +47,277 @@ class SimpleMemoryManager:
         # Create storage directories
         os.makedirs(memory_store_path, exist_ok=True)
         
-        # Simple JSON-based storage for persistence
-        self.profile_file = os.path.join(memory_store_path, "profiles.json")
-        self.conversations_file = os.path.join(memory_store_path, "conversations.json")
-        self.goals_file = os.path.join(memory_store_path, "goals.json")
-        
-        # Load existing data
-        self.profiles = self._load_json_file(self.profile_file)
-        self.conversations = self._load_json_file(self.conversations_file)
-        self.goals = self._load_json_file(self.goals_file)
+        self.db_path = os.path.join(memory_store_path, "memory_store.db")
+        self._init_db()
+        self._import_json_files()
         
         # In-memory storage for current session
         self.session_memory = {}
         
-    def _load_json_file(self, file_path: str) -> Dict:
-        """Load JSON file or return empty dict"""
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection in autocommit mode so transactions are explicit"""
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def _db(self) -> Iterator[sqlite3.Connection]:
+        """Connection that is closed when the block exits"""
+        conn = self._connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Connection holding the write lock until the block exits; rolled back if it raises"""
+        with self._db() as conn:
+            # BEGIN IMMEDIATE takes the write lock up front, so a read-modify-write
+            # of one entry cannot interleave with another process's
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def _init_db(self):
+        """Create the entry tables if they do not exist"""
+        with self._db() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS memory_entries (
+                    kind TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    updated_at TEXT NOT NULL,
+                    PRIMARY KEY (kind, key)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS imported_files (
+                    name TEXT PRIMARY KEY,
+                    mtime INTEGER NOT NULL
+                )
+            """)
+
+    def _import_json_files(self):
+        """Copy entries from JSON files of earlier versions (or seeded by benchmarks) into the database
+
+        A file is imported again only when it changed since, and its entries
+        never replace ones already in the database. A file that does not parse
+        is skipped and retried on the next start.
+        """
+        for kind, name in JSON_FILES.items():
+            file_path = os.path.join(self.memory_store_path, name)
+            try:
+                mtime = os.stat(file_path).st_mtime_ns
+            except OSError:
+                continue
+            try:
+                with self._transaction() as conn:
+                    row = conn.execute("SELECT mtime FROM imported_files WHERE name = ?", (name,)).fetchone()
+                    if row and row["mtime"] == mtime:
+                        continue
+                    with open(file_path, 'r') as f:
+                        entries = json.load(f)
+                    now = datetime.now().isoformat()
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO memory_entries (kind, key, value, updated_at) VALUES (?, ?, ?, ?)",
+                        ((kind, key, json.dumps(value), now) for key, value in entries.items())
+                    )
+                    conn.execute("INSERT OR REPLACE INTO imported_files (name, mtime) VALUES (?, ?)", (name, mtime))
+            except Exception as e:
+                print(f"Error importing {file_path}: {e}")
+    
+    def _get_entry(self, kind: str, key: str) -> Any:
+        """Stored value of one entry, or None"""
+        try:
+            with self._db() as conn:
+                row = conn.execute(
+                    "SELECT value FROM memory_entries WHERE kind = ? AND key = ?", (kind, key)
+                ).fetchone()
+            return json.loads(row["value"]) if row else None
+        except Exception as e:
+            print(f"Error loading {kind} entry {key}: {e}")
+            return None
+    
+    def _get_entries(self, kind: str) -> Dict[str, Any]:
+        """All stored values of one kind, by key"""
+        entries = {}
         try:
-            if os.path.exists(file_path):
-                with open(file_path, 'r') as f:
-                    return json.load(f)
+            with self._db() as conn:
+                rows = conn.execute("SELECT key, value FROM memory_entries WHERE kind = ?", (kind,)).fetchall()
         except Exception as e:
-            print(f"Error loading {file_path}: {e}")
-        return {}
+            print(f"Error loading {kind} entries: {e}")
+            return entries
+        for row in rows:
+            try:
+                entries[row["key"]] = json.loads(row["value"])
+            except ValueError as e:
+                print(f"Error loading {kind} entry {row['key']}: {e}")
+        return entries
     
-    def _save_json_file(self, file_path: str, data: Dict):
-        """Save data to JSON file"""
+    def _update_entry(self, kind: str, key: str, update: Callable[[Any], Any]) -> Any:
+        """Replace one entry with update(current entry) and return the new entry
+
+        The entry is read and written in one transaction, so updates that build
+        on it (appending an interaction, numbering a version) from several
+        processes never overwrite each other. An update returning None removes
+        the entry. If the current entry cannot be read, nothing is written.
+        """
         try:
-            with open(file_path, 'w') as f:
-                json.dump(data, f, indent=2)
+            with self._transaction() as conn:
+                row = conn.execute(
+                    "SELECT value FROM memory_entries WHERE kind = ? AND key = ?", (kind, key)
+                ).fetchone()
+                value = update(json.loads(row["value"]) if row else None)
+                if value is None:
+                    conn.execute("DELETE FROM memory_entries WHERE kind = ? AND key = ?", (kind, key))
+                else:
+                    conn.execute(
+                        """INSERT INTO memory_entries (kind, key, value, updated_at) VALUES (?, ?, ?, ?)
+                           ON CONFLICT (kind, key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at""",
+                        (kind, key, json.dumps(value), datetime.now().isoformat())
+                    )
+                return value
         except Exception as e:
-            print(f"Error saving {file_path}: {e}")
+            print(f"Error saving {kind} entry {key}: {e}")
+            return None
+    
+    def _put_entry(self, kind: str, key: str, value: Any) -> Any:
+        """Store one entry, replacing what was stored under its key"""
+        return self._update_entry(kind, key, lambda _: value)
     
-    async def store_profile(self, user_id: str, profile_data: Dict):
-        """Store user profile data"""
+    async def store_profile(self, user_id: str, profile_data: Dict) -> Dict:
+        """Store user profile data and record a new version with its section-level diff"""
+        version = {}
         try:
             # Store in session memory
             self.session_memory[f"profile_{user_id}"] = profile_data
             
-            # Also store in JSON for persistence
-            self.profiles[user_id] = {
+            # Also store in the database for persistence
+            record = {
                 "profile_data": profile_data,
                 "timestamp": datetime.now().isoformat()
             }
-            self._save_json_file(self.profile_file, self.profiles)
+            self._put_entry(PROFILES, user_id, record)
+            
+            for listener in list(_profile_listeners):
+                try:
+                    listener(self.memory_store_path, user_id, record)
+                except Exception as e:
+                    print(f"Error notifying profile listener: {e}")
+            
+            version = self._record_profile_version(user_id, profile_data)
             
         except Exception as e:
             print(f"Error storing profile: {e}")
+        
+        return version
+    
+    def get_profile(self, user_id: str) -> Optional[Dict]:
+        """Latest stored profile data of a user"""
+        # The stored profile comes first: another process may have stored a newer one
+        record = self._get_entry(PROFILES, user_id)
+        if record:
+            return record["profile_data"]
+        return self.session_memory.get(f"profile_{user_id}")
+    
+    def all_profiles(self) -> Dict[str, Dict]:
+        """Stored profile record of every user, by user ID"""
+        return self._get_entries(PROFILES)
+    
+    def _profile_key(self, user_id: str, profile_data: Optional[Dict] = None) -> str:
+        """Key that links versions of the same LinkedIn profile across sessions"""
+        if profile_data is None:
+            profile_data = self.get_profile(user_id)
+        
+        profile_url = (profile_data or {}).get("profile_url", "")
+        if profile_url:
+            return profile_url.lower().rstrip('/').split('?')[0]
+        return f"user:{user_id}"
+    
+    def _record_profile_version(self, user_id: str, profile_data: Dict) -> Dict:
+        """Diff a freshly stored profile against its previous version and persist the diff"""
+        profile_key = self._profile_key(user_id, profile_data)
+        sections = split_profile_sections(profile_data)
+        version = {}
+        
+        def add_version(versions: Optional[List[Dict]]) -> List[Dict]:
+            # Runs in the entry's transaction, so concurrent scrapes get consecutive version numbers
+            versions = versions or []
+            previous = versions[-1] if versions else None
+            diff = diff_profile_sections(previous["fingerprints"] if previous else {}, sections)
+            version.update(self._profile_version(user_id, profile_data, previous, diff))
+            return (versions + [version])[-MAX_PROFILE_VERSIONS:]
+        
+        self._update_entry(PROFILE_VERSIONS, profile_key, add_version)
+        return version
+    
+    def _profile_version(self, user_id: str, profile_data: Dict, previous: Optional[Dict], diff: Dict) -> Dict:
+        """Version record of a stored profile, given its previous version and their section diff"""
+        version = {
+            "version": previous["version"] + 1 if previous else 1,
+            "user_id": user_id,
+            "timestamp": datetime.now().isoformat(),
+            "fingerprints": diff["fingerprints"],
+            "added": diff["added"],
+            "removed": diff["removed"],
+            "changed": diff["changed"],
+            "unchanged": diff["unchanged"],
+            "values": diff["values"],
+            "skills": profile_data.get("skills", [])
+        }
+        if previous and "skills" in diff["changed"]:
+            version["skills_diff"] = diff_skills(previous.get("skills", []), version["skills"])
+        return version
+    
+    def get_profile_versions(self, user_id: str) -> List[Dict]:
+        """Get the stored versions of a user's current profile, oldest first"""
+        return self._get_entry(PROFILE_VERSIONS, self._profile_key(user_id)) or []
+    
+    def get_changed_sections(self, user_id: str) -> Dict:
+        """Get which sections changed in the latest scrape of a user's profile"""
+        versions = self.get_profile_versions(user_id)
+        if not versions:
+            return {"added": [], "removed": [], "changed": [], "unchanged": [], "version": 0}
+        
+        latest = versions[-1]
+        return {
+            "added": latest["added"] if latest["version"] > 1 else [],
+            "removed": latest["removed"],
+            "changed": latest["changed"],
+            "unchanged": latest["unchanged"],
+            "skills_diff": latest.get("skills_diff", {}),
+            "version": latest["version"]
+        }
+    
+    def get_section_analysis(self, user_id: str, section_key: str, fingerprint: str) -> Optional[str]:
+        """Get a cached section analysis if the section content is unchanged"""
+        cached = (self._get_entry(SECTION_ANALYSES, self._profile_key(user_id)) or {}).get(section_key)
+        if cached and cached.get("fingerprint") == fingerprint:
+            telemetry.CACHE_REQUESTS.inc(cache="section_analysis", result="hit")
+            return cached.get("analysis")
+        telemetry.CACHE_REQUESTS.inc(cache="section_analysis", result="miss")
+        return None
+    
+    def store_section_analysis(self, user_id: str, section_key: str, fingerprint: str, analysis: str):
+        """Cache the analysis of one profile section against its content hash"""
+        try:
+            entry = {
+                "fingerprint": fingerprint,
+                "analysis": analysis,
+                "timestamp": datetime.now().isoformat()
+            }
+            self._update_entry(
+                SECTION_ANALYSES, self._profile_key(user_id),
+                lambda analyses: {**(analyses or {}), section_key: entry}
+            )
+        except Exception as e:
+            print(f"Error storing section analysis: {e}")
     
     async def store_interaction(self, user_id: str, agent_name: str, query: Dict, response: Dict):
         """Store conversation interaction"""
@@ -75,60 +335,62 @@ class SimpleMemoryManager:
             # Store in session memory
             self.session_memory[interaction_id] = interaction_data
             
-            # Also store in JSON for persistence
-            if user_id not in self.conversations:
-                self.conversations[user_id] = []
-            
-            self.conversations[user_id].append(interaction_data)
-            
-            # Keep only last 50 conversations per user to prevent memory bloat
-            if len(self.conversations[user_id]) > 50:
-                self.conversations[user_id] = self.conversations[user_id][-50:]
-            
-            self._save_json_file(self.conversations_file, self.conversations)
+            # Also store in the database, appending in one transaction so concurrent workers keep
+            # every interaction; keep only last 50 conversations per user to prevent memory bloat
+            self._update_entry(
+                CONVERSATIONS, user_id, lambda conversations: ((conversations or []) + [interaction_data])[-50:]
+            )
             
         except Exception as e:
             print(f"Error storing interaction: {e}")
     
     async def get_context(self, user_id: str, agent_name: str, query: str = "") -> str:
         """Retrieve relevant context"""
-        context = "Previous Context:\n"
-        
+        contexts = await self.get_contexts(user_id, [agent_name], query)
+        return contexts[agent_name]
+    
+    async def get_contexts(self, user_id: str, agent_names: List[str], query: str = "") -> Dict[str, str]:
+        """Retrieve the context of several agents, reading the shared profile and goals only once"""
         try:
-            # Get user profile from session memory first, fallback to JSON
-            profile_data = self.session_memory.get(f"profile_{user_id}")
-            if not profile_data and user_id in self.profiles:
-                profile_data = self.profiles[user_id]["profile_data"]
+            # Get the stored user profile, falling back to session memory
+            profile_data = self.get_profile(user_id)
             
+            profile_context = ""
             if profile_data:
                 profile_summary = self._profile_to_text(profile_data)
-                context += f"User Profile: {profile_summary}\n\n"
-            
-            # Get recent conversations for this agent
-            recent_conversations = self._get_recent_conversations(user_id, agent_name)
-            if recent_conversations:
-                context += f"Recent Interactions:\n{recent_conversations}\n\n"
+                profile_context = f"User Profile: {profile_summary}\n\n"
             
             # Get career goals if any
             goals_context = self._get_goals_context(user_id)
-            if goals_context:
-                context += f"Career Goals: {goals_context}\n"
+            
+            # Read the stored conversations once for all agents
+            conversations = self._get_entry(CONVERSATIONS, user_id) or []
+            
+            contexts = {}
+            for agent_name in agent_names:
+                context = "Previous Context:\n" + profile_context
+                
+                # Get recent conversations for this agent
+                recent_conversations = self._get_recent_conversations(conversations, agent_name)
+                if recent_conversations:
+                    context += f"Recent Interactions:\n{recent_conversations}\n\n"
+                
+                if goals_context:
+                    context += f"Career Goals: {goals_context}\n"
+                contexts[agent_name] = context
+            
+            return contexts
                 
         except Exception as e:
             print(f"Error getting context: {e}")
-            context = "No previous context available."
-        
-        return context
+            return {agent_name: "No previous context available." for agent_name in agent_names}
     
-    def _get_recent_conversations(self, user_id: str, agent_name: str) -> str:
-        """Get recent conversations for the specific agent"""
+    def _get_recent_conversations(self, conversations: List[Dict], agent_name: str) -> str:
+        """Get recent conversations of a user for the specific agent"""
         try:
-            if user_id not in self.conversations:
-                return ""
-            
             # Filter conversations for this agent
             agent_conversations = [
-                conv for conv in self.conversations[user_id]
+                conv for conv in conversations
                 if conv.get("agent_name") == agent_name
             ]
             
@@ -153,12 +415,11 @@ class SimpleMemoryManager:
             # Store in session memory
             self.session_memory[f"goals_{user_id}"] = goals
             
-            # Also store in JSON
-            self.goals[user_id] = {
+            # Also store in the database
+            self._put_entry(GOALS, user_id, {
                 "goals": goals,
                 "timestamp": datetime.now().isoformat()
-            }
-            self._save_json_file(self.goals_file, self.goals)
+            })
             
         except Exception as e:
             print(f"Error storing career goals: {e}")
@@ -166,10 +427,9 @@ class SimpleMemoryManager:
     def _get_goals_context(self, user_id: str) -> str:
         """Get user's career goals"""
         try:
-            # Try session memory first
-            goals_data = self.session_memory.get(f"goals_{user_id}")
-            if not goals_data and user_id in self.goals:
-                goals_data = self.goals[user_id]["goals"]
+            # The stored goals come first: another process may have stored newer ones
+            record = self._get_entry(GOALS, user_id)
+            goals_data = record["goals"] if record else self.session_memory.get(f"goals_{user_id}")
             
             if goals_data:
                 return f"Target Role: {goals_data.get('target_role', '')} Industry: {goals_data.get('industry', '')} Skills: {goals_data.get('desired_skills', [])}"
@@ -216,14 +476,32 @@ class MemoryManagerAgent:
     def __init__(self, memory_store_path: str):
         self.memory_manager = SimpleMemoryManager(memory_store_path)
         
-    async def store_profile(self, user_id: str, profile_data: Dict):
+    async def store_profile(self, user_id: str, profile_data: Dict) -> Dict:
         return await self.memory_manager.store_profile(user_id, profile_data)
         
+    def get_profile(self, user_id: str) -> Optional[Dict]:
+        return self.memory_manager.get_profile(user_id)
+        
+    def get_profile_versions(self, user_id: str) -> List[Dict]:
+        return self.memory_manager.get_profile_versions(user_id)
+        
+    def get_changed_sections(self, user_id: str) -> Dict:
+        return self.memory_manager.get_changed_sections(user_id)
+        
+    def get_section_analysis(self, user_id: str, section_key: str, fingerprint: str) -> Optional[str]:
+        return self.memory_manager.get_section_analysis(user_id, section_key, fingerprint)
+        
+    def store_section_analysis(self, user_id: str, section_key: str, fingerprint: str, analysis: str):
+        return self.memory_manager.store_section_analysis(user_id, section_key, fingerprint, analysis)
+        
     async def store_interaction(self, user_id: str, agent_name: str, query: Dict, response: Dict):
         return await self.memory_manager.store_interaction(user_id, agent_name, query, response)
         
     async def get_context(self, user_id: str, agent_name: str, query: str = "") -> str:
         return await self.memory_manager.get_context(user_id, agent_name, query)
         
+    async def get_contexts(self, user_id: str, agent_names: List[str], query: str = "") -> Dict[str, str]:
+        return await self.memory_manager.get_contexts(user_id, agent_names, query)
+        
     async def store_career_goals(self, user_id: str, goals: Dict):
         return await self.memory_manager.store_career_goals(user_id, goals) 
\ No newline at end of file
@@ -0,0 +1,144 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from ..utils import telemetry
+from ..utils.intent_router import ROUTES
+from .base_agent import BaseLinkedInAgent
+
+# One section per agent. depends_on names sections whose results must exist first;
+# they are handed to the agent as task_data["dependency_results"].
+FULL_REPORT_SECTIONS = [
+    {
+        "key": "profile_analysis",
+        "title": "📊 Profile Analysis",
+        "agent": "ProfileAnalyzer",
+        "route": "profile_analysis",
+        "query": "Please provide a comprehensive analysis of my LinkedIn profile including strengths, weaknesses, and improvement suggestions.",
+        "depends_on": []
+    },
+    {
+        "key": "job_matching",
+        "title": "🎯 Job Matching",
+        "agent": "JobMatcher",
+        "route": "job_matching",
+        "query": "Based on my profile, what job opportunities would be the best match for me?",
+        "depends_on": []
+    },
+    {
+        "key": "content_ideas",
+        "title": "✍️ Content Ideas",
+        "agent": "ContentGenerator",
+        "route": "content_generation",
+        "query": "Generate content ideas for my LinkedIn posts to increase engagement.",
+        "depends_on": []
+    },
+    {
+        "key": "career_advice",
+        "title": "💼 Career Advice",
+        "agent": "CareerCounselor",
+        "route": "career_counseling",
+        "query": "What career development advice do you have based on my current profile?",
+        "depends_on": []
+    }
+]
+
+# The sidebar Quick Actions send the same queries, so their answers can be prefetched and shared with the report
+QUICK_ACTION_QUERIES = {section["key"]: section["query"] for section in FULL_REPORT_SECTIONS}
+
+
+class FullReportOrchestrator:
+    """Runs several agents concurrently as a small dependency graph
+
+    The memory context of every agent is fetched in one pass up front, then each
+    section starts as soon as the sections it depends on have finished. With no
+    dependencies all agents run at once, so the report takes about as long as the
+    slowest agent. Gemini calls still go through the process-wide concurrency limit.
+    """
+
+    def __init__(self, agents: List[BaseLinkedInAgent], memory_manager=None, sections: Optional[List[Dict]] = None):
+        self.agents = {agent.name: agent for agent in agents}
+        self.memory_manager = memory_manager
+        self.sections = sections or FULL_REPORT_SECTIONS
+        self._validate_graph()
+
+    def _validate_graph(self):
+        """Reject unknown agents, unknown dependencies and cycles"""
+        keys = {section["key"] for section in self.sections}
+        for section in self.sections:
+            if section["agent"] not in self.agents:
+                raise ValueError(f"Section {section['key']} uses unknown agent {section['agent']}")
+            missing = set(section.get("depends_on", [])) - keys
+            if missing:
+                raise ValueError(f"Section {section['key']} depends on unknown sections: {sorted(missing)}")
+
+        dependencies = {section["key"]: set(section.get("depends_on", [])) for section in self.sections}
+        resolved = set()
+        while dependencies:
+            ready = [key for key, needs in dependencies.items() if needs <= resolved]
+            if not ready:
+                raise ValueError(f"Dependency cycle between sections: {sorted(dependencies)}")
+            for key in ready:
+                resolved.add(key)
+                del dependencies[key]
+
+    async def run(
+        self,
+        user_id: str,
+        profile_data: Dict,
+        on_section_complete: Optional[Callable[[Dict, Dict[str, Any], float], None]] = None
+    ) -> Dict[str, Any]:
+        """Run every section and return their results and timings
+
+        on_section_complete(section, result, seconds) is called as each section
+        finishes, so callers can render the report progressively.
+        """
+        start_time = time.perf_counter()
+        with telemetry.span("full_report", sections=len(self.sections)):
+            contexts = {}
+            if self.memory_manager:
+                with telemetry.span("context", kind="shared"):
+                    contexts = await self.memory_manager.get_contexts(
+                        user_id, list({section["agent"] for section in self.sections})
+                    )
+
+            results: Dict[str, Dict[str, Any]] = {}
+            timings: Dict[str, float] = {}
+            tasks: Dict[str, asyncio.Task] = {}
+
+            async def run_section(section: Dict):
+                dependencies = section.get("depends_on", [])
+                if dependencies:
+                    await asyncio.gather(*(tasks[key] for key in dependencies))
+
+                agent = self.agents[section["agent"]]
+                task_data = {
+                    "query": section["query"],
+                    "profile_data": profile_data,
+                    "intent": section["route"],
+                    "mode": ROUTES[section["route"]][1]
+                }
+                if dependencies:
+                    task_data["dependency_results"] = {key: results[key] for key in dependencies}
+
+                section_start = time.perf_counter()
+                result = await agent.execute_with_memory(task_data, user_id, context=contexts.get(agent.name, ""))
+                timings[section["key"]] = time.perf_counter() - section_start
+                results[section["key"]] = result
+
+                if on_section_complete:
+                    try:
+                        on_section_complete(section, result, timings[section["key"]])
+                    except Exception as e:
+                        print(f"Error rendering section {section['key']}: {e}")
+
+            # All tasks exist before any of them runs, so dependencies can be awaited by key
+            for section in self.sections:
+                tasks[section["key"]] = asyncio.create_task(run_section(section))
+            await asyncio.gather(*tasks.values())
+
+        return {
+            "sections": results,
+            "timings": timings,
+            "elapsed": time.perf_counter() - start_time
+        }
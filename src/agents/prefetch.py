@@ -0,0 +1,133 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+from ..config.settings import settings
+from ..services.concurrency import PriorityTicket, background_priority
+from ..services.response_cache import ResponseCache, get_response_cache, response_key
+from ..services.token_usage import TokenUsageTracker, get_token_usage_tracker
+from ..utils import telemetry
+from ..utils.intent_router import classify_intent
+from .base_agent import BaseLinkedInAgent
+from .orchestrator import QUICK_ACTION_QUERIES
+
+
+class SpeculativePrefetcher:
+    """Precomputes the Quick Action answers of a freshly loaded profile at background priority
+
+    Streamlit closes a script run's event loop when the run ends, so the work
+    runs on a private event loop in a daemon thread. Each query is routed the
+    way an interactive request would be, and its result lands in the response
+    cache under the same key, where the first matching request takes it.
+    """
+
+    def __init__(self, cache: ResponseCache, usage_tracker: TokenUsageTracker, queries: Optional[List[str]] = None):
+        self.cache = cache
+        self.usage_tracker = usage_tracker
+        self.queries = queries or list(QUICK_ACTION_QUERIES.values())
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._start_lock = threading.Lock()
+        # Bumped on every schedule and cancel, so a superseded prefetch never registers its entries
+        self._generations: Dict[str, int] = {}
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Start the background event loop on first use"""
+        with self._start_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="prefetch-loop", daemon=True).start()
+            return self._loop
+
+    def schedule(
+        self,
+        user_id: str,
+        profile_data: Dict,
+        agents: List[BaseLinkedInAgent],
+        memory_manager=None
+    ) -> Optional[Future]:
+        """Start precomputing the Quick Action answers for a user, replacing any earlier prefetch"""
+        generation = self.cancel(user_id)
+        if not settings.PREFETCH_ENABLED or settings.PREFETCH_MAX_CONCURRENCY <= 0:
+            return None
+        return asyncio.run_coroutine_threadsafe(
+            self._prefetch_all(user_id, profile_data, agents, memory_manager, generation), self._ensure_loop()
+        )
+
+    def cancel(self, user_id: str) -> int:
+        """Drop a user's prefetched answers; calls still waiting for a slot are abandoned"""
+        with self._start_lock:
+            generation = self._generations.get(user_id, 0) + 1
+            self._generations[user_id] = generation
+        self.cache.invalidate(user_id)
+        return generation
+
+    def _budget_allows(self, user_id: str, agent_name: str) -> bool:
+        """Leave the tail of every daily budget to queries the user actually asks"""
+        for status in self.usage_tracker.budget_status(user_id, agent_name):
+            if status["used"] >= status["budget"] * settings.PREFETCH_MAX_BUDGET_SHARE:
+                return False
+        return True
+
+    async def _prefetch_all(self, user_id: str, profile_data: Dict, agents: List[BaseLinkedInAgent], memory_manager, generation: int):
+        agents_by_name = {agent.name: agent for agent in agents}
+        plans = []
+        for query in self.queries:
+            intent = classify_intent(query)
+            agent = agents_by_name.get(intent.agent)
+            if agent and self._budget_allows(user_id, agent.name):
+                plans.append((agent, {"query": query, "profile_data": profile_data, "intent": intent.route, "mode": intent.mode}))
+
+        contexts = {}
+        if memory_manager and plans:
+            contexts = await memory_manager.get_contexts(user_id, list({agent.name for agent, _ in plans}))
+
+        jobs = []
+        with self._start_lock:
+            if self._generations.get(user_id) != generation:
+                return
+            for agent, task_data in plans:
+                context = contexts.get(agent.name, "")
+                key = response_key(agent.name, task_data, context)
+                future, ticket = Future(), PriorityTicket()
+                self.cache.put_pending(user_id, key, future, ticket)
+                jobs.append(self._precompute(agent, task_data, user_id, context, key, future, ticket))
+        await asyncio.gather(*jobs)
+
+    async def _precompute(
+        self,
+        agent: BaseLinkedInAgent,
+        task_data: Dict,
+        user_id: str,
+        context: str,
+        key: str,
+        future: Future,
+        ticket: PriorityTicket
+    ):
+        """Run one agent task at background priority and publish its result"""
+        result = None
+        try:
+            with background_priority(ticket), telemetry.request_context(), \
+                    telemetry.tagged(agent=agent.name, user_id=user_id), telemetry.span("prefetch", agent=agent.name):
+                result = await agent.execute_task(task_data, context)
+            # Background LLM failures raise, so an error here never reaches the cache
+            if "error" in result:
+                result = None
+        except Exception as e:
+            print(f"Error prefetching {agent.name} response: {e}")
+        finally:
+            self.cache.complete(user_id, key, future, result)
+            future.set_result(result)
+
+
+_prefetcher_instance: Optional[SpeculativePrefetcher] = None
+_prefetcher_lock = threading.Lock()
+
+
+def get_prefetcher() -> SpeculativePrefetcher:
+    """Return the process-wide prefetcher, sharing the response cache with every agent"""
+    global _prefetcher_instance
+    with _prefetcher_lock:
+        if _prefetcher_instance is None:
+            _prefetcher_instance = SpeculativePrefetcher(get_response_cache(), get_token_usage_tracker())
+        return _prefetcher_instance
@@ -1,7 +1,15 @@
 from .base_agent import BaseLinkedInAgent
 from typing import Dict, Any, Optional
+from ..services.concurrency import PrefetchCancelled
+from ..utils import telemetry
+import asyncio
+from ..utils.profile_diff import split_profile_sections, fingerprint
+from ..utils.prompt_templates import AGENT_PROMPTS, PROFILE_ANALYSIS_PROMPTS
+from ..utils.profile_scoring import score_profile, format_score_facts
 
 class ProfileAnalyzerAgent(BaseLinkedInAgent):
+    response_field = "analysis"
+    
     def __init__(self, gemini_client, memory_manager):
         super().__init__("ProfileAnalyzer", gemini_client, memory_manager)
         
@@ -14,126 +22,116 @@ class ProfileAnalyzerAgent(BaseLinkedInAgent):
             if not profile_data:
                 return {"error": "No profile data provided for analysis"}
             
+            # Deterministic facts first, so the model gets them instead of raw data
+            with telemetry.span("local_score"):
+                local_score = score_profile(profile_data)
+            
             # Analyze the profile
-            analysis = await self._analyze_profile(profile_data, query, context)
+            analysis = await self._analyze_profile(profile_data, query, context, local_score)
             
             return {
                 "analysis": analysis,
+                "local_score": local_score,
                 "success": True
             }
             
         except Exception as e:
             return {"error": f"Profile analysis failed: {str(e)}"}
     
-    async def _analyze_profile(self, profile_data: Dict, query: str, context: str) -> str:
+    def build_prompt(self, task_data: Dict[str, Any], context: Optional[str]) -> Optional[str]:
+        """Build the profile analysis prompt without calling the model"""
+        profile_data = task_data.get("profile_data")
+        if not profile_data:
+            return None
+        return self._build_analysis_prompt(profile_data, task_data.get("query", ""), context)
+    
+    async def _analyze_profile(self, profile_data: Dict, query: str, context: str, local_score: Optional[Dict] = None) -> str:
         """Analyze LinkedIn profile and provide insights"""
-        
-        # Create a comprehensive analysis prompt
-        prompt = f"""
-        As a LinkedIn profile optimization expert, analyze this profile and provide actionable insights.
-        
-        Profile Data:
-        - Name: {profile_data.get('full_name', 'N/A')}
-        - Headline: {profile_data.get('headline', 'N/A')}
-        - About: {profile_data.get('about', 'Not provided')[:500]}...
-        - Experience: {len(profile_data.get('experience', []))} positions
-        - Education: {len(profile_data.get('education', []))} entries
-        - Skills: {len(profile_data.get('skills', []))} skills listed
-        - Location: {profile_data.get('location', 'N/A')}
-        
-        {context}
-        
-        User Question: {query}
-        
-        Provide a comprehensive analysis including:
-        1. Profile Completeness Assessment (rate 1-10)
-        2. Key Strengths 
-        3. Areas for Improvement
-        4. Specific Recommendations
-        5. Next Steps
-        
-        Be specific, actionable, and encouraging. Format your response clearly with headers and bullet points.
-        """
-        
+        with telemetry.span("prompt_build"):
+            prompt = self._build_analysis_prompt(profile_data, query, context, local_score)
         analysis = await self.gemini_client.generate_response(prompt)
         return analysis
     
-    def _calculate_completeness_score(self, profile_data: Dict) -> Dict:
-        """Calculate profile completeness score"""
-        score = 0
-        total_points = 10
-        feedback = []
-        
-        # Basic info (2 points)
-        if profile_data.get('full_name'):
-            score += 1
-        else:
-            feedback.append("Add your full name")
+    def _build_analysis_prompt(self, profile_data: Dict, query: str, context: str, local_score: Optional[Dict] = None) -> str:
+        """Build the profile analysis prompt"""
+        local_score = local_score or score_profile(profile_data)
+        
+        return AGENT_PROMPTS["profile_analysis"].render(
+            profile=self._render_profile(profile_data, about_chars=500, max_skills=0, max_experience=0, max_education=0),
+            facts=format_score_facts(local_score),
+            context=context or "",
+            query=query
+        )
+    
+    async def analyze_sections(self, profile_data: Dict, user_id: str) -> Dict[str, Any]:
+        """Analyze each profile section, sending only sections changed since the last scrape to Gemini"""
+        sections = split_profile_sections(profile_data)
+        analyses = {}
+        reused = []
+        pending = {}
+        
+        for section_key, value in sections.items():
+            section_fingerprint = fingerprint(value)
+            cached = None
+            if self.memory_manager:
+                cached = self.memory_manager.get_section_analysis(user_id, section_key, section_fingerprint)
             
-        if profile_data.get('headline'):
-            score += 1
-        else:
-            feedback.append("Add a professional headline")
-        
-        # About section (2 points)
-        about = profile_data.get('about', '')
-        if len(about) > 100:
-            score += 2
-        elif len(about) > 0:
-            score += 1
-            feedback.append("Expand your About section (aim for 200+ words)")
-        else:
-            feedback.append("Add an About section")
-        
-        # Experience (3 points)
-        experience = profile_data.get('experience', [])
-        if len(experience) >= 3:
-            score += 2
-        elif len(experience) >= 1:
-            score += 1
-            feedback.append("Add more work experience entries")
-        else:
-            feedback.append("Add your work experience")
-        
-        # Check if experience has descriptions
-        if any(exp.get('description') for exp in experience):
-            score += 1
-        else:
-            feedback.append("Add descriptions to your experience entries")
-        
-        # Education (1 point)
-        if profile_data.get('education'):
-            score += 1
-        else:
-            feedback.append("Add your education background")
-        
-        # Skills (2 points)
-        skills = profile_data.get('skills', [])
-        if len(skills) >= 10:
-            score += 2
-        elif len(skills) >= 5:
-            score += 1
-            feedback.append("Add more relevant skills (aim for 10+)")
-        else:
-            feedback.append("Add your key skills")
-        
-        percentage = int((score / total_points) * 100)
+            if cached:
+                analyses[section_key] = cached
+                reused.append(section_key)
+            else:
+                pending[section_key] = section_fingerprint
+        
+        with telemetry.tagged(agent=self.name, user_id=user_id):
+            responses = await asyncio.gather(*(
+                self.gemini_client.generate_response(
+                    self._build_section_prompt(section_key, sections[section_key], profile_data), raise_errors=True
+                )
+                for section_key in pending
+            ), return_exceptions=True)
+        
+        for (section_key, section_fingerprint), analysis in zip(pending.items(), responses):
+            if isinstance(analysis, PrefetchCancelled):
+                raise analysis
+            if isinstance(analysis, Exception):
+                # Failed sections are reported but never cached, so the next run retries them
+                analyses[section_key] = f"I apologize, but I couldn't analyze this section: {analysis}"
+                continue
+            analyses[section_key] = analysis
+            if self.memory_manager:
+                self.memory_manager.store_section_analysis(user_id, section_key, section_fingerprint, analysis)
         
         return {
-            "score": percentage,
-            "raw_score": score,
-            "total_points": total_points,
-            "feedback": feedback,
-            "level": self._get_completeness_level(percentage)
+            "sections": analyses,
+            "reanalyzed": list(pending),
+            "reused": reused,
+            "success": True
         }
     
-    def _get_completeness_level(self, score: int) -> str:
-        """Get completeness level based on score"""
-        if score >= 90:
-            return "Excellent"
-        elif score >= 75:
-            return "Good"
-        elif score >= 50:
-            return "Fair"
+    def _build_section_prompt(self, section_key: str, value: Any, profile_data: Dict) -> str:
+        """Build the analysis prompt for a single profile section"""
+        if section_key == "about":
+            return PROFILE_ANALYSIS_PROMPTS["about_analysis"].render(about_text=value)
+        elif section_key == "headline":
+            return PROFILE_ANALYSIS_PROMPTS["headline_analysis"].render(headline=value)
+        elif section_key == "skills":
+            return PROFILE_ANALYSIS_PROMPTS["skills_analysis"].render(
+                skills_list=self._format_skills_list(value),
+                target_industry=profile_data.get('headline', 'Not specified')
+            )
+        elif section_key == "education":
+            education = "; ".join(
+                f"{edu.get('degree', '')} {edu.get('field', '')} at {edu.get('school', '')}".strip()
+                for edu in value if isinstance(edu, dict)
+            )
+            return PROFILE_ANALYSIS_PROMPTS["education_analysis"].render(
+                education=education or "Not specified",
+                headline=profile_data.get('headline', 'Not specified')
+            )
         else:
-            return "Needs Improvement" 
\ No newline at end of file
+            return PROFILE_ANALYSIS_PROMPTS["experience_analysis"].render(
+                job_title=value.get('title', 'Unknown Title'),
+                company=value.get('company', 'Unknown Company'),
+                description=value.get('description') or 'Not provided',
+                duration=value.get('duration', 'Unknown Duration')
+            )
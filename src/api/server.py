@@ -0,0 +1,391 @@
+"""
+Async HTTP API over the LinkedIn Enhancer agents
+
+The same GeminiClient, MemoryManagerAgent, LinkedInScraperService and agents
+the Streamlit app uses, served by one long-lived event loop per worker process
+instead of an asyncio.run per click. Scrapes go through the SQLite scrape
+queue, so every worker sees every job.
+
+Agent endpoints and the full report stream Server-Sent Events when the request
+asks for them (stream: true or Accept: text/event-stream).
+"""
+
+import asyncio
+import json
+import os
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+from pydantic import BaseModel, ValidationError
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from ..agents.career_counselor import CareerCounselorAgent
+from ..agents.content_generator import ContentGeneratorAgent
+from ..agents.job_matcher import JobMatcherAgent
+from ..agents.memory_manager import MemoryManagerAgent
+from ..agents.orchestrator import FullReportOrchestrator, QUICK_ACTION_QUERIES
+from ..agents.prefetch import get_prefetcher
+from ..agents.profile_analyzer import ProfileAnalyzerAgent
+from ..config.settings import settings
+from ..services.concurrency import get_gemini_limiter
+from ..services.gemini_client import GeminiClient, stream_to
+from ..services.linkedin_scraper import LinkedInProfile, LinkedInScraperService
+from ..services.model_router import get_model_router
+from ..services.profile_index import get_profile_index, peer_benchmark
+from ..services.scrape_queue import SUCCEEDED, TERMINAL_STATUSES, get_scrape_queue
+from ..services.token_usage import get_token_usage_tracker
+from ..utils import telemetry
+from ..utils.intent_router import ROUTES, get_intent_router
+from ..utils.profile_scoring import score_profile
+from ..utils.response_parser import ResponseParser
+
+# Endpoint -> (agent name, query used when the request has none, whether the agent needs a profile)
+AGENT_ENDPOINTS = {
+    "analyze": ("ProfileAnalyzer", QUICK_ACTION_QUERIES["profile_analysis"], True),
+    "match": ("JobMatcher", QUICK_ACTION_QUERIES["job_matching"], True),
+    "generate": ("ContentGenerator", QUICK_ACTION_QUERIES["content_ideas"], False),
+    "counsel": ("CareerCounselor", QUICK_ACTION_QUERIES["career_advice"], False)
+}
+
+
+class AgentRequest(BaseModel):
+    user_id: str
+    query: Optional[str] = None
+    profile_data: Optional[Dict[str, Any]] = None  # defaults to the user's stored profile
+    stream: bool = False
+
+
+class ScrapeRequest(BaseModel):
+    user_id: str
+    profile_url: str
+
+
+class ReportRequest(BaseModel):
+    user_id: str
+    stream: bool = False
+
+
+class AgentService:
+    """The services and agents behind the API, built once per worker process"""
+
+    def __init__(self):
+        settings.validate_settings()
+        self.usage_tracker = get_token_usage_tracker(settings.MEMORY_STORE_PATH)
+        self.gemini_client = GeminiClient(settings.GEMINI_API_KEY, usage_tracker=self.usage_tracker)
+        self.linkedin_scraper = LinkedInScraperService(settings.APIFY_API_TOKEN)
+        self.memory_manager = MemoryManagerAgent(settings.MEMORY_STORE_PATH)
+        self.scrape_queue = get_scrape_queue(self.linkedin_scraper)
+        self.prefetcher = get_prefetcher()
+        self.profile_index = get_profile_index(settings.MEMORY_STORE_PATH)
+
+        agents = [
+            ProfileAnalyzerAgent(self.gemini_client, self.memory_manager),
+            JobMatcherAgent(self.gemini_client, self.memory_manager),
+            ContentGeneratorAgent(self.gemini_client, self.memory_manager),
+            CareerCounselorAgent(self.gemini_client, self.memory_manager)
+        ]
+        self.agents = {agent.name: agent for agent in agents}
+        self.full_report = FullReportOrchestrator(agents, self.memory_manager)
+
+    async def store_profile(self, user_id: str, profile_data: Dict) -> Dict:
+        """Store a profile and start prefetching its Quick Action answers, as the app does on load"""
+        with telemetry.span("store", kind="profile"):
+            version = await self.memory_manager.store_profile(user_id, profile_data)
+        self.prefetcher.schedule(user_id, profile_data, list(self.agents.values()), self.memory_manager)
+        return version
+
+    async def store_scraped_profile(self, job: Dict):
+        """Store the result of a finished scrape once, whichever worker sees it first"""
+        if job["status"] == SUCCEEDED and job["result"] and self.memory_manager.get_profile(job["user_id"]) != job["result"]:
+            await self.store_profile(job["user_id"], job["result"])
+
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _wants_stream(request: Request, body_stream: bool) -> bool:
+    return body_stream or "text/event-stream" in request.headers.get("accept", "")
+
+
+async def _event_stream(
+    run: Callable[[Callable[[str, Any], None]], Awaitable[Any]],
+    first_event: Dict[str, Any]
+) -> AsyncIterator[str]:
+    """Run work that can emit intermediate events, streaming them as SSE with keep-alive comments in between
+
+    The work starts inside the generator, so it runs under the stream's request
+    context and is cancelled when the client disconnects.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    with telemetry.request_context() as request_id:
+        yield _sse("started", {"request_id": request_id, **first_event})
+        task = asyncio.create_task(run(lambda event, data: queue.put_nowait((event, data))))
+        try:
+            while not task.done() or not queue.empty():
+                getter = asyncio.ensure_future(queue.get())
+                done, _ = await asyncio.wait({getter, task}, timeout=settings.API_STREAM_HEARTBEAT, return_when=asyncio.FIRST_COMPLETED)
+                if getter in done:
+                    yield _sse(*getter.result())
+                    continue
+                getter.cancel()
+                if not done:
+                    yield ": keep-alive\n\n"
+            yield _sse("done", task.result())
+        except Exception as e:
+            yield _sse("error", {"error": str(e)})
+        finally:
+            task.cancel()
+
+
+def _streaming_response(events: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(events, media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+async def _parse(request: Request, model):
+    """Validate a JSON body, returning (body, None) or (None, error response)"""
+    try:
+        return model(**await request.json()), None
+    except json.JSONDecodeError:
+        return None, JSONResponse({"error": "Request body must be JSON"}, status_code=400)
+    except (ValidationError, TypeError) as e:
+        errors = e.errors(include_url=False) if isinstance(e, ValidationError) else str(e)
+        return None, JSONResponse({"error": "Invalid request", "details": errors}, status_code=422)
+
+
+def _service(request: Request) -> Optional[AgentService]:
+    return getattr(request.app.state, "service", None)
+
+
+def _unavailable(request: Request) -> JSONResponse:
+    return JSONResponse({"error": f"Service not started: {request.app.state.startup_error}"}, status_code=503)
+
+
+async def health(request: Request) -> Response:
+    """Liveness: the worker process is up and serving requests"""
+    return JSONResponse({"status": "ok", "pid": os.getpid()})
+
+
+async def ready(request: Request) -> Response:
+    """Readiness: services are built and the memory store and scrape queue are usable"""
+    service = _service(request)
+    checks = {"services": service is not None}
+    if service:
+        checks["memory_store"] = os.access(settings.MEMORY_STORE_PATH, os.W_OK)
+        try:
+            scrape_queue_depth = service.scrape_queue.queue_depth()
+            checks["scrape_queue"] = True
+        except Exception:
+            scrape_queue_depth = None
+            checks["scrape_queue"] = False
+
+    body = {"status": "ready" if all(checks.values()) else "not_ready", "checks": checks}
+    if service:
+        body.update(scrape_queue_depth=scrape_queue_depth, gemini_limiter=get_gemini_limiter().stats(), models=get_model_router().stats())
+    else:
+        body["error"] = request.app.state.startup_error
+    return JSONResponse(body, status_code=200 if all(checks.values()) else 503)
+
+
+async def metrics(request: Request) -> Response:
+    """Prometheus metrics of this worker process"""
+    return PlainTextResponse(telemetry.REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+async def scrape(request: Request) -> Response:
+    """Queue a LinkedIn scrape; poll or stream /scrape/{job_id} for progress"""
+    service = _service(request)
+    if service is None:
+        return _unavailable(request)
+    body, error = await _parse(request, ScrapeRequest)
+    if error:
+        return error
+
+    job_id = service.scrape_queue.submit(body.user_id, body.profile_url)
+    return JSONResponse({"job_id": job_id, "status": "queued"}, status_code=202)
+
+
+async def scrape_job(request: Request) -> Response:
+    """State of a scrape job, or its progress events as SSE; a scraped profile is stored for the user"""
+    service = _service(request)
+    if service is None:
+        return _unavailable(request)
+    job_id = request.path_params["job_id"]
+    job = service.scrape_queue.get_job(job_id)
+    if job is None:
+        return JSONResponse({"error": f"Unknown scrape job {job_id}"}, status_code=404)
+
+    if not _wants_stream(request, request.query_params.get("stream") == "true"):
+        await service.store_scraped_profile(job)
+        return JSONResponse(job)
+
+    async def watch(emit: Callable[[str, Any], None]) -> Dict:
+        # watch() blocks between events, so it is stepped from a worker thread
+        events = service.scrape_queue.watch(job_id, timeout=settings.SCRAPE_MAX_WAIT + 60)
+        while True:
+            event = await asyncio.to_thread(next, events, None)
+            if event is None:
+                break
+            emit("progress", event)
+        finished = service.scrape_queue.get_job(job_id)
+        if finished and finished["status"] in TERMINAL_STATUSES:
+            await service.store_scraped_profile(finished)
+        return finished
+
+    return _streaming_response(_event_stream(watch, {"job_id": job_id}))
+
+
+async def profile(request: Request) -> Response:
+    """GET the stored profile with its local score, or PUT a normalized profile for the user"""
+    service = _service(request)
+    if service is None:
+        return _unavailable(request)
+    user_id = request.path_params["user_id"]
+
+    if request.method == "PUT":
+        body, error = await _parse(request, LinkedInProfile)
+        if error:
+            return error
+        version = await service.store_profile(user_id, body.dict())
+        return JSONResponse({"user_id": user_id, "version": version.get("version"), "local_score": score_profile(body.dict())})
+
+    profile_data = service.memory_manager.get_profile(user_id)
+    if not profile_data:
+        return JSONResponse({"error": f"No profile stored for user {user_id}"}, status_code=404)
+    return JSONResponse({"user_id": user_id, "profile_data": profile_data, "local_score": score_profile(profile_data)})
+
+
+async def similar_profiles(request: Request) -> Response:
+    """Stored profiles most like the user's, with the user's local score benchmarked against theirs (?k=, default 10)"""
+    service = _service(request)
+    if service is None:
+        return _unavailable(request)
+    user_id = request.path_params["user_id"]
+    profile_data = service.memory_manager.get_profile(user_id)
+    if not profile_data:
+        return JSONResponse({"error": f"No profile stored for user {user_id}"}, status_code=404)
+    try:
+        k = max(1, min(int(request.query_params.get("k", 10)), 100))
+    except ValueError:
+        return JSONResponse({"error": "k must be an integer"}, status_code=422)
+
+    with telemetry.request_context(), telemetry.span("similar_profiles"):
+        peers = await asyncio.to_thread(service.profile_index.similar_to_profile, profile_data, k, user_id)
+    peer_profiles = [service.memory_manager.get_profile(peer["user_id"]) for peer in peers]
+    # Peers are other users: only their headline and similarity leave the server, never their ID or name
+    return JSONResponse({
+        "peers": [{"headline": peer["headline"], "similarity": peer["similarity"]} for peer in peers],
+        "benchmark": peer_benchmark(profile_data, [peer for peer in peer_profiles if peer])
+    })
+
+
+def agent_endpoint(endpoint: str):
+    """Handler running one agent with the user's memory, as a chat query routed to it would"""
+    agent_name, default_query, needs_profile = AGENT_ENDPOINTS[endpoint]
+
+    async def handler(request: Request) -> Response:
+        service = _service(request)
+        if service is None:
+            return _unavailable(request)
+        body, error = await _parse(request, AgentRequest)
+        if error:
+            return error
+
+        profile_data = body.profile_data or service.memory_manager.get_profile(body.user_id)
+        if needs_profile and not profile_data:
+            return JSONResponse({"error": f"No profile stored for user {body.user_id}; PUT /profiles/{body.user_id} or scrape one first"}, status_code=404)
+
+        query = body.query or default_query
+        mode = get_intent_router().mode_for(agent_name, query)
+        route = next(route for route, target in ROUTES.items() if target == (agent_name, mode))
+        task_data = {"query": query, "profile_data": profile_data, "intent": route, "mode": mode}
+        agent = service.agents[agent_name]
+        streaming = _wants_stream(request, body.stream)
+
+        async def run(emit: Callable[[str, Any], None]) -> Dict:
+            if not streaming:
+                return {"agent": agent_name, "route": route, "result": await agent.execute_with_memory(task_data, body.user_id)}
+            # Text deltas, plus the section, item and score events parsed from them as they arrive
+            parser = ResponseParser()
+
+            def on_chunk(chunk: str):
+                emit("text", {"text": chunk})
+                for event in parser.feed(chunk):
+                    emit("insight", event)
+
+            with stream_to(on_chunk):
+                result = await agent.execute_with_memory(task_data, body.user_id)
+            for event in parser.close():
+                emit("insight", event)
+            return {"agent": agent_name, "route": route, "result": result}
+
+        if streaming:
+            return _streaming_response(_event_stream(run, {"agent": agent_name, "route": route}))
+
+        with telemetry.request_context() as request_id:
+            response = await run(lambda event, data: None)
+        return JSONResponse({"request_id": request_id, **response}, status_code=502 if "error" in response["result"] else 200)
+
+    return handler
+
+
+async def report(request: Request) -> Response:
+    """Full report of all four agents; streamed, each section is sent as soon as it is ready"""
+    service = _service(request)
+    if service is None:
+        return _unavailable(request)
+    body, error = await _parse(request, ReportRequest)
+    if error:
+        return error
+    profile_data = service.memory_manager.get_profile(body.user_id)
+    if not profile_data:
+        return JSONResponse({"error": f"No profile stored for user {body.user_id}"}, status_code=404)
+
+    async def run(emit: Callable[[str, Any], None]) -> Dict:
+        def on_section_complete(section: Dict, result: Dict[str, Any], seconds: float):
+            emit("section", {"key": section["key"], "agent": section["agent"], "seconds": round(seconds, 3), "result": result})
+        report_result = await service.full_report.run(body.user_id, profile_data, on_section_complete)
+        return {"timings": report_result["timings"], "elapsed": report_result["elapsed"], "sections": list(report_result["sections"])}
+
+    if _wants_stream(request, body.stream):
+        return _streaming_response(_event_stream(run, {"sections": [section["key"] for section in service.full_report.sections]}))
+
+    with telemetry.request_context() as request_id:
+        report_result = await service.full_report.run(body.user_id, profile_data)
+    return JSONResponse({"request_id": request_id, **report_result})
+
+
+@asynccontextmanager
+async def lifespan(app: Starlette):
+    """Build the services in each worker; a failure leaves the worker alive but not ready"""
+    app.state.startup_error = None
+    try:
+        app.state.service = AgentService()
+    except Exception as e:
+        print(f"Error starting API services: {e}")
+        app.state.startup_error = str(e)
+    yield
+    service = getattr(app.state, "service", None)
+    if service:
+        service.scrape_queue.stop()
+
+
+def create_app() -> Starlette:
+    routes = [
+        Route("/health", health),
+        Route("/ready", ready),
+        Route("/metrics", metrics),
+        Route("/scrape", scrape, methods=["POST"]),
+        Route("/scrape/{job_id}", scrape_job),
+        Route("/profiles/{user_id}", profile, methods=["GET", "PUT"]),
+        Route("/profiles/{user_id}/similar", similar_profiles),
+        Route("/report", report, methods=["POST"])
+    ]
+    routes += [Route(f"/{endpoint}", agent_endpoint(endpoint), methods=["POST"]) for endpoint in AGENT_ENDPOINTS]
+    return Starlette(routes=routes, lifespan=lifespan)
+
+
+app = create_app()
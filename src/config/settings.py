@@ -16,16 +16,110 @@ class Settings:
     # Memory Storage
     MEMORY_STORE_PATH = os.getenv("MEMORY_STORE_PATH", "./data/memory_store")
     
+    # Background Scrape Queue
+    SCRAPE_QUEUE_PATH = os.getenv("SCRAPE_QUEUE_PATH", os.path.join(MEMORY_STORE_PATH, "scrape_jobs.db"))
+    SCRAPE_WORKERS = int(os.getenv("SCRAPE_WORKERS", "2"))
+    SCRAPE_MAX_CONCURRENT_RUNS = int(os.getenv("SCRAPE_MAX_CONCURRENT_RUNS", "1"))
+    SCRAPE_POLL_INTERVAL = float(os.getenv("SCRAPE_POLL_INTERVAL", "5"))
+    SCRAPE_MAX_WAIT = int(os.getenv("SCRAPE_MAX_WAIT", "300"))
+    
     # Logging
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
     
     # Model Configuration
     DEFAULT_TEMPERATURE = 0.7
     MAX_OUTPUT_TOKENS = 2048
+    GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "2"))
+    GEMINI_RETRY_BACKOFF = float(os.getenv("GEMINI_RETRY_BACKOFF", "1.0"))
+    GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))  # across all sessions, 0 = unlimited
+    
+    # Model Tiering: a model per intent route or agent, and fallback to the fast model while the chosen one is degraded
+    GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-pro")
+    GEMINI_FAST_MODEL = os.getenv("GEMINI_FAST_MODEL", "gemini-1.5-flash")
+    GEMINI_ROUTE_MODELS = os.getenv(
+        "GEMINI_ROUTE_MODELS", "content_generation:gemini-1.5-flash,career_counseling:gemini-1.5-flash"
+    )  # route or agent name -> model, e.g. "job_fit_analysis:gemini-1.5-pro,ContentGenerator:gemini-1.5-flash"
+    MODEL_LATENCY_SLO_SECONDS = float(os.getenv("MODEL_LATENCY_SLO_SECONDS", "0"))  # p95 per model, 0 disables the latency fallback
+    MODEL_LATENCY_WINDOW_SECONDS = float(os.getenv("MODEL_LATENCY_WINDOW_SECONDS", "300"))
+    MODEL_REQUESTS_PER_MINUTE = os.getenv("MODEL_REQUESTS_PER_MINUTE", "")  # per-model quota, e.g. "gemini-1.5-pro:360"
+    MODEL_QUOTA_FALLBACK_SHARE = float(os.getenv("MODEL_QUOTA_FALLBACK_SHARE", "0.9"))  # of a per-minute quota
+    MODEL_RATE_LIMIT_COOLDOWN = float(os.getenv("MODEL_RATE_LIMIT_COOLDOWN", "60"))  # seconds on the fast model after a 429
+    
+    # Speculative Prefetch: Quick Action answers computed at background priority as soon as a profile loads
+    PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "true").lower() in ("1", "true", "yes")
+    PREFETCH_MAX_CONCURRENCY = int(os.getenv("PREFETCH_MAX_CONCURRENCY", "2"))  # Gemini slots background work may hold
+    PREFETCH_TTL_SECONDS = int(os.getenv("PREFETCH_TTL_SECONDS", "900"))
+    PREFETCH_MAX_BUDGET_SHARE = float(os.getenv("PREFETCH_MAX_BUDGET_SHARE", "0.5"))  # of a daily token budget
+    RESPONSE_CACHE_MAX_USERS = int(os.getenv("RESPONSE_CACHE_MAX_USERS", "500"))
+    
+    # Service Transports: "live", "record" (live calls saved to cassettes) or "replay" (offline)
+    TRANSPORT_MODE = os.getenv("TRANSPORT_MODE", "live").lower()
+    CASSETTE_DIR = os.getenv("CASSETTE_DIR", "./data/cassettes")
+    REPLAY_LLM_LATENCY = os.getenv("REPLAY_LLM_LATENCY", "recorded")
+    REPLAY_SCRAPE_LATENCY = os.getenv("REPLAY_SCRAPE_LATENCY", "recorded")
+    REPLAY_RATE_LIMIT_RATE = float(os.getenv("REPLAY_RATE_LIMIT_RATE", "0"))
+    REPLAY_TIMEOUT_RATE = float(os.getenv("REPLAY_TIMEOUT_RATE", "0"))
+    REPLAY_MISS_POLICY = os.getenv("REPLAY_MISS_POLICY", "synthetic")
+    REPLAY_SEED = int(os.getenv("REPLAY_SEED")) if os.getenv("REPLAY_SEED") else None
+    
+    # Token Accounting: daily budgets in input+output tokens (0 / empty = unlimited), prices in USD per million tokens
+    USER_DAILY_TOKEN_BUDGET = int(os.getenv("USER_DAILY_TOKEN_BUDGET", "0"))
+    AGENT_DAILY_TOKEN_BUDGETS = os.getenv("AGENT_DAILY_TOKEN_BUDGETS", "")  # e.g. "CareerCounselor:200000,JobMatcher:100000"
+    TOKEN_USAGE_RETENTION_DAYS = int(os.getenv("TOKEN_USAGE_RETENTION_DAYS", "30"))
+    LLM_INPUT_COST_PER_MTOK = float(os.getenv("LLM_INPUT_COST_PER_MTOK", "1.25"))
+    LLM_OUTPUT_COST_PER_MTOK = float(os.getenv("LLM_OUTPUT_COST_PER_MTOK", "5.0"))
+    
+    # Profiling: per-request cProfile/tracemalloc reports (also switchable from Debug Mode)
+    PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+    PROFILE_REPORT_DIR = os.getenv("PROFILE_REPORT_DIR", "./data/profiles")
+    PROFILE_MAX_REPORTS = int(os.getenv("PROFILE_MAX_REPORTS", "50"))
+    PROFILE_TOP_N = int(os.getenv("PROFILE_TOP_N", "25"))
+    PROFILE_TRACEMALLOC_FRAMES = int(os.getenv("PROFILE_TRACEMALLOC_FRAMES", "1"))
+    
+    # Intent Routing: "keywords" (compiled keyword scoring) or "naive_bayes" (keywords plus a local classifier for ambiguous queries)
+    INTENT_CLASSIFIER = os.getenv("INTENT_CLASSIFIER", "keywords").lower()
+    INTENT_TRAINING_PATH = os.getenv("INTENT_TRAINING_PATH", "./data/intent_training.jsonl")
+    
+    # HTTP API: api.py serves the agents with uvicorn, one event loop per worker process
+    API_HOST = os.getenv("API_HOST", "127.0.0.1")  # the API has no authentication and serves every user's profile
+    API_PORT = int(os.getenv("API_PORT", "8000"))
+    API_WORKERS = int(os.getenv("API_WORKERS", "2"))
+    API_STREAM_HEARTBEAT = float(os.getenv("API_STREAM_HEARTBEAT", "15"))  # seconds between SSE keep-alive comments
+    
+    # Job Matching: local corpus (one JSON job per line) ranked with BM25 before the LLM call
+    JOB_CORPUS_PATH = os.getenv("JOB_CORPUS_PATH", "./data/jobs/jobs.jsonl")
+    JOB_INDEX_DIR = os.getenv("JOB_INDEX_DIR", "./data/jobs/index")  # built by python -m src.services.job_corpus, preferred when present
+    JOB_MATCH_TOP_K = int(os.getenv("JOB_MATCH_TOP_K", "5"))
+    SKILL_TAXONOMY_PATH = os.getenv("SKILL_TAXONOMY_PATH", "./data/skills/taxonomy.json")  # canonical skills, aliases and categories
+
+    # Profile Similarity: hashed profile vectors per memory store, IVF-indexed once the store is large
+    PROFILE_INDEX_DIM = int(os.getenv("PROFILE_INDEX_DIM", "256"))
+    PROFILE_INDEX_IVF_THRESHOLD = int(os.getenv("PROFILE_INDEX_IVF_THRESHOLD", "20000"))  # profiles before switching from brute force
+    PROFILE_INDEX_NPROBE = int(os.getenv("PROFILE_INDEX_NPROBE", "16"))  # IVF lists scanned per query
+
+    # Embeddings: "gemini" (embedding endpoint) or "hashing" (local, offline); vectors are cached on disk by content hash
+    EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "gemini").lower()
+    EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-004")
+    EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "768"))
+    EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "100"))  # texts per embedding request
+    EMBEDDING_STORE_DIR = os.getenv("EMBEDDING_STORE_DIR", "./data/embeddings")
+    
+    # Prompt Caching: each agent mode's static instructions registered once as Gemini cached content
+    PROMPT_CACHE_ENABLED = os.getenv("PROMPT_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+    PROMPT_CACHE_TTL_SECONDS = int(os.getenv("PROMPT_CACHE_TTL_SECONDS", "3600"))
+    PROMPT_CACHE_MIN_TOKENS = int(os.getenv("PROMPT_CACHE_MIN_TOKENS", "32768"))  # smaller prefixes are sent inline; the API minimum for 1.5 models
+    
+    # Telemetry: Prometheus metrics endpoint port, 0 disables it
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "9464"))
+    METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")  # the endpoint is unauthenticated and /usage lists spend by user
     
     @classmethod
     def validate_settings(cls):
         """Validate that all required settings are present"""
+        if cls.TRANSPORT_MODE == "replay":
+            # Replay runs fully offline, no credentials needed
+            return True
+        
         required_settings = [
             ("GOOGLE_GEMINI_API_KEY", cls.GEMINI_API_KEY),
             ("APIFY_API_TOKEN", cls.APIFY_API_TOKEN)
@@ -0,0 +1,248 @@
+import os
+import random
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+import requests
+
+from ..config.settings import settings
+from .replay import (
+    Cassette,
+    FailureInjector,
+    LatencyModel,
+    RateLimitError,
+    TransportTimeout,
+    request_key,
+)
+
+
+class ApifyTransport(ABC):
+    """The subset of the Apify API used by LinkedInScraperService"""
+
+    @abstractmethod
+    def get_user(self) -> Dict:
+        """Return the account record, including plan credits"""
+        pass
+
+    @abstractmethod
+    def start_actor(self, actor_id: str, run_input: Dict) -> Dict:
+        """Start an actor run without waiting for it and return the run record"""
+        pass
+
+    @abstractmethod
+    def get_run(self, run_id: str) -> Dict:
+        """Return the current run record"""
+        pass
+
+    @abstractmethod
+    def get_dataset_items(self, dataset_id: str) -> List[Dict]:
+        """Return all items of a dataset"""
+        pass
+
+
+def _run_request(actor_id: str, run_input: Dict) -> Dict:
+    """Cassette request for a run, leaving out session cookies"""
+    return {"actor": actor_id, "urls": run_input.get("urls", [])}
+
+
+class LiveApifyTransport(ApifyTransport):
+    """Calls the Apify API through apify-client"""
+
+    def __init__(self, apify_token: str):
+        from apify_client import ApifyClient
+
+        self.apify_token = apify_token
+        self.client = ApifyClient(apify_token)
+
+    def _headers(self) -> Dict:
+        return {
+            "Authorization": f"Bearer {self.apify_token}",
+            "Content-Type": "application/json"
+        }
+
+    def get_user(self) -> Dict:
+        # Direct API call to user endpoint, falling back to the client
+        try:
+            response = requests.get("https://api.apify.com/v2/users/me", headers=self._headers(), timeout=10)
+            if response.status_code == 200:
+                return response.json().get("data", response.json())
+            if response.status_code == 429:
+                raise RateLimitError("Apify user endpoint rate limited")
+        except requests.Timeout as e:
+            raise TransportTimeout(str(e)) from e
+        except RateLimitError:
+            raise
+        except Exception:
+            pass  # Silent fail, try the client below
+
+        return self.client.user().get() or {}
+
+    def start_actor(self, actor_id: str, run_input: Dict) -> Dict:
+        return self.client.actor(actor_id).start(run_input=run_input)
+
+    def get_run(self, run_id: str) -> Dict:
+        return self.client.run(run_id).get() or {}
+
+    def get_dataset_items(self, dataset_id: str) -> List[Dict]:
+        return list(self.client.dataset(dataset_id).iterate_items())
+
+
+class RecordingApifyTransport(ApifyTransport):
+    """Forwards to another transport and records scraped items per profile URL"""
+
+    def __init__(self, inner: ApifyTransport, cassette: Cassette):
+        self.inner = inner
+        self.cassette = cassette
+        self._runs: Dict[str, Dict] = {}
+
+    def get_user(self) -> Dict:
+        return self.inner.get_user()
+
+    def start_actor(self, actor_id: str, run_input: Dict) -> Dict:
+        run = self.inner.start_actor(actor_id, run_input)
+        if run.get("defaultDatasetId"):
+            self._runs[run["defaultDatasetId"]] = {
+                "request": _run_request(actor_id, run_input),
+                "started": time.perf_counter()
+            }
+        return run
+
+    def get_run(self, run_id: str) -> Dict:
+        return self.inner.get_run(run_id)
+
+    def get_dataset_items(self, dataset_id: str) -> List[Dict]:
+        items = self.inner.get_dataset_items(dataset_id)
+        run = self._runs.pop(dataset_id, None)
+        if run:
+            self.cassette.record(
+                request_key(run["request"]),
+                run["request"],
+                {"items": items},
+                time.perf_counter() - run["started"]
+            )
+        return items
+
+
+class ReplayApifyTransport(ApifyTransport):
+    """Simulates actor runs from a cassette, with synthetic run duration and injected failures
+
+    A replayed run reports RUNNING until its sampled duration has elapsed. URLs
+    missing from the cassette get a synthetic profile unless miss_policy is "error".
+    """
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        latency: Optional[LatencyModel] = None,
+        failures: Optional[FailureInjector] = None,
+        miss_policy: str = "synthetic"
+    ):
+        self.cassette = cassette
+        self.latency = latency or LatencyModel()
+        self.failures = failures or FailureInjector()
+        self.miss_policy = miss_policy
+        self._runs: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def get_user(self) -> Dict:
+        return {"username": "replay", "plan": {"availableCredits": 100.0}}
+
+    def start_actor(self, actor_id: str, run_input: Dict) -> Dict:
+        self.failures.maybe_fail("Apify")
+
+        request = _run_request(actor_id, run_input)
+        entry = self.cassette.get(request_key(request))
+        if entry:
+            items = entry["response"]["items"]
+        elif self.miss_policy == "error":
+            raise KeyError(f"No recorded Apify run for {request['urls']}")
+        else:
+            items = [self._synthetic_profile(url) for url in request["urls"]]
+
+        run_id = str(uuid.uuid4())
+        run = {
+            "id": run_id,
+            "status": "READY",
+            "defaultDatasetId": f"dataset-{run_id}",
+            "finish_at": time.time() + self.latency.sample(entry["latency"] if entry else None),
+            "items": items
+        }
+        with self._lock:
+            self._runs[run_id] = run
+        return self._public_run(run)
+
+    def get_run(self, run_id: str) -> Dict:
+        self.failures.maybe_fail("Apify")
+        with self._lock:
+            run = self._runs[run_id]
+            if time.time() >= run["finish_at"]:
+                run["status"] = "SUCCEEDED"
+            elif run["status"] == "READY":
+                run["status"] = "RUNNING"
+            return self._public_run(run)
+
+    def get_dataset_items(self, dataset_id: str) -> List[Dict]:
+        """Items of a finished run; the run is forgotten once they are fetched, so replayed runs do not pile up"""
+        with self._lock:
+            for run_id, run in self._runs.items():
+                if run["defaultDatasetId"] == dataset_id:
+                    del self._runs[run_id]
+                    return list(run["items"])
+        return []
+
+    def _public_run(self, run: Dict) -> Dict:
+        return {key: value for key, value in run.items() if key not in ("finish_at", "items")}
+
+    def _synthetic_profile(self, profile_url: str) -> Dict:
+        """Raw actor output for a fake but realistic profile, deterministic per URL"""
+        username = profile_url.rstrip('/').split('/')[-1] or "linkedin-user"
+        rng = random.Random(request_key({"url": profile_url}))
+        skills = rng.sample([
+            "Python", "SQL", "Machine Learning", "Data Analysis", "Project Management",
+            "AWS", "Docker", "Kubernetes", "Leadership", "Communication", "TensorFlow",
+            "React", "Product Strategy", "Agile Methodologies", "Statistics", "Java"
+        ], k=rng.randint(5, 14))
+        titles = ["Software Engineer", "Data Scientist", "Product Manager", "ML Engineer", "Analyst"]
+        companies = ["Acme Corp", "Globex", "Initech", "Umbrella Labs", "Stark Industries"]
+
+        return {
+            "fullName": username.replace('-', ' ').title(),
+            "headline": f"{rng.choice(titles)} at {rng.choice(companies)}",
+            "about": "Engineer focused on building data products. " * rng.randint(1, 8),
+            "location": "San Francisco Bay Area",
+            "connectionsCount": rng.randint(50, 500),
+            "experience": [
+                {
+                    "title": rng.choice(titles),
+                    "companyName": rng.choice(companies),
+                    "description": "Delivered projects across the stack. " * rng.randint(0, 4),
+                    "dateRange": f"{2015 + index} - {2017 + index}",
+                    "location": "Remote"
+                }
+                for index in range(rng.randint(1, 5))
+            ],
+            "education": [{"schoolName": "State University", "degreeName": "BSc", "fieldOfStudy": "Computer Science"}],
+            "skills": [{"name": skill} for skill in skills]
+        }
+
+
+def create_apify_transport(apify_token: Optional[str], mode: Optional[str] = None) -> ApifyTransport:
+    """Build the transport selected by TRANSPORT_MODE (live, record or replay)"""
+    mode = (mode or settings.TRANSPORT_MODE).lower()
+    cassette_path = os.path.join(settings.CASSETTE_DIR, "apify.jsonl")
+
+    if mode == "replay":
+        return ReplayApifyTransport(
+            Cassette(cassette_path),
+            latency=LatencyModel(settings.REPLAY_SCRAPE_LATENCY, seed=settings.REPLAY_SEED),
+            failures=FailureInjector(settings.REPLAY_RATE_LIMIT_RATE, settings.REPLAY_TIMEOUT_RATE, seed=settings.REPLAY_SEED),
+            miss_policy=settings.REPLAY_MISS_POLICY
+        )
+
+    live = LiveApifyTransport(apify_token)
+    if mode == "record":
+        return RecordingApifyTransport(live, Cassette(cassette_path))
+    return live
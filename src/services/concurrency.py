@@ -0,0 +1,169 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+from ..config.settings import settings
+from ..utils import telemetry
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+
+class PrefetchCancelled(Exception):
+    """Background work was cancelled before it got a slot"""
+
+
+class PriorityTicket:
+    """Priority of the work running in the current context
+
+    Background tickets can be promoted to interactive while they wait, when a
+    user asks for the result they are computing, or cancelled when it is no
+    longer wanted.
+    """
+
+    def __init__(self, priority: str = BACKGROUND):
+        self.priority = priority
+        self._cancelled = threading.Event()
+
+    @property
+    def background(self) -> bool:
+        return self.priority == BACKGROUND
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def promote(self):
+        self.priority = INTERACTIVE
+
+    def cancel(self):
+        self._cancelled.set()
+
+
+_ticket: ContextVar[Optional[PriorityTicket]] = ContextVar("priority_ticket", default=None)
+
+
+@contextmanager
+def background_priority(ticket: PriorityTicket) -> Iterator[PriorityTicket]:
+    """Run the block's external calls under a ticket; asyncio.to_thread carries it into worker threads"""
+    token = _ticket.set(ticket)
+    try:
+        yield ticket
+    finally:
+        _ticket.reset(token)
+
+
+def current_ticket() -> Optional[PriorityTicket]:
+    """Ticket of the enclosing background_priority block, None for interactive work"""
+    return _ticket.get()
+
+
+def is_background() -> bool:
+    ticket = _ticket.get()
+    return ticket is not None and ticket.background
+
+
+class ConcurrencyLimiter:
+    """Process-wide cap on simultaneous calls to an external service
+
+    Streamlit runs every session's asyncio.run in its own thread with its own
+    event loop, so an asyncio.Semaphore cannot be shared between sessions. The
+    limiter is a thread condition checked inside the worker thread that makes
+    the blocking call, which keeps the event loops free while a call waits.
+
+    Background calls hold at most max_background slots and never start while an
+    interactive call is waiting, so speculative work only uses idle capacity.
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_background: int = 0):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_background = max_background
+        self._condition = threading.Condition()
+        self.in_flight = 0
+        self.background_in_flight = 0
+        self.waiting = 0
+        self.background_waiting = 0
+
+    def _can_start(self, background: bool) -> bool:
+        if self.max_concurrent > 0 and self.in_flight >= self.max_concurrent:
+            return False
+        if background:
+            return self.waiting == 0 and self.background_in_flight < self.max_background
+        return True
+
+    @contextmanager
+    def slot(self, ticket: Optional[PriorityTicket] = None) -> Iterator[None]:
+        """Hold one of the slots for the duration of the block
+
+        The ticket defaults to the one of the enclosing background_priority block.
+        """
+        ticket = ticket or current_ticket()
+        start_time = time.perf_counter()
+        with self._condition:
+            background = ticket is not None and ticket.background
+            self._count_waiting(background, 1)
+            try:
+                while not self._can_start(background):
+                    if ticket is not None and ticket.cancelled:
+                        raise PrefetchCancelled("Background call cancelled while waiting for a slot")
+                    # Background waiters poll so that promotion and cancellation take effect
+                    self._condition.wait(timeout=0.1 if background else None)
+                    if background and not ticket.background:
+                        self._count_waiting(True, -1)
+                        self._count_waiting(False, 1)
+                        background = False
+            finally:
+                self._count_waiting(background, -1)
+            self.in_flight += 1
+            if background:
+                self.background_in_flight += 1
+        telemetry.LIMITER_WAIT_SECONDS.observe(
+            time.perf_counter() - start_time, limiter=self.name, priority=BACKGROUND if background else INTERACTIVE
+        )
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.in_flight -= 1
+                if background:
+                    self.background_in_flight -= 1
+                self._condition.notify_all()
+
+    def _count_waiting(self, background: bool, delta: int):
+        if background:
+            self.background_waiting += delta
+        else:
+            self.waiting += delta
+            if delta < 0:
+                # Background waiters may be blocked on this interactive waiter
+                self._condition.notify_all()
+
+    def stats(self) -> Dict[str, int]:
+        with self._condition:
+            return {
+                "max_concurrent": self.max_concurrent,
+                "max_background": self.max_background,
+                "in_flight": self.in_flight,
+                "background_in_flight": self.background_in_flight,
+                "waiting": self.waiting,
+                "background_waiting": self.background_waiting
+            }
+
+
+_gemini_limiter: Optional[ConcurrencyLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_gemini_limiter() -> ConcurrencyLimiter:
+    """The limiter shared by every GeminiClient in the process (GEMINI_MAX_CONCURRENCY, 0 = unlimited)"""
+    global _gemini_limiter
+    with _limiter_lock:
+        if _gemini_limiter is None:
+            _gemini_limiter = ConcurrencyLimiter(
+                "gemini", settings.GEMINI_MAX_CONCURRENCY, max_background=settings.PREFETCH_MAX_CONCURRENCY
+            )
+            telemetry.QUEUE_DEPTH.set_function(lambda: _gemini_limiter.waiting, queue="gemini_limiter")
+        return _gemini_limiter
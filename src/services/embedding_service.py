@@ -0,0 +1,351 @@
+"""
+Text embeddings with a persistent, content-addressed cache
+
+Every text is keyed by a hash of its content (and task type), and its vector
+is stored once in a memory-mapped float16 file. Asking for a text that was
+embedded before, by any process sharing the store, costs a lookup; new texts
+are sent to the backend in batches of EMBEDDING_BATCH_SIZE, and a text already
+being embedded by another thread is waited for rather than sent again.
+
+Backends are pluggable: Gemini's embedding endpoint through GeminiClient, or a
+local hashing vectorizer for offline runs and tests. Each backend writes to its
+own store, so vectors of different models never mix.
+
+Backfill texts from the command line, one JSON object per line:
+
+    python -m src.services.embedding_service --input jobs.jsonl --field description
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from ..config.settings import settings
+from ..utils import telemetry
+from ..utils.profile_scoring import STOPWORDS, WORD_PATTERN
+from .gemini_client import GeminiClient
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use only
+    fcntl = None
+
+# Bytes of blake2b digest per key in keys.bin
+KEY_SIZE = 16
+
+# Texts read from the store or a backfill file at a time
+BACKFILL_CHUNK = 10000
+
+
+def hashed_vector(features: Dict[str, float], dim: int) -> np.ndarray:
+    """Unit-length signed feature hashing: each feature adds its weight to one dimension, with a hashed sign"""
+    vector = np.zeros(dim, dtype=np.float32)
+    for feature, weight in features.items():
+        digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+        vector[digest % dim] += weight if digest >> 63 else -weight
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+def text_key(text: str, task_type: str) -> bytes:
+    return hashlib.blake2b(f"{task_type}\0{text}".encode("utf-8"), digest_size=KEY_SIZE).digest()
+
+
+class EmbeddingBackend(ABC):
+    """Turns a batch of texts into unit-length vectors of a fixed dimension
+
+    name identifies the model and dimension, and names the backend's store.
+    """
+
+    name = "backend"
+    dim = 0
+
+    @abstractmethod
+    def embed(self, texts: List[str], task_type: str) -> np.ndarray:
+        pass
+
+
+class HashingEmbeddingBackend(EmbeddingBackend):
+    """Local hashing vectorizer over words and word pairs, counts damped with 1 + log(count)
+
+    Deterministic and free, so it suits offline runs and tests. Similarity is
+    lexical: texts sharing words score high, synonyms do not.
+    """
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def embed(self, texts: List[str], task_type: str) -> np.ndarray:
+        return np.stack([self._vector(text) for text in texts]) if texts else np.zeros((0, self.dim), dtype=np.float32)
+
+    def _vector(self, text: str) -> np.ndarray:
+        words = [word for word in WORD_PATTERN.findall((text or "").lower()) if word not in STOPWORDS]
+        features: Dict[str, float] = Counter()
+        for term, count in Counter(words).items():
+            features[term] += 1 + math.log(count)
+        for term, count in Counter(f"{first} {second}" for first, second in zip(words, words[1:])).items():
+            features[term] += 0.5 * (1 + math.log(count))
+        return hashed_vector(features, self.dim)
+
+
+class GeminiEmbeddingBackend(EmbeddingBackend):
+    """Gemini's embedding endpoint, one request per batch"""
+
+    def __init__(self, client: Optional[GeminiClient] = None, dim: Optional[int] = None):
+        self.client = client or GeminiClient()
+        self.dim = dim or settings.EMBEDDING_DIM
+        self.name = f"gemini-{self.client.embedding_model_name}-{self.dim}"
+
+    def embed(self, texts: List[str], task_type: str) -> np.ndarray:
+        vectors = np.array(self.client.embed_texts(texts, task_type, self.dim), dtype=np.float32).reshape(len(texts), self.dim)
+        # The endpoint only returns unit vectors at full size; truncated ones need renormalizing
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+
+class EmbeddingStore:
+    """Vectors of one backend, keyed by content hash
+
+    Files in the store directory:
+    - vectors.f16: float16 rows, grown in blocks and memory-mapped
+    - keys.bin: the 16-byte key of each row, append-only; a row exists once its key is written
+
+    Writers append under a file lock, so processes can share a store; each
+    picks up the others' rows when keys.bin grows.
+    """
+
+    def __init__(self, directory: str, dim: int):
+        self.directory = directory
+        self.dim = dim
+        os.makedirs(directory, exist_ok=True)
+        self.vectors_file = os.path.join(directory, "vectors.f16")
+        self.keys_file = os.path.join(directory, "keys.bin")
+        self.lock_file = os.path.join(directory, ".lock")
+        self._lock = threading.RLock()
+        self._rows: Dict[bytes, int] = {}
+        self._keys_size = 0
+        self._vectors: Optional[np.ndarray] = None
+        self._refresh()
+
+    @contextmanager
+    def _file_lock(self):
+        with open(self.lock_file, 'a') as handle:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            yield
+
+    def _refresh(self):
+        """Load keys other processes appended"""
+        with self._lock:
+            size = os.path.getsize(self.keys_file) if os.path.exists(self.keys_file) else 0
+            size -= size % KEY_SIZE
+            if size > self._keys_size:
+                with open(self.keys_file, 'rb') as f:
+                    f.seek(self._keys_size)
+                    data = f.read(size - self._keys_size)
+                for start in range(0, len(data), KEY_SIZE):
+                    self._rows.setdefault(data[start:start + KEY_SIZE], len(self._rows))
+                self._keys_size = size
+                self._vectors = None
+            if self._vectors is None and self._rows:
+                capacity = os.path.getsize(self.vectors_file) // (2 * self.dim)
+                self._vectors = np.memmap(self.vectors_file, dtype=np.float16, mode="r", shape=(capacity, self.dim))
+
+    def __contains__(self, key: bytes) -> bool:
+        return key in self._rows
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def missing(self, keys: Iterable[bytes]) -> List[bytes]:
+        """Keys without a stored vector"""
+        with self._lock:
+            self._refresh()
+            return [key for key in keys if key not in self._rows]
+
+    def get(self, keys: Sequence[bytes]) -> np.ndarray:
+        """float32 vectors of stored keys, in order"""
+        with self._lock:
+            rows = np.fromiter((self._rows[key] for key in keys), dtype=np.int64, count=len(keys))
+            return np.asarray(self._vectors[rows], dtype=np.float32) if len(rows) else np.zeros((0, self.dim), dtype=np.float32)
+
+    def add(self, keys: Sequence[bytes], vectors: np.ndarray):
+        """Append vectors for keys, skipping keys another process stored meanwhile"""
+        with self._lock, self._file_lock():
+            self._refresh()
+            new = [position for position, key in enumerate(keys) if key not in self._rows]
+            if not new:
+                return
+            start = len(self._rows)
+            end = start + len(new)
+            capacity = os.path.getsize(self.vectors_file) // (2 * self.dim) if os.path.exists(self.vectors_file) else 0
+            if end > capacity:
+                with open(self.vectors_file, 'ab') as f:
+                    f.truncate(max(1024, capacity * 2, end) * 2 * self.dim)
+            stored = np.memmap(self.vectors_file, dtype=np.float16, mode="r+", shape=(end, self.dim))
+            stored[start:end] = vectors[new]
+            stored.flush()
+            del stored
+            # Keys are written last: a row exists for readers once its key does
+            with open(self.keys_file, 'ab') as f:
+                f.write(b"".join(keys[position] for position in new))
+            self._vectors = None
+            self._refresh()
+
+
+class EmbeddingService:
+    """Embeds texts through a backend, never the same text twice"""
+
+    def __init__(self, backend: EmbeddingBackend, store_dir: Optional[str] = None, batch_size: Optional[int] = None):
+        self.backend = backend
+        self.dim = backend.dim
+        self.batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE
+        self.store = EmbeddingStore(os.path.join(store_dir or settings.EMBEDDING_STORE_DIR, backend.name), backend.dim)
+        self._lock = threading.Lock()
+        # key -> future of the thread currently embedding it
+        self._pending: Dict[bytes, Future] = {}
+        self.embedded = 0
+
+    def embed(self, texts: Sequence[str], task_type: str = "retrieval_document") -> np.ndarray:
+        """Unit-length float32 vectors for texts, one row per text; empty texts get zero vectors"""
+        keys = [text_key(text, task_type) for text in texts]
+        unique = {key: text for key, text in zip(keys, texts) if text}
+        missing = self.store.missing(unique)
+        telemetry.CACHE_REQUESTS.inc(len(unique) - len(missing), cache="embedding", result="hit")
+
+        claimed, waiting = [], []
+        with self._lock:
+            for key in missing:
+                if key in self._pending:
+                    waiting.append(self._pending[key])
+                elif key not in self.store:
+                    self._pending[key] = Future()
+                    claimed.append(key)
+        telemetry.CACHE_REQUESTS.inc(len(claimed), cache="embedding", result="miss")
+        telemetry.CACHE_REQUESTS.inc(len(waiting), cache="embedding", result="joined")
+
+        try:
+            for start in range(0, len(claimed), self.batch_size):
+                batch = claimed[start:start + self.batch_size]
+                vectors = self.backend.embed([unique[key] for key in batch], task_type)
+                self.store.add(batch, vectors)
+                self._settle(batch)
+                self.embedded += len(batch)
+        except Exception as e:
+            self._settle(claimed, e)
+            raise
+        for future in waiting:
+            future.result()
+
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        present = [position for position, key in enumerate(keys) if key in unique]
+        vectors[present] = self.store.get([keys[position] for position in present])
+        return vectors
+
+    def _settle(self, keys: List[bytes], error: Optional[Exception] = None):
+        """Release claimed keys, waking threads that waited for them"""
+        with self._lock:
+            for key in keys:
+                future = self._pending.pop(key, None)
+                if future is None:
+                    continue
+                if error is None:
+                    future.set_result(None)
+                else:
+                    future.set_exception(error)
+
+    def embed_one(self, text: str, task_type: str = "retrieval_query") -> np.ndarray:
+        return self.embed([text], task_type)[0]
+
+    async def aembed(self, texts: Sequence[str], task_type: str = "retrieval_document") -> np.ndarray:
+        """embed() off the event loop"""
+        return await asyncio.to_thread(self.embed, texts, task_type)
+
+    def backfill(self, texts: Iterable[str], task_type: str = "retrieval_document") -> int:
+        """Embed a stream of texts in chunks without keeping their vectors; returns how many were new"""
+        before = self.embedded
+        chunk: List[str] = []
+        for text in texts:
+            chunk.append(text)
+            if len(chunk) >= BACKFILL_CHUNK:
+                self.embed(chunk, task_type)
+                chunk = []
+        if chunk:
+            self.embed(chunk, task_type)
+        return self.embedded - before
+
+
+def create_embedding_backend(name: Optional[str] = None) -> EmbeddingBackend:
+    """Build the backend selected by EMBEDDING_BACKEND (gemini or hashing)"""
+    name = (name or settings.EMBEDDING_BACKEND).lower()
+    if name == "hashing":
+        return HashingEmbeddingBackend(settings.EMBEDDING_DIM)
+    return GeminiEmbeddingBackend()
+
+
+_service_instance: Optional[EmbeddingService] = None
+_service_lock = threading.Lock()
+
+
+def get_embedding_service() -> EmbeddingService:
+    """Return the process-wide embedding service"""
+    global _service_instance
+    with _service_lock:
+        if _service_instance is None:
+            _service_instance = EmbeddingService(create_embedding_backend())
+        return _service_instance
+
+
+def _read_field(paths: List[str], field: str) -> Iterable[str]:
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    value = json.loads(line).get(field)
+                except (json.JSONDecodeError, AttributeError) as e:
+                    print(f"Skipping line {line_number} of {path}: {e}")
+                    continue
+                if isinstance(value, list):
+                    value = "\n".join(str(item) for item in value)
+                if value:
+                    yield str(value)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Embed one field of JSONL records into the embedding store")
+    parser.add_argument("--input", nargs="+", required=True, help="JSONL files, one record per line")
+    parser.add_argument("--field", required=True, help="record field to embed; lists are joined by lines")
+    parser.add_argument("--task-type", default="retrieval_document")
+    parser.add_argument("--backend", default=None, help="gemini or hashing (default: EMBEDDING_BACKEND)")
+    args = parser.parse_args(argv)
+
+    service = EmbeddingService(create_embedding_backend(args.backend))
+    start_time = time.perf_counter()
+    try:
+        embedded = service.backfill(_read_field(args.input, args.field), args.task_type)
+    except OSError as e:
+        print(f"Error reading input: {e}")
+        return 1
+    print(f"Embedded {embedded} new texts in {time.perf_counter() - start_time:.1f}s; "
+          f"{len(service.store)} vectors in {service.store.directory}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,118 +1,337 @@
-import google.generativeai as genai
-from typing import List, Dict, Optional
+from typing import Callable, Iterator, List, Dict, Optional, Type
 import json
-import re
 import asyncio
+import contextvars
+import time
+from contextlib import contextmanager
+from pydantic import BaseModel
 from ..config.settings import settings
+from .gemini_transport import GeminiTransport, create_gemini_transport, estimate_tokens
+from .model_router import ModelRouter, get_model_router
+from .prompt_cache import PromptCache, get_prompt_cache
+from .replay import CachedContentNotFound, RateLimitError, TransportTimeout
+from .token_usage import TokenBudgetExceeded, TokenUsageTracker, get_token_usage_tracker
+from .concurrency import ConcurrencyLimiter, PrefetchCancelled, get_gemini_limiter, is_background
+from ..utils import telemetry
+from ..utils.prompt_templates import STRUCTURED_ANALYSIS_PROMPTS, Prompt, compact_profile
+from ..utils.structured_output import (
+    STRUCTURED_SCHEMAS,
+    build_repair_prompt,
+    parse_json_object,
+    parse_structured,
+    response_schema,
+)
+
+# Receives the text of interactive LLM calls as it is generated; set with stream_to()
+_stream_sink: contextvars.ContextVar[Optional[Callable[[str], None]]] = contextvars.ContextVar("gemini_stream_sink", default=None)
+
+
+@contextmanager
+def stream_to(sink: Callable[[str], None]) -> Iterator[None]:
+    """Stream every interactive generate_response call in the block to sink, chunk by chunk, on the event loop"""
+    token = _stream_sink.set(sink)
+    try:
+        yield
+    finally:
+        _stream_sink.reset(token)
+
 
 class GeminiClient:
-    def __init__(self, api_key: str = None):
+    def __init__(
+        self,
+        api_key: str = None,
+        transport: Optional[GeminiTransport] = None,
+        usage_tracker: Optional[TokenUsageTracker] = None,
+        limiter: Optional[ConcurrencyLimiter] = None,
+        prompt_cache: Optional[PromptCache] = None,
+        model_router: Optional[ModelRouter] = None
+    ):
         api_key = api_key or settings.GEMINI_API_KEY
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-1.5-pro')
+        self.transport = transport or create_gemini_transport(api_key)
+        self.usage_tracker = usage_tracker or get_token_usage_tracker()
+        self.limiter = limiter or get_gemini_limiter()
+        self.prompt_cache = prompt_cache or (get_prompt_cache() if settings.PROMPT_CACHE_ENABLED else None)
+        self.model_router = model_router or get_model_router()
+        self.model_name = self.model_router.default_model
+        self.embedding_model_name = settings.EMBEDDING_MODEL
         
     async def generate_response(
         self, 
         prompt: str, 
         context: Optional[str] = None,
-        temperature: float = 0.7
+        temperature: float = 0.7,
+        json_schema: Optional[Dict] = None,
+        raise_errors: bool = False
     ) -> str:
         """
         Generate response using Gemini model
+
+        Background (prefetch) calls raise instead of returning an apology and are
+        not retried, so failures never get cached and rate limits are left to
+        interactive traffic. With raise_errors, failures raise as well but are
+        still retried, for callers that must tell errors from answers. With json_schema the model replies in JSON mode,
+        constrained to that response schema. Inside stream_to() the response
+        is streamed to the sink; a call that already streamed text is not
+        retried, so the sink never sees it twice. The static part of a Prompt
+        is sent by reference to cached content when the prompt cache holds it,
+        and otherwise inline ahead of everything that varies per request.
+        The model is picked per attempt by the model router, from the Prompt's
+        route or the calling agent, so a retry after a rate limit or a slow
+        model goes to the fast model.
+        """
+        if isinstance(prompt, Prompt):
+            full_prompt = prompt
+            if context:
+                full_prompt = Prompt(prompt.static, f"{context}\n\n{prompt.dynamic}")
+                full_prompt.sections = {**prompt.sections, "context": prompt.sections.get("context", 0) + estimate_tokens(context)}
+                full_prompt.route = prompt.route
+        else:
+            full_prompt = f"{context}\n\n{prompt}" if context else prompt
+        
+        generation_config = {
+            "temperature": temperature,
+            "max_output_tokens": settings.MAX_OUTPUT_TOKENS,
+            "top_p": 0.8,
+            "top_k": 40
+        }
+        if json_schema:
+            generation_config["response_mime_type"] = "application/json"
+            generation_config["response_schema"] = json_schema
+        
+        user_id = telemetry.get_tag("user_id")
+        agent = telemetry.get_tag("agent")
+        route = getattr(full_prompt, "route", None)
+        background = is_background()
+        raise_errors = raise_errors or background
+        sink = None if background else _stream_sink.get()
+        stream_state = {"streamed": False}
+        try:
+            self.usage_tracker.check_budget(user_id, agent, estimate_tokens(full_prompt))
+        except TokenBudgetExceeded as e:
+            if raise_errors:
+                raise
+            print(f"Skipping LLM call: {e}")
+            telemetry.LLM_CALLS.inc(status="budget_exceeded")
+            return f"I apologize, but I can't process this request right now: {str(e)}. Please try again tomorrow."
+        
+        with telemetry.span("llm", model=self.model_router.primary(route, agent), prompt_chars=len(full_prompt), background=background) as llm_span:
+            if getattr(full_prompt, "sections", None):
+                llm_span["attributes"]["prompt_sections"] = full_prompt.sections
+            for attempt in range(settings.GEMINI_MAX_RETRIES + 1):
+                cached_content = None
+                model_name = self.model_router.select(route, agent)
+                llm_span["attributes"]["model"] = model_name
+                try:
+                    start_time = time.perf_counter()
+                    cached_content = await self._prefix_handle(full_prompt, model_name)
+                    request_prompt = full_prompt.dynamic if cached_content else full_prompt
+                    self.model_router.record_request(model_name)
+                    # Transports block, so run them in a thread to keep the event loop free
+                    if sink:
+                        response = await self._generate_streaming(
+                            model_name, request_prompt, generation_config, sink, stream_state, cached_content
+                        )
+                    else:
+                        response = await asyncio.to_thread(
+                            self._generate_limited, model_name, request_prompt, generation_config, cached_content
+                        )
+                    latency = time.perf_counter() - start_time
+                    self.model_router.record_latency(model_name, latency)
+                    self._record_usage(response, llm_span, user_id, agent, latency)
+                    telemetry.LLM_CALLS.inc(status="ok")
+                    return response["text"]
+                except CachedContentNotFound as e:
+                    # Expired or deleted before its TTL; register the prefix again on the next attempt
+                    self.prompt_cache.invalidate(cached_content)
+                    if attempt < settings.GEMINI_MAX_RETRIES and not stream_state["streamed"]:
+                        telemetry.LLM_RETRIES.inc(reason="cache_expired")
+                        continue
+                    print(f"Error generating response: {e}")
+                    telemetry.LLM_CALLS.inc(status="error")
+                    llm_span["status"] = "error"
+                    if raise_errors:
+                        raise
+                    return f"I apologize, but I encountered an error processing your request: {str(e)}"
+                except (RateLimitError, TransportTimeout) as e:
+                    if isinstance(e, RateLimitError):
+                        self.model_router.record_rate_limit(model_name)
+                    else:
+                        self.model_router.record_latency(model_name, time.perf_counter() - start_time)
+                    if attempt < settings.GEMINI_MAX_RETRIES and not background and not stream_state["streamed"]:
+                        telemetry.LLM_RETRIES.inc(reason="rate_limit" if isinstance(e, RateLimitError) else "timeout")
+                        await asyncio.sleep(settings.GEMINI_RETRY_BACKOFF * (2 ** attempt))
+                        continue
+                    print(f"Error generating response: {e}")
+                    telemetry.LLM_CALLS.inc(status="error")
+                    llm_span["status"] = "error"
+                    if raise_errors:
+                        raise
+                    return f"I apologize, but I encountered an error processing your request: {str(e)}"
+                except PrefetchCancelled:
+                    telemetry.LLM_CALLS.inc(status="cancelled")
+                    raise
+                except Exception as e:
+                    print(f"Error generating response: {e}")
+                    telemetry.LLM_CALLS.inc(status="error")
+                    llm_span["status"] = "error"
+                    if raise_errors:
+                        raise
+                    return f"I apologize, but I encountered an error processing your request: {str(e)}"
+    
+    def _generate_limited(self, model_name: str, prompt: str, generation_config: Dict, cached_content: Optional[str] = None) -> Dict:
+        """Call the transport once a process-wide Gemini slot is free"""
+        with self.limiter.slot():
+            return self.transport.generate(model_name, prompt, generation_config, cached_content)
+    
+    async def _prefix_handle(self, prompt: str, model_name: str) -> Optional[str]:
+        """Cached content name for a Prompt's static part, or None to send the whole prompt inline"""
+        if not self.prompt_cache or not isinstance(prompt, Prompt):
+            return None
+        if estimate_tokens(prompt.static) < self.prompt_cache.min_tokens:
+            return None
+        # Registering a prefix is a blocking API call
+        return await asyncio.to_thread(self.prompt_cache.handle, self.transport, model_name, prompt.static)
+    
+    def embed_texts(
+        self,
+        texts: List[str],
+        task_type: str = "retrieval_document",
+        output_dimensionality: Optional[int] = None
+    ) -> List[List[float]]:
         """
-        full_prompt = f"{context}\n\n{prompt}" if context else prompt
+        Embed a batch of texts in one request, in order
+
+        Blocking: EmbeddingService calls it from worker threads and bulk
+        backfills. Rate limits and timeouts are retried with backoff, other
+        errors raise, so a failed batch is never stored as vectors.
+        """
+        embedding_config = {"task_type": task_type, "output_dimensionality": output_dimensionality}
+        with telemetry.span("embedding", model=self.embedding_model_name, texts=len(texts)) as embedding_span:
+            for attempt in range(settings.GEMINI_MAX_RETRIES + 1):
+                try:
+                    with self.limiter.slot():
+                        response = self.transport.embed(self.embedding_model_name, texts, embedding_config)
+                    break
+                except (RateLimitError, TransportTimeout) as e:
+                    if attempt == settings.GEMINI_MAX_RETRIES:
+                        embedding_span["status"] = "error"
+                        raise
+                    telemetry.LLM_RETRIES.inc(reason="rate_limit" if isinstance(e, RateLimitError) else "timeout")
+                    time.sleep(settings.GEMINI_RETRY_BACKOFF * (2 ** attempt))
+
+        tokens = (response.get("usage") or {}).get("prompt_tokens")
+        if tokens:
+            telemetry.LLM_TOKENS.inc(tokens, direction="input", agent="embedding")
+        return response["embeddings"]
+    
+    async def _generate_streaming(
+        self,
+        model_name: str,
+        prompt: str,
+        generation_config: Dict,
+        sink: Callable[[str], None],
+        state: Dict,
+        cached_content: Optional[str] = None
+    ) -> Dict:
+        """Stream a response in a worker thread, handing each chunk to sink on the event loop"""
+        loop = asyncio.get_running_loop()
+        
+        def run() -> Dict:
+            text, usage = [], {}
+            with self.limiter.slot():
+                for chunk in self.transport.generate_stream(model_name, prompt, generation_config, cached_content):
+                    if chunk.get("text"):
+                        text.append(chunk["text"])
+                        state["streamed"] = True
+                        loop.call_soon_threadsafe(sink, chunk["text"])
+                    usage = chunk.get("usage", usage)
+            return {"text": "".join(text), "usage": usage}
+        
+        return await asyncio.to_thread(run)
+    
+    def _record_usage(self, response: Dict, llm_span: Dict, user_id: Optional[str], agent: Optional[str], latency: float):
+        """Count the tokens reported by the transport against the calling user and agent"""
+        usage = response.get("usage") or {}
+        for direction, key in (("input", "prompt_tokens"), ("output", "output_tokens"), ("cached", "cached_tokens")):
+            tokens = usage.get(key)
+            if tokens is None:
+                continue
+            telemetry.LLM_TOKENS.inc(tokens, direction=direction, agent=agent or "unknown")
+            telemetry.LLM_TOKENS_PER_CALL.observe(tokens, direction=direction)
+            llm_span["attributes"][key] = tokens
         
-        generation_config = genai.types.GenerationConfig(
-            temperature=temperature,
-            max_output_tokens=settings.MAX_OUTPUT_TOKENS,
-            top_p=0.8,
-            top_k=40
+        self.usage_tracker.record(
+            user_id, agent, usage.get("prompt_tokens") or 0, usage.get("output_tokens") or 0, latency
         )
         
+    async def generate_structured(
+        self,
+        prompt: str,
+        schema: Type[BaseModel],
+        temperature: float = 0.3
+    ) -> Optional[BaseModel]:
+        """
+        Generate a reply in JSON mode and validate it against a pydantic schema
+
+        A reply that does not validate gets one repair call carrying only the
+        reply and its validation errors. Returns None if that fails as well.
+        """
+        json_schema = response_schema(schema)
         try:
-            response = self.model.generate_content(
-                full_prompt,
-                generation_config=generation_config
-            )
-            return response.text
+            response = await self.generate_response(prompt, temperature=temperature, json_schema=json_schema, raise_errors=True)
+            result, error = parse_structured(response, schema)
+            if result is None:
+                telemetry.LLM_RETRIES.inc(reason="invalid_structure")
+                repaired = await self.generate_response(
+                    build_repair_prompt(response, error, schema), temperature=0.0, json_schema=json_schema, raise_errors=True
+                )
+                result, error = parse_structured(repaired, schema)
+        except PrefetchCancelled:
+            raise
         except Exception as e:
-            print(f"Error generating response: {e}")
-            return f"I apologize, but I encountered an error processing your request: {str(e)}"
+            if is_background():
+                raise
+            print(f"Error generating structured response: {e}")
+            return None
+        if result is None:
+            print(f"Structured response did not match {schema.__name__}: {error}")
+        return result
         
     async def analyze_profile_structured(
         self, 
         profile_data: Dict,
         analysis_type: str
-    ) -> Dict:
+    ) -> Optional[BaseModel]:
         """
-        Structured analysis with JSON output
+        Structured analysis, typed by STRUCTURED_SCHEMAS[analysis_type]
         """
+        if analysis_type not in STRUCTURED_SCHEMAS:
+            raise ValueError(f"Unknown structured analysis type: {analysis_type}")
         prompt = self.build_analysis_prompt(profile_data, analysis_type)
-        
-        response = await self.generate_response(
-            prompt + "\n\nRespond in valid JSON format.",
-            temperature=0.3
-        )
-        
-        try:
-            return json.loads(response)
-        except json.JSONDecodeError:
-            # Fallback: extract JSON from response
-            return self.extract_json_from_text(response)
+        return await self.generate_structured(prompt, STRUCTURED_SCHEMAS[analysis_type])
     
     def build_analysis_prompt(self, profile_data: Dict, analysis_type: str) -> str:
         """Build analysis prompt based on type"""
         if analysis_type == "profile_completeness":
-            return f"""
-            Analyze this LinkedIn profile for completeness and professional quality:
-            
-            Profile Data: {json.dumps(profile_data, indent=2)}
-            
-            Provide analysis in JSON format with:
-            {{
-                "completeness_score": <0-100>,
-                "missing_sections": [list of missing sections],
-                "strengths": [list of strengths],
-                "improvement_areas": [list of areas to improve],
-                "recommendations": [specific actionable recommendations]
-            }}
-            """
+            return STRUCTURED_ANALYSIS_PROMPTS["profile_completeness"].render(
+                profile=compact_profile(profile_data, about_chars=2000, max_experience=None, max_education=None, description_chars=300)
+            )
         elif analysis_type == "job_match":
-            return f"""
-            Analyze job match compatibility:
-            
-            Profile: {profile_data.get('profile', {})}
-            Job: {profile_data.get('job', {})}
-            
-            Provide analysis in JSON format with:
-            {{
-                "score": <0-100>,
-                "breakdown": {{
-                    "skills_match": <0-100>,
-                    "experience_match": <0-100>,
-                    "education_match": <0-100>
-                }},
-                "missing_skills": [list of missing skills],
-                "suggestions": [improvement suggestions]
-            }}
-            """
+            return STRUCTURED_ANALYSIS_PROMPTS["job_match"].render(
+                profile=compact_profile(profile_data.get('profile', {}), max_experience=None),
+                job=json.dumps(profile_data.get('job', {}), separators=(",", ":"), ensure_ascii=False, default=str)
+            )
         else:
-            return f"Analyze this profile data: {json.dumps(profile_data, indent=2)}"
+            return f"Analyze this profile data: {json.dumps(profile_data, separators=(',', ':'), ensure_ascii=False, default=str)}"
     
     def extract_json_from_text(self, text: str) -> Dict:
         """Extract JSON from text response as fallback"""
-        # Try to find JSON-like content
-        json_pattern = r'\{.*\}'
-        matches = re.findall(json_pattern, text, re.DOTALL)
-        
-        for match in matches:
-            try:
-                return json.loads(match)
-            except json.JSONDecodeError:
-                continue
+        data = parse_json_object(text)
+        if isinstance(data, dict):
+            return data
         
         # Fallback to basic structured response
         return {
             "error": "Could not parse structured response",
             "raw_response": text
-        } 
\ No newline at end of file
+        }
@@ -0,0 +1,416 @@
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import timedelta
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from ..config.settings import settings
+from ..utils.prompt_templates import estimate_tokens
+from .replay import (
+    CachedContentNotFound,
+    Cassette,
+    FailureInjector,
+    LatencyModel,
+    RateLimitError,
+    TransportTimeout,
+    request_key,
+)
+
+
+class GeminiTransport(ABC):
+    """Sends generation requests to Gemini
+
+    Implementations are synchronous; GeminiClient runs them off the event loop.
+    With cached_content (a name from cache_content()), the prompt continues that
+    cached content, which is not sent again.
+    """
+
+    @abstractmethod
+    def generate(self, model_name: str, prompt: str, generation_config: Dict, cached_content: Optional[str] = None) -> Dict:
+        """Return {"text": ..., "usage": {"prompt_tokens": ..., "output_tokens": ..., "cached_tokens": ...}} for a prompt"""
+        pass
+
+    def generate_stream(self, model_name: str, prompt: str, generation_config: Dict, cached_content: Optional[str] = None) -> Iterator[Dict]:
+        """Yield {"text": chunk} as the response is generated, then {"usage": ...}
+
+        Transports that cannot stream send the whole response as one chunk.
+        """
+        response = self.generate(model_name, prompt, generation_config, cached_content)
+        yield {"text": response["text"]}
+        yield {"usage": response.get("usage") or {}}
+
+    @abstractmethod
+    def cache_content(self, model_name: str, content: str, ttl_seconds: int) -> str:
+        """Register content as cached content for a model and return its name; it expires after ttl_seconds"""
+        pass
+
+    def release_content(self, name: str):
+        """Forget what is kept locally for a cached content name that is no longer referenced"""
+        pass
+
+    @abstractmethod
+    def embed(self, model_name: str, texts: List[str], embedding_config: Dict) -> Dict:
+        """Return {"embeddings": [[...], ...], "usage": {"prompt_tokens": ...}} for a batch of texts, in order"""
+        pass
+
+
+# Contents registered through cache_content() by name, shared by the record and replay
+# transports of a process the way the API's cached contents are shared by its clients
+_cached_contents: Dict[str, Dict] = {}
+_cached_contents_lock = threading.Lock()
+
+
+def cached_prompt(cached_content: Optional[str], prompt: str) -> str:
+    """The full prompt a cached-content request stands for, so cassette keys match the inline request"""
+    with _cached_contents_lock:
+        entry = _cached_contents.get(cached_content) if cached_content else None
+    return f"{entry['content']}\n\n{prompt}" if entry else prompt
+
+
+class LiveGeminiTransport(GeminiTransport):
+    """Calls the Gemini API through google-generativeai"""
+
+    def __init__(self, api_key: str):
+        import google.generativeai as genai
+
+        self.genai = genai
+        genai.configure(api_key=api_key)
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def _get_model(self, model_name: str, cached_content: Optional[str] = None):
+        key = cached_content or model_name
+        with self._lock:
+            model = self._models.get(key)
+        if model is None:
+            if cached_content:
+                # A model bound to cached content; fetching it is an API call, so it is made outside the lock
+                model = self.genai.GenerativeModel.from_cached_content(self.genai.caching.CachedContent.get(cached_content))
+            else:
+                model = self.genai.GenerativeModel(model_name)
+            with self._lock:
+                model = self._models.setdefault(key, model)
+        return model
+
+    def release_content(self, name: str):
+        with self._lock:
+            self._models.pop(name, None)
+
+    def generate(self, model_name: str, prompt: str, generation_config: Dict, cached_content: Optional[str] = None) -> Dict:
+        from google.api_core import exceptions as google_exceptions
+
+        try:
+            response = self._get_model(model_name, cached_content).generate_content(
+                prompt,
+                generation_config=self.genai.types.GenerationConfig(**generation_config)
+            )
+        except google_exceptions.NotFound as e:
+            if cached_content:
+                raise CachedContentNotFound(str(e)) from e
+            raise
+        except google_exceptions.ResourceExhausted as e:
+            raise RateLimitError(str(e)) from e
+        except google_exceptions.DeadlineExceeded as e:
+            raise TransportTimeout(str(e)) from e
+
+        return {"text": response.text, "usage": self._usage(response, prompt, response.text)}
+
+    def generate_stream(self, model_name: str, prompt: str, generation_config: Dict, cached_content: Optional[str] = None) -> Iterator[Dict]:
+        from google.api_core import exceptions as google_exceptions
+
+        try:
+            response = self._get_model(model_name, cached_content).generate_content(
+                prompt,
+                generation_config=self.genai.types.GenerationConfig(**generation_config),
+                stream=True
+            )
+            text = ""
+            for chunk in response:
+                text += chunk.text
+                yield {"text": chunk.text}
+        except google_exceptions.NotFound as e:
+            if cached_content:
+                raise CachedContentNotFound(str(e)) from e
+            raise
+        except google_exceptions.ResourceExhausted as e:
+            raise RateLimitError(str(e)) from e
+        except google_exceptions.DeadlineExceeded as e:
+            raise TransportTimeout(str(e)) from e
+        yield {"usage": self._usage(response, prompt, text)}
+
+    @staticmethod
+    def _usage(response, prompt: str, text: str) -> Dict:
+        """Token counts; prompt_tokens includes the cached_tokens read from cached content or implicit prefix caching"""
+        usage_metadata = getattr(response, "usage_metadata", None)
+        usage = {
+            "prompt_tokens": getattr(usage_metadata, "prompt_token_count", None) or estimate_tokens(prompt),
+            "output_tokens": getattr(usage_metadata, "candidates_token_count", None) or estimate_tokens(text)
+        }
+        if getattr(usage_metadata, "cached_content_token_count", None):
+            usage["cached_tokens"] = usage_metadata.cached_content_token_count
+        return usage
+
+    def cache_content(self, model_name: str, content: str, ttl_seconds: int) -> str:
+        from google.api_core import exceptions as google_exceptions
+
+        try:
+            cached = self.genai.caching.CachedContent.create(
+                model=f"models/{model_name}",
+                system_instruction=content,
+                ttl=timedelta(seconds=ttl_seconds)
+            )
+        except google_exceptions.ResourceExhausted as e:
+            raise RateLimitError(str(e)) from e
+        except google_exceptions.DeadlineExceeded as e:
+            raise TransportTimeout(str(e)) from e
+        return cached.name
+
+    def embed(self, model_name: str, texts: List[str], embedding_config: Dict) -> Dict:
+        from google.api_core import exceptions as google_exceptions
+
+        try:
+            # A list of contents is embedded in one batch request
+            response = self.genai.embed_content(
+                model=f"models/{model_name}",
+                content=texts,
+                task_type=embedding_config.get("task_type"),
+                output_dimensionality=embedding_config.get("output_dimensionality")
+            )
+        except google_exceptions.ResourceExhausted as e:
+            raise RateLimitError(str(e)) from e
+        except google_exceptions.DeadlineExceeded as e:
+            raise TransportTimeout(str(e)) from e
+        return {"embeddings": response["embedding"], "usage": {"prompt_tokens": sum(estimate_tokens(text) for text in texts)}}
+
+
+class RecordingGeminiTransport(GeminiTransport):
+    """Forwards to another transport and records every exchange to a cassette"""
+
+    def __init__(self, inner: GeminiTransport, cassette: Cassette):
+        self.inner = inner
+        self.cassette = cassette
+
+    def generate(self, model_name: str, prompt: str, generation_config: Dict, cached_content: Optional[str] = None) -> Dict:
+        request = {"model": model_name, "prompt": cached_prompt(cached_content, prompt), "config": generation_config}
+        start_time = time.perf_counter()
+        response = self.inner.generate(model_name, prompt, generation_config, cached_content)
+        self.cassette.record(request_key(request), request, response, time.perf_counter() - start_time)
+        return response
+
+    def generate_stream(self, model_name: str, prompt: str, generation_config: Dict, cached_content: Optional[str] = None) -> Iterator[Dict]:
+        # Recorded as one response under the generate() key, so replay can serve it either way
+        request = {"model": model_name, "prompt": cached_prompt(cached_content, prompt), "config": generation_config}
+        start_time = time.perf_counter()
+        text, usage = "", {}
+        for chunk in self.inner.generate_stream(model_name, prompt, generation_config, cached_content):
+            text += chunk.get("text", "")
+            usage = chunk.get("usage", usage)
+            yield chunk
+        self.cassette.record(request_key(request), request, {"text": text, "usage": usage}, time.perf_counter() - start_time)
+
+    def cache_content(self, model_name: str, content: str, ttl_seconds: int) -> str:
+        # Not recorded: replay registers contents locally, and requests are keyed by their full prompt
+        name = self.inner.cache_content(model_name, content, ttl_seconds)
+        with _cached_contents_lock:
+            _cached_contents[name] = {"content": content, "model": model_name, "expires_at": time.time() + ttl_seconds}
+        return name
+
+    def release_content(self, name: str):
+        self.inner.release_content(name)
+        with _cached_contents_lock:
+            _cached_contents.pop(name, None)
+
+    def embed(self, model_name: str, texts: List[str], embedding_config: Dict) -> Dict:
+        request = {"model": model_name, "texts": texts, "config": embedding_config}
+        start_time = time.perf_counter()
+        response = self.inner.embed(model_name, texts, embedding_config)
+        self.cassette.record(request_key(request), request, response, time.perf_counter() - start_time)
+        return response
+
+
+class ReplayGeminiTransport(GeminiTransport):
+    """Serves responses from a cassette with synthetic latency and injected failures
+
+    Requests missing from the cassette get a deterministic synthetic response,
+    unless miss_policy is "error". Cached contents are a local stand-in for the
+    API's: registered in memory with their TTL, and a request that references
+    one is served as the full prompt, reporting the prefix as cached tokens.
+    """
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        latency: Optional[LatencyModel] = None,
+        failures: Optional[FailureInjector] = None,
+        miss_policy: str = "synthetic",
+        synthetic_chars: int = 1500
+    ):
+        self.cassette = cassette
+        self.latency = latency or LatencyModel()
+        self.failures = failures or FailureInjector()
+        self.miss_policy = miss_policy
+        self.synthetic_chars = synthetic_chars
+        self.hits = 0
+        self.misses = 0
+
+    def generate(self, model_name: str, prompt: str, generation_config: Dict, cached_content: Optional[str] = None) -> Dict:
+        prefix = self._cached_prefix(model_name, cached_content)
+        prompt = f"{prefix}\n\n{prompt}" if cached_content else prompt
+        request = {"model": model_name, "prompt": prompt, "config": generation_config}
+        entry = self.cassette.get(request_key(request))
+
+        time.sleep(self.latency.sample(entry["latency"] if entry else None))
+        self.failures.maybe_fail("Gemini")
+        return self._response(entry, prompt, generation_config, prefix)
+
+    def generate_stream(self, model_name: str, prompt: str, generation_config: Dict, cached_content: Optional[str] = None) -> Iterator[Dict]:
+        """The generate() response in line-sized chunks, with the sampled latency spread across them"""
+        prefix = self._cached_prefix(model_name, cached_content)
+        prompt = f"{prefix}\n\n{prompt}" if cached_content else prompt
+        request = {"model": model_name, "prompt": prompt, "config": generation_config}
+        entry = self.cassette.get(request_key(request))
+        latency = self.latency.sample(entry["latency"] if entry else None)
+        self.failures.maybe_fail("Gemini")
+        response = self._response(entry, prompt, generation_config, prefix)
+
+        chunks = response["text"].splitlines(keepends=True) or [""]
+        for chunk in chunks:
+            time.sleep(latency / len(chunks))
+            yield {"text": chunk}
+        yield {"usage": response["usage"]}
+
+    def cache_content(self, model_name: str, content: str, ttl_seconds: int) -> str:
+        name = f"cachedContents/local-{request_key({'model': model_name, 'content': content})[:16]}"
+        with _cached_contents_lock:
+            _cached_contents[name] = {"content": content, "model": model_name, "expires_at": time.time() + ttl_seconds}
+        return name
+
+    def release_content(self, name: str):
+        with _cached_contents_lock:
+            _cached_contents.pop(name, None)
+
+    @staticmethod
+    def _cached_prefix(model_name: str, cached_content: Optional[str]) -> str:
+        """Content of a live cached content name, raising like the API for an expired or unknown one"""
+        if not cached_content:
+            return ""
+        with _cached_contents_lock:
+            entry = _cached_contents.get(cached_content)
+            if entry and entry["expires_at"] <= time.time():
+                del _cached_contents[cached_content]
+                entry = None
+        if not entry or entry["model"] != model_name:
+            raise CachedContentNotFound(f"Cached content {cached_content} not found")
+        return entry["content"]
+
+    def _response(self, entry: Optional[Dict], prompt: str, generation_config: Dict, prefix: str = "") -> Dict:
+        """The recorded response, or a synthetic one for a miss"""
+        if entry:
+            self.hits += 1
+            response = dict(entry["response"])
+            # Cassettes recorded before usage metadata was captured
+            response.setdefault("usage", {
+                "prompt_tokens": estimate_tokens(prompt),
+                "output_tokens": estimate_tokens(response["text"])
+            })
+            if prefix:
+                response["usage"] = {**response["usage"], "cached_tokens": estimate_tokens(prefix)}
+            return response
+
+        self.misses += 1
+        if self.miss_policy == "error":
+            raise KeyError(f"No recorded Gemini response for prompt starting: {prompt.strip()[:80]!r}")
+        if generation_config.get("response_schema"):
+            text = json.dumps(self._synthetic_json(generation_config["response_schema"], int(request_key({"prompt": prompt})[:8], 16)))
+        else:
+            text = self._synthetic_response(prompt)
+        usage = {"prompt_tokens": estimate_tokens(prompt), "output_tokens": estimate_tokens(text)}
+        if prefix:
+            usage["cached_tokens"] = estimate_tokens(prefix)
+        return {"text": text, "usage": usage}
+
+    def embed(self, model_name: str, texts: List[str], embedding_config: Dict) -> Dict:
+        request = {"model": model_name, "texts": texts, "config": embedding_config}
+        entry = self.cassette.get(request_key(request))
+
+        time.sleep(self.latency.sample(entry["latency"] if entry else None))
+        self.failures.maybe_fail("Gemini")
+
+        if entry:
+            self.hits += 1
+            return entry["response"]
+
+        self.misses += 1
+        if self.miss_policy == "error":
+            raise KeyError(f"No recorded Gemini embeddings for a batch starting: {texts[0][:80]!r}")
+        dim = embedding_config.get("output_dimensionality") or 768
+        return {
+            "embeddings": [self._synthetic_embedding(text, dim) for text in texts],
+            "usage": {"prompt_tokens": sum(estimate_tokens(text) for text in texts)}
+        }
+
+    @staticmethod
+    def _synthetic_embedding(text: str, dim: int) -> List[float]:
+        """Unit vector that depends only on the text"""
+        vector = np.random.default_rng(int(request_key({"text": text})[:16], 16)).standard_normal(dim)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def _synthetic_json(self, schema: Dict, seed: int):
+        """Value of a response schema's shape whose numbers depend only on the prompt"""
+        kind = (schema.get("type") or "string").lower()
+        if schema.get("enum"):
+            return schema["enum"][seed % len(schema["enum"])]
+        if kind == "object":
+            return {name: self._synthetic_json(value, seed + number) for number, (name, value) in enumerate(schema.get("properties", {}).items())}
+        if kind == "array":
+            return [self._synthetic_json(schema.get("items", {}), seed + number) for number in range(2)]
+        if kind in ("integer", "number"):
+            return 50 + seed % 50
+        if kind == "boolean":
+            return bool(seed % 2)
+        return "Synthetic replay value"
+
+    def _synthetic_response(self, prompt: str) -> str:
+        """Markdown-shaped placeholder whose content depends only on the prompt"""
+        seed = int(request_key({"prompt": prompt})[:8], 16)
+        score = 50 + seed % 50
+        body = [
+            "## 📊 Replay Analysis",
+            f"- **Overall Score**: {score}/100",
+            "## ✅ Strengths",
+            "- Clear professional headline",
+            "- Relevant technical skills",
+            "## ⚠️ Areas for Improvement",
+            "- Add quantified achievements to experience entries",
+            "## 🚀 Recommendations",
+            "1. Expand the About section with a clear value proposition",
+            "2. Add in-demand skills for the target role",
+        ]
+        text = "\n".join(body)
+        filler = "\n- Additional synthetic recommendation for benchmarking."
+        while len(text) < self.synthetic_chars:
+            text += filler
+        return text
+
+
+def create_gemini_transport(api_key: Optional[str], mode: Optional[str] = None) -> GeminiTransport:
+    """Build the transport selected by TRANSPORT_MODE (live, record or replay)"""
+    mode = (mode or settings.TRANSPORT_MODE).lower()
+    cassette_path = os.path.join(settings.CASSETTE_DIR, "gemini.jsonl")
+
+    if mode == "replay":
+        return ReplayGeminiTransport(
+            Cassette(cassette_path),
+            latency=LatencyModel(settings.REPLAY_LLM_LATENCY, seed=settings.REPLAY_SEED),
+            failures=FailureInjector(settings.REPLAY_RATE_LIMIT_RATE, settings.REPLAY_TIMEOUT_RATE, seed=settings.REPLAY_SEED),
+            miss_policy=settings.REPLAY_MISS_POLICY
+        )
+
+    live = LiveGeminiTransport(api_key)
+    if mode == "record":
+        return RecordingGeminiTransport(live, Cassette(cassette_path))
+    return live
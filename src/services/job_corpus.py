@@ -0,0 +1,320 @@
+"""
+Streaming ingestion of job-description dumps into an on-disk job index
+
+Usage:
+    python -m src.services.job_corpus --input postings.jsonl [more.jsonl ...] --output data/jobs/index
+
+Dumps are read one line at a time. Each posting is normalized (title,
+seniority, canonical skills from the skill taxonomy), deduplicated by a hash of its normalized content,
+appended to the index's jobs.jsonl and turned into postings that are spilled
+to disk in chunks. A second pass places the postings term by term into
+memory-mapped arrays, so peak memory holds the vocabulary and per-job
+counters, never the corpus. The finished index is moved into place with a
+rename, and MappedJobIndex opens it in milliseconds.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import time
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from ..utils.skill_taxonomy import get_skill_taxonomy
+from .job_index import BM25_B, BM25_K1, bm25_idf, bm25_impacts, weighted_term_frequencies
+
+# Title words that name a level rather than a role, and the seniority each maps to
+SENIORITY_WORDS = {
+    "intern": "Intern", "internship": "Intern", "trainee": "Intern",
+    "junior": "Junior", "jr": "Junior", "entry": "Junior", "graduate": "Junior", "associate": "Junior",
+    "mid": "Mid-level", "intermediate": "Mid-level",
+    "senior": "Senior", "sr": "Senior",
+    "lead": "Lead", "staff": "Staff", "principal": "Principal",
+    "head": "Director", "director": "Director",
+    "vp": "Executive", "chief": "Executive"
+}
+
+# Trailing level markers such as "Engineer II" or "Analyst 3"
+LEVEL_SUFFIX = re.compile(r"(?:\s+|-)(?:i{1,3}|iv|v|[1-5])$", re.IGNORECASE)
+TITLE_WORD = re.compile(r"[\w+#.&/-]+")
+
+# Alternative field names used by common job-board exports
+FIELD_ALIASES = {
+    "title": ("title", "job_title", "position", "name"),
+    "company": ("company", "company_name", "employer", "organization"),
+    "location": ("location", "job_location", "city"),
+    "description": ("description", "job_description", "summary"),
+    "requirements": ("requirements", "qualifications"),
+    "skills": ("skills", "skill_tags", "tags")
+}
+
+POSTINGS_CHUNK = 1_000_000
+
+
+def _field(raw: Dict[str, Any], field: str) -> Any:
+    for name in FIELD_ALIASES[field]:
+        if raw.get(name):
+            return raw[name]
+    return None
+
+
+def _as_list(value: Any, separator: str) -> List[str]:
+    if isinstance(value, str):
+        value = value.split(separator)
+    return [item.strip() for item in value or [] if isinstance(item, str) and item.strip()]
+
+
+def normalize_title(title: str) -> Tuple[str, Optional[str]]:
+    """Role title without level words or suffixes, and the seniority those words named"""
+    title = LEVEL_SUFFIX.sub("", " ".join((title or "").split()))
+    seniority = None
+    words = []
+    for word in TITLE_WORD.findall(title):
+        level = SENIORITY_WORDS.get(word.lower().rstrip("."))
+        if level and seniority is None:
+            seniority = level
+        elif not level:
+            words.append(word if word.isupper() else word.capitalize())
+    return " ".join(words) or title, seniority
+
+
+def normalize_job(raw: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """A posting in the corpus schema, or None when it has no title"""
+    title = _field(raw, "title")
+    if not isinstance(title, str) or not title.strip():
+        return None
+    normalized_title, title_seniority = normalize_title(title)
+    taxonomy = get_skill_taxonomy()
+    requirements = _as_list(_field(raw, "requirements"), "\n")
+    description = " ".join(str(_field(raw, "description") or "").split())
+    skills = taxonomy.canonicalize(_as_list(_field(raw, "skills"), ","))
+    if not skills:
+        # Untagged postings get the skills their text names
+        skills = [taxonomy.name(skill_id) for skill_id in taxonomy.extract(" ".join(requirements + [description]))]
+    return {
+        "job_id": str(raw.get("job_id") or raw.get("id") or ""),
+        "title": " ".join(title.split()),
+        "normalized_title": normalized_title,
+        "company": " ".join(str(_field(raw, "company") or "").split()),
+        "location": " ".join(str(_field(raw, "location") or "").split()),
+        "seniority": raw.get("seniority") or title_seniority or "Not specified",
+        "requirements": requirements,
+        "skills": skills,
+        "description": description
+    }
+
+
+def content_hash(job: Dict[str, Any]) -> int:
+    """64-bit hash of the normalized content, so reposts with new ids still count as duplicates"""
+    content = json.dumps([
+        job["normalized_title"].lower(), job["company"].lower(), job["location"].lower(),
+        job["description"].lower(), [item.lower() for item in job["requirements"]],
+        sorted(skill.lower() for skill in job["skills"])
+    ])
+    return int.from_bytes(hashlib.sha1(content.encode("utf-8")).digest()[:8], "little")
+
+
+def read_postings(paths: Iterable[str]) -> Iterable[Dict[str, Any]]:
+    """Raw postings from JSONL dumps, one line at a time; unreadable lines are skipped"""
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    raw = json.loads(line)
+                except json.JSONDecodeError as e:
+                    print(f"Skipping line {line_number} of {path}: {e}")
+                    continue
+                if isinstance(raw, dict):
+                    yield raw
+
+
+class _PostingSpill:
+    """(term id, job position, weighted tf) triples buffered in memory and appended to three flat files
+
+    Document frequencies are counted per flushed chunk with one bincount.
+    """
+
+    def __init__(self, directory: str):
+        self.paths = [os.path.join(directory, f"postings.{name}.tmp") for name in ("terms", "jobs", "tfs")]
+        self._files = [open(path, 'wb') for path in self.paths]
+        self._buffers = (array('i'), array('i'), array('f'))
+        self.document_frequency = np.zeros(0, dtype=np.int64)
+
+    def add_job(self, position: int, term_ids: List[int], frequencies: Iterable[float]):
+        self._buffers[0].extend(term_ids)
+        self._buffers[1].extend([position] * len(term_ids))
+        self._buffers[2].extend(frequencies)
+        if len(self._buffers[0]) >= POSTINGS_CHUNK:
+            self.flush()
+
+    def flush(self):
+        counts = np.bincount(np.frombuffer(self._buffers[0], dtype=np.int32))
+        if len(counts) > len(self.document_frequency):
+            self.document_frequency = np.concatenate(
+                [self.document_frequency, np.zeros(len(counts) - len(self.document_frequency), dtype=np.int64)])
+        self.document_frequency[:len(counts)] += counts
+        for buffer, f in zip(self._buffers, self._files):
+            buffer.tofile(f)
+            del buffer[:]
+
+    def close(self):
+        self.flush()
+        for f in self._files:
+            f.close()
+
+    def chunks(self) -> Iterable[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        files = [open(path, 'rb') for path in self.paths]
+        try:
+            while True:
+                term_ids = np.fromfile(files[0], dtype=np.int32, count=POSTINGS_CHUNK)
+                if not len(term_ids):
+                    return
+                positions = np.fromfile(files[1], dtype=np.int32, count=POSTINGS_CHUNK)
+                frequencies = np.fromfile(files[2], dtype=np.float32, count=POSTINGS_CHUNK)
+                yield term_ids, positions, frequencies
+        finally:
+            for f in files:
+                f.close()
+
+    def remove(self):
+        for path in self.paths:
+            os.remove(path)
+
+
+def ingest_jobs(paths: List[str], index_dir: str) -> Dict[str, Any]:
+    """Build a MappedJobIndex directory from JSONL dumps and return its meta.json contents"""
+    started = time.perf_counter()
+    index_dir = os.path.abspath(index_dir)
+    build_dir = index_dir + ".building"
+    shutil.rmtree(build_dir, ignore_errors=True)
+    os.makedirs(build_dir)
+
+    # Pass 1: normalize, dedupe, write job records, spill postings
+    vocabulary: Dict[str, int] = {}
+    lengths = array('d')
+    job_offsets = array('q', [0])
+    seen = set()
+    read = duplicates = skipped = 0
+    spill = _PostingSpill(build_dir)
+    with open(os.path.join(build_dir, "jobs.jsonl"), 'wb') as jobs_file:
+        for raw in read_postings(paths):
+            read += 1
+            job = normalize_job(raw)
+            if job is None:
+                skipped += 1
+                continue
+            digest = content_hash(job)
+            if digest in seen:
+                duplicates += 1
+                continue
+            seen.add(digest)
+
+            position = len(lengths)
+            job["job_id"] = job["job_id"] or f"job-{digest:016x}"
+            record = (json.dumps(job, ensure_ascii=False) + "\n").encode("utf-8")
+            jobs_file.write(record)
+            job_offsets.append(job_offsets[-1] + len(record))
+
+            tf = weighted_term_frequencies(job)
+            spill.add_job(position, [vocabulary.setdefault(term, len(vocabulary)) for term in tf], tf.values())
+            lengths.append(sum(tf.values()))
+            if read % 100_000 == 0:
+                print(f"Read {read} postings: {len(lengths)} kept, {duplicates} duplicates")
+    spill.close()
+
+    # Terms are renumbered in sorted order so lookups can binary search the term blob
+    terms = sorted(vocabulary)
+    remap = np.empty(len(terms), dtype=np.int64)
+    remap[np.fromiter((vocabulary[term] for term in terms), dtype=np.int64, count=len(terms))] = np.arange(len(terms))
+    del vocabulary
+    frequency_by_term = np.empty(len(terms), dtype=np.int64)
+    frequency_by_term[remap] = np.pad(spill.document_frequency, (0, len(terms) - len(spill.document_frequency)))
+    offsets = np.concatenate([[0], np.cumsum(frequency_by_term)]).astype(np.int64)
+
+    blob = [term.encode("utf-8") for term in terms]
+    with open(os.path.join(build_dir, "terms.bin"), 'wb') as f:
+        f.write(b"".join(blob))
+    np.save(os.path.join(build_dir, "term_offsets.npy"),
+            np.concatenate([[0], np.cumsum([len(term) for term in blob], dtype=np.int64)]).astype(np.int64))
+    del terms, blob
+    np.save(os.path.join(build_dir, "offsets.npy"), offsets)
+    np.save(os.path.join(build_dir, "job_offsets.npy"), np.frombuffer(job_offsets, dtype=np.int64))
+
+    # Pass 2: scatter each spilled chunk into its terms' slots. Jobs arrive in order,
+    # so every term's postings stay sorted by job position.
+    num_jobs = len(lengths)
+    lengths = np.frombuffer(lengths, dtype=np.float64)
+    average_length = float(lengths.mean()) if num_jobs else 1.0
+    idf = bm25_idf(frequency_by_term, num_jobs)
+    total_postings = int(offsets[-1])
+    doc_ids = np.lib.format.open_memmap(os.path.join(build_dir, "doc_ids.npy"), mode="w+", dtype=np.int32, shape=(total_postings,))
+    impacts = np.lib.format.open_memmap(os.path.join(build_dir, "impacts.npy"), mode="w+", dtype=np.float32, shape=(total_postings,))
+    cursor = offsets[:-1].copy()
+    for term_ids, positions, frequencies in spill.chunks():
+        term_ids = remap[term_ids]
+        order = np.argsort(term_ids, kind="stable")
+        term_ids, positions, frequencies = term_ids[order], positions[order], frequencies[order]
+        unique, first, counts = np.unique(term_ids, return_index=True, return_counts=True)
+        slots = cursor[term_ids] + np.arange(len(term_ids)) - np.repeat(first, counts)
+        doc_ids[slots] = positions
+        impacts[slots] = bm25_impacts(frequencies.astype(np.float64), lengths[positions], average_length, idf[term_ids])
+        cursor[unique] += counts
+    doc_ids.flush()
+    impacts.flush()
+    del doc_ids, impacts
+    spill.remove()
+
+    meta = {
+        "jobs": num_jobs,
+        "terms": len(remap),
+        "postings": total_postings,
+        "postings_read": read,
+        "duplicates": duplicates,
+        "skipped": skipped,
+        "average_length": round(average_length, 4),
+        "bm25": {"k1": BM25_K1, "b": BM25_B},
+        "sources": [os.path.abspath(path) for path in paths],
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "build_seconds": round(time.perf_counter() - started, 2)
+    }
+    with open(os.path.join(build_dir, "meta.json"), 'w') as f:
+        json.dump(meta, f, indent=2)
+
+    # Processes that already mapped the old index keep reading it until they reopen
+    previous_dir = index_dir + ".previous"
+    shutil.rmtree(previous_dir, ignore_errors=True)
+    if os.path.exists(index_dir):
+        os.rename(index_dir, previous_dir)
+    os.rename(build_dir, index_dir)
+    shutil.rmtree(previous_dir, ignore_errors=True)
+    return meta
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from ..config.settings import settings
+
+    parser = argparse.ArgumentParser(description="Ingest JSONL job-description dumps into a memory-mapped job index")
+    parser.add_argument("--input", nargs="+", required=True, help="JSONL dumps, one posting per line")
+    parser.add_argument("--output", default=settings.JOB_INDEX_DIR, help="Index directory (default: JOB_INDEX_DIR)")
+    args = parser.parse_args(argv)
+
+    missing = [path for path in args.input if not os.path.exists(path)]
+    if missing:
+        print(f"Input not found: {', '.join(missing)}")
+        return 1
+    meta = ingest_jobs(args.input, args.output)
+    print(f"Indexed {meta['jobs']} jobs ({meta['duplicates']} duplicates, {meta['skipped']} without a title dropped) "
+          f"with {meta['terms']} terms in {meta['build_seconds']}s -> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,289 @@
+"""
+Local job corpus with an inverted index and BM25 ranking
+
+Jobs are indexed over their title, requirements, skills and description, with
+per-field weights (BM25F style). Each posting stores its precomputed BM25
+impact, so ranking a profile is one bincount over the postings of the query
+terms: a few milliseconds for thousands of jobs, with no LLM call.
+
+Large corpora are ingested once into an on-disk index (see job_corpus) and
+opened memory-mapped through MappedJobIndex, which ranks the same way.
+"""
+
+import json
+import mmap
+import os
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from ..config.settings import settings
+from ..utils.profile_scoring import STOPWORDS, WORD_PATTERN
+from ..utils.skill_taxonomy import get_skill_taxonomy
+
+# Term frequency multiplier per job field
+FIELD_WEIGHTS = {"title": 3.0, "skills": 2.0, "requirements": 1.0, "description": 0.5}
+
+# Query weight of each part of a profile
+PROFILE_WEIGHTS = {"skills": 2.0, "headline": 1.5, "titles": 1.0, "about": 0.3}
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens without stopwords"""
+    return [word for word in WORD_PATTERN.findall((text or "").lower()) if word not in STOPWORDS]
+
+
+def skill_terms(skills: Iterable[str]) -> List[str]:
+    """Whole-skill terms keyed by canonical skill, so "ML" on a profile matches "Machine Learning" on a job"""
+    taxonomy = get_skill_taxonomy()
+    return [f"skill:{taxonomy.key(skill)}" for skill in skills if isinstance(skill, str) and skill.strip()]
+
+
+def job_field_terms(job: Dict[str, Any]) -> Dict[str, List[str]]:
+    skills = job.get("skills") or []
+    return {
+        "title": tokenize(job.get("title", "")),
+        "skills": skill_terms(skills) + tokenize(" ".join(skills)),
+        "requirements": tokenize(" ".join(job.get("requirements") or [])),
+        "description": tokenize(job.get("description", ""))
+    }
+
+
+def weighted_term_frequencies(job: Dict[str, Any]) -> Dict[str, float]:
+    """Term frequencies of a job summed over its fields, each field scaled by its weight"""
+    tf: Dict[str, float] = {}
+    for field, terms in job_field_terms(job).items():
+        for term, count in Counter(terms).items():
+            tf[term] = tf.get(term, 0.0) + FIELD_WEIGHTS[field] * count
+    return tf
+
+
+def bm25_impacts(frequencies: np.ndarray, lengths: np.ndarray, average_length: float, idf: np.ndarray) -> np.ndarray:
+    """BM25 contribution of each posting, given its weighted tf, its job's length and its term's idf"""
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / average_length)
+    return idf * frequencies * (BM25_K1 + 1) / (frequencies + norm)
+
+
+def bm25_idf(document_frequency: np.ndarray, num_jobs: int) -> np.ndarray:
+    return np.log(1 + (num_jobs - document_frequency + 0.5) / (document_frequency + 0.5))
+
+
+def profile_query(profile_data: Dict, query: str = "") -> Dict[str, float]:
+    """Weighted query terms for a profile: skills, headline, recent titles, About, plus any free-text query"""
+    profile_data = profile_data or {}
+    skills = [skill for skill in profile_data.get("skills") or [] if isinstance(skill, str)]
+    experience = [exp for exp in profile_data.get("experience") or [] if isinstance(exp, dict)]
+
+    weights: Counter = Counter()
+    parts = [
+        (skill_terms(skills) + tokenize(" ".join(skills)), PROFILE_WEIGHTS["skills"]),
+        (tokenize(profile_data.get("headline", "")), PROFILE_WEIGHTS["headline"]),
+        (tokenize(" ".join(exp.get("title", "") for exp in experience[:3])), PROFILE_WEIGHTS["titles"]),
+        (tokenize((profile_data.get("about") or "")[:1000]), PROFILE_WEIGHTS["about"]),
+        (tokenize(query), PROFILE_WEIGHTS["headline"])
+    ]
+    for terms, weight in parts:
+        for term in set(terms):
+            weights[term] += weight
+    return dict(weights)
+
+
+class JobIndex:
+    """Inverted index over a job corpus, ranked with BM25
+
+    Postings are stored term by term in two flat arrays (job positions and BM25
+    impacts) with an offset per term, the layout of a CSR matrix.
+    """
+
+    def __init__(self, jobs: List[Dict[str, Any]]):
+        self.jobs = jobs
+        self._build()
+
+    @classmethod
+    def from_jsonl(cls, path: str) -> "JobIndex":
+        """Load a corpus of one job per line; a missing file gives an empty index"""
+        jobs = []
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line_number, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        jobs.append(json.loads(line))
+                    except json.JSONDecodeError as e:
+                        print(f"Skipping job on line {line_number} of {path}: {e}")
+        else:
+            print(f"Job corpus not found at {path}")
+        return cls(jobs)
+
+    @property
+    def num_jobs(self) -> int:
+        return len(self.jobs)
+
+    def job(self, position: int) -> Dict[str, Any]:
+        return self.jobs[position]
+
+    def _term_id(self, term: str) -> Optional[int]:
+        return self.vocabulary.get(term)
+
+    def _build(self):
+        weighted_tfs = [weighted_term_frequencies(job) for job in self.jobs]
+
+        # One (term, job, weighted tf) triple per posting, grouped by term with a stable sort
+        self.vocabulary: Dict[str, int] = {}
+        term_ids, positions, frequencies = [], [], []
+        for position, tf in enumerate(weighted_tfs):
+            for term, frequency in tf.items():
+                term_ids.append(self.vocabulary.setdefault(term, len(self.vocabulary)))
+                positions.append(position)
+                frequencies.append(frequency)
+        term_ids = np.array(term_ids, dtype=np.int64)
+        positions = np.array(positions, dtype=np.int32)
+        frequencies = np.array(frequencies, dtype=np.float64)
+
+        lengths = np.array([sum(tf.values()) for tf in weighted_tfs], dtype=np.float64)
+        average_length = float(lengths.mean()) if len(lengths) else 1.0
+        document_frequency = np.bincount(term_ids, minlength=len(self.vocabulary))
+        idf = bm25_idf(document_frequency, len(self.jobs))
+        impacts = bm25_impacts(frequencies, lengths[positions], average_length, idf[term_ids])
+
+        order = np.argsort(term_ids, kind="stable")
+        self._offsets = np.concatenate([[0], np.cumsum(document_frequency)]).astype(np.int64)
+        self._doc_ids = positions[order]
+        self._impacts = impacts[order].astype(np.float32)
+
+    def score(self, query_weights: Dict[str, float]) -> np.ndarray:
+        """BM25 score of every job for weighted query terms"""
+        found = [(term_id, weight) for term_id, weight in
+                 ((self._term_id(term), weight) for term, weight in query_weights.items()) if term_id is not None]
+        if not found or not self.num_jobs:
+            return np.zeros(self.num_jobs, dtype=np.float32)
+        term_ids = np.array([term_id for term_id, _ in found])
+        starts, ends = self._offsets[term_ids], self._offsets[term_ids + 1]
+        slices = np.concatenate([np.arange(start, end) for start, end in zip(starts, ends)])
+        weights = np.repeat(np.array([weight for _, weight in found], dtype=np.float32), ends - starts)
+        return np.bincount(self._doc_ids[slices], weights=self._impacts[slices] * weights, minlength=self.num_jobs)
+
+    def search(self, profile_data: Dict, top_k: int = 5, query: str = "") -> List[Dict[str, Any]]:
+        """Best matching jobs for a profile, with the listed skills each one shares and lacks"""
+        scores = self.score(profile_query(profile_data, query))
+        top_k = min(top_k, int(np.count_nonzero(scores)))
+        if top_k <= 0:
+            return []
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        taxonomy = get_skill_taxonomy()
+        profile_skills = {taxonomy.key(skill) for skill in (profile_data or {}).get("skills") or [] if isinstance(skill, str)}
+        matches = []
+        for position in top:
+            job = self.job(int(position))
+            job_skills = [(skill, taxonomy.key(skill)) for skill in job.get("skills") or []]
+            matches.append({
+                "job": job,
+                "score": round(float(scores[position]), 3),
+                "matched_skills": [skill for skill, key in job_skills if key in profile_skills],
+                "missing_skills": [skill for skill, key in job_skills if key not in profile_skills]
+            })
+        return matches
+
+    def find_title(self, role: str) -> Optional[Dict[str, Any]]:
+        """Job whose title best matches a role name"""
+        weights = {term: 1.0 for term in tokenize(role)}
+        scores = self.score(weights)
+        if not len(scores) or scores.max() <= 0:
+            return None
+        return self.job(int(scores.argmax()))
+
+
+class MappedJobIndex(JobIndex):
+    """JobIndex over an on-disk index built by job_corpus.ingest_jobs
+
+    Postings, the term dictionary and the job records are memory-mapped
+    read-only: opening reads only meta.json, pages are loaded on first touch,
+    and worker processes share a single copy through the page cache. Terms are
+    stored sorted, so a term is found by binary search without loading a dict.
+    """
+
+    def __init__(self, index_dir: str):
+        self.index_dir = index_dir
+        with open(os.path.join(index_dir, "meta.json"), 'r') as f:
+            self.meta = json.load(f)
+
+        def load(name: str) -> np.ndarray:
+            return np.load(os.path.join(index_dir, f"{name}.npy"), mmap_mode="r")
+
+        self._offsets = load("offsets")
+        self._doc_ids = load("doc_ids")
+        self._impacts = load("impacts")
+        self._term_offsets = load("term_offsets")
+        self._job_offsets = load("job_offsets")
+        self._terms = self._map(os.path.join(index_dir, "terms.bin"))
+        self._jobs = self._map(os.path.join(index_dir, "jobs.jsonl"))
+
+    @staticmethod
+    def _map(path: str):
+        with open(path, 'rb') as f:
+            # mmap cannot map an empty file, and an empty index needs no bytes
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(path) else b""
+
+    @classmethod
+    def is_index(cls, index_dir: str) -> bool:
+        return os.path.exists(os.path.join(index_dir, "meta.json"))
+
+    @property
+    def num_jobs(self) -> int:
+        return len(self._job_offsets) - 1
+
+    def job(self, position: int) -> Dict[str, Any]:
+        return json.loads(self._jobs[self._job_offsets[position]:self._job_offsets[position + 1]])
+
+    def _term_id(self, term: str) -> Optional[int]:
+        key = term.encode('utf-8')
+        low, high = 0, len(self._term_offsets) - 1
+        while low < high:
+            middle = (low + high) // 2
+            candidate = self._terms[self._term_offsets[middle]:self._term_offsets[middle + 1]]
+            if candidate == key:
+                return middle
+            if candidate < key:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+
+def format_job_matches(matches: List[Dict[str, Any]]) -> str:
+    """Numbered candidate jobs for LLM prompts"""
+    lines = []
+    for number, match in enumerate(matches, 1):
+        job = match["job"]
+        lines.append(
+            f"{number}. {job.get('title')} at {job.get('company')} ({job.get('location', 'location not listed')}, "
+            f"{job.get('seniority', 'level not listed')}) - relevance {match['score']}\n"
+            f"   Requirements: {'; '.join(job.get('requirements') or []) or 'Not listed'}\n"
+            f"   Skills the candidate has: {', '.join(match['matched_skills']) or 'none listed'}\n"
+            f"   Skills the candidate lacks: {', '.join(match['missing_skills']) or 'none'}"
+        )
+    return "\n".join(lines)
+
+
+_index_instance: Optional[JobIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_job_index() -> JobIndex:
+    """Return the process-wide job index: the ingested index in JOB_INDEX_DIR if there is one, else JOB_CORPUS_PATH"""
+    global _index_instance
+    with _index_lock:
+        if _index_instance is None:
+            if MappedJobIndex.is_index(settings.JOB_INDEX_DIR):
+                _index_instance = MappedJobIndex(settings.JOB_INDEX_DIR)
+            else:
+                _index_instance = JobIndex.from_jsonl(settings.JOB_CORPUS_PATH)
+        return _index_instance
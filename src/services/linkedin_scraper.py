@@ -1,11 +1,14 @@
 import asyncio
 import json
 import time
-import requests
 import re
-from typing import Dict, Optional, List
-from apify_client import ApifyClient
+from typing import Callable, Dict, Optional, List
 from pydantic import BaseModel
+from ..config.settings import settings
+from .apify_transport import ApifyTransport, create_apify_transport
+from .job_index import JobIndex, get_job_index
+from ..utils import telemetry
+from ..utils.skill_taxonomy import get_skill_taxonomy
 
 # Handle Streamlit import gracefully
 try:
@@ -30,6 +33,9 @@ except (ImportError, Exception):
     
     st = MockStreamlit()
 
+class ScrapeError(Exception):
+    """Raised when a LinkedIn profile could not be scraped"""
+
 class LinkedInProfile(BaseModel):
     full_name: str
     headline: str
@@ -43,8 +49,8 @@ class LinkedInProfile(BaseModel):
     profile_image: Optional[str] = ""
 
 class LinkedInScraperService:
-    def __init__(self, apify_token: str):
-        self.client = ApifyClient(apify_token)
+    def __init__(self, apify_token: str, transport: Optional[ApifyTransport] = None):
+        self.transport = transport or create_apify_transport(apify_token)
         self.actor_id = "curious_coder/linkedin-profile-scraper"
         self.apify_token = apify_token
         
@@ -97,37 +103,7 @@ class LinkedInScraperService:
     def check_credits(self) -> Dict:
         """Check available Apify credits"""
         try:
-            # Direct API call to user endpoint
-            headers = {
-                "Authorization": f"Bearer {self.apify_token}",
-                "Content-Type": "application/json"
-            }
-            
-            response = requests.get(
-                "https://api.apify.com/v2/users/me", 
-                headers=headers,
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                user_data = response.json()
-                plan = user_data.get('plan', {})
-                available_credits = plan.get('availableCredits', 0)
-                
-                return {
-                    'available_credits': available_credits,
-                    'has_credits': available_credits > 0.001,
-                    'username': user_data.get('username', 'Unknown')
-                }
-            else:
-                pass  # Silent fail for credit check
-                
-        except Exception as e:
-            pass  # Silent fail for credit check
-        
-        # Fallback: Use Apify client method
-        try:
-            user_info = self.client.user().get()
+            user_info = self.transport.get_user()
             plan = user_info.get('plan', {})
             available_credits = plan.get('availableCredits', 0)
             
@@ -149,19 +125,10 @@ class LinkedInScraperService:
     def fetch_from_dataset(self, dataset_id: str) -> Optional[LinkedInProfile]:
         """Fetch profile data directly from a known dataset ID"""
         try:
-            url = f"https://api.apify.com/v2/datasets/{dataset_id}/items"
-            headers = {
-                "Authorization": f"Bearer {self.apify_token}",
-                "Content-Type": "application/json"
-            }
-            
-            response = requests.get(url, headers=headers)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data and len(data) > 0:
-                    profile_data = data[0]
-                    return self._normalize_profile_data(profile_data, "")
+            data = self.transport.get_dataset_items(dataset_id)
+            if data and len(data) > 0:
+                profile_data = data[0]
+                return self._normalize_profile_data(profile_data, "")
                     
             return None
             
@@ -188,83 +155,114 @@ class LinkedInScraperService:
             pass
         return "linkedin-user"
 
-    async def scrape_profile(self, profile_url: str) -> LinkedInProfile:
-        """Main scraping method using the correct Apify API format"""
+    def _report_progress(self, on_progress: Optional[Callable[[str, float, str], None]], status: str, progress: float, message: str):
+        """Forward a progress event to the caller, ignoring callback failures"""
+        if not on_progress:
+            return
+        try:
+            on_progress(status, progress, message)
+        except Exception as e:
+            print(f"Error reporting scrape progress: {e}")
+
+    async def scrape_profile(
+        self,
+        profile_url: str,
+        on_progress: Optional[Callable[[str, float, str], None]] = None
+    ) -> LinkedInProfile:
+        """Main scraping method using the correct Apify API format
+
+        on_progress, when given, is called as on_progress(status, progress, message)
+        with the Apify run status and a 0-1 progress estimate. Scrapes run on
+        queue worker threads, so progress is only reported through it. Raises
+        ScrapeError when no real profile could be scraped.
+        """
         
         # Validate LinkedIn URL
         if not self._is_valid_linkedin_url(profile_url):
-            st.error(f"❌ Invalid LinkedIn profile URL: {profile_url}")
-            return self._create_simple_demo_profile(profile_url, "Invalid LinkedIn URL provided")
-        
-        username = self._extract_username_from_url(profile_url)
+            self._fail(on_progress, "INVALID_URL", f"Invalid LinkedIn profile URL: {profile_url}")
         
         # Check credits
+        self._report_progress(on_progress, "CHECKING_CREDITS", 0.05, "Checking Apify credits")
         credit_info = self.check_credits()
         if not credit_info['has_credits'] and not credit_info.get('check_failed', False):
-            st.warning("⚠️ Insufficient Apify credits - add credits at: https://console.apify.com/billing")
             # Continue with scraping attempt anyway
+            self._report_progress(
+                on_progress, "CHECKING_CREDITS", 0.05,
+                "Insufficient Apify credits - add credits at: https://console.apify.com/billing"
+            )
         
         # Attempt scraping
         try:
-            with st.spinner(f"Scraping LinkedIn profile..."):
-                run_input = self.create_scraper_input(profile_url)
-                run = self.client.actor(self.actor_id).call(run_input=run_input)
-                
-                run_id = run.get("id")
-                if not run_id:
-                    st.error("Failed to start scraping")
-                    return self._create_simple_demo_profile(profile_url, "Failed to start scraping run")
+            run_input = self.create_scraper_input(profile_url)
+            # Start the run without blocking so its status can be reported while it runs
+            run = self.transport.start_actor(self.actor_id, run_input)
+            
+            run_id = run.get("id")
+            if not run_id:
+                self._fail(on_progress, "FAILED", "Failed to start scraping run")
+            
+            self._report_progress(on_progress, run.get("status", "READY"), 0.1, f"Started Apify run {run_id}")
+            
+            # Wait for completion
+            max_wait = settings.SCRAPE_MAX_WAIT
+            start_time = time.time()
+            check_interval = settings.SCRAPE_POLL_INTERVAL
+            
+            while run.get("status") not in ["SUCCEEDED", "FAILED", "ABORTED", "TIMED-OUT"]:
+                elapsed = time.time() - start_time
+                if elapsed > max_wait:
+                    self._fail(on_progress, "TIMED-OUT", "Scraping timeout")
                 
-                # Wait for completion
-                max_wait = 300  # 5 minutes
-                start_time = time.time()
-                check_interval = 15
+                await asyncio.sleep(check_interval)
+                try:
+                    run = self.transport.get_run(run_id)
+                except Exception:
+                    continue
                 
-                while run.get("status") not in ["SUCCEEDED", "FAILED", "ABORTED", "TIMED-OUT"]:
-                    elapsed = time.time() - start_time
-                    if elapsed > max_wait:
-                        st.error("Scraping timed out")
-                        return self._create_simple_demo_profile(profile_url, "Scraping timeout")
-                    
-                    await asyncio.sleep(check_interval)
-                    try:
-                        run = self.client.run(run_id).get()
-                    except Exception:
-                        continue
+                # Apify does not report a completion percentage, so progress while
+                # running is the elapsed share of the wait budget
+                elapsed = time.time() - start_time
+                self._report_progress(
+                    on_progress,
+                    run.get("status", "RUNNING"),
+                    0.1 + 0.7 * min(elapsed / max_wait, 1.0),
+                    run.get("statusMessage") or f"Apify run {run.get('status', 'RUNNING').lower()} ({int(elapsed)}s)"
+                )
+            
+            # Handle completion
+            final_status = run.get("status")
+            
+            if final_status == "SUCCEEDED":
+                self._report_progress(on_progress, "FETCHING_RESULTS", 0.85, "Downloading scraped profile data")
+                dataset_id = run.get("defaultDatasetId")
+                items = self.transport.get_dataset_items(dataset_id)
                 
-                # Handle completion
-                final_status = run.get("status")
+                if not items:
+                    self._fail(on_progress, "NO_DATA", "No data returned")
+                if not self._is_valid_profile_data(items[0]):
+                    self._fail(on_progress, "INCOMPLETE", "Incomplete data retrieved")
                 
-                if final_status == "SUCCEEDED":
-                    dataset_id = run.get("defaultDatasetId")
-                    items = list(self.client.dataset(dataset_id).iterate_items())
+                self._report_progress(on_progress, "NORMALIZING", 0.95, "Normalizing profile data")
+                with telemetry.span("normalize"):
+                    normalized_profile = self._normalize_profile_data(items[0], profile_url)
+                self._report_progress(on_progress, "SUCCEEDED", 1.0, f"Scraped profile: {normalized_profile.full_name}")
+                return normalized_profile
                     
-                    if items and len(items) > 0:
-                        profile_data = items[0]
-                        
-                        if self._is_valid_profile_data(profile_data):
-                            normalized_profile = self._normalize_profile_data(profile_data, profile_url)
-                            st.success(f"Successfully scraped profile: {normalized_profile.full_name}")
-                            return normalized_profile
-                        else:
-                            st.warning("Scraped data appears incomplete")
-                            return self._create_simple_demo_profile(profile_url, "Incomplete data retrieved")
-                    else:
-                        st.warning("No data returned from scraping")
-                        return self._create_simple_demo_profile(profile_url, "No data returned")
-                        
-                elif final_status == "FAILED":
-                    error_message = run.get("errorMessage", "Unknown error")
-                    st.error(f"Scraping failed: {error_message}")
-                    return self._create_simple_demo_profile(profile_url, f"Scraping failed: {error_message}")
-                
-                else:
-                    st.warning(f"Scraping was {final_status.lower()}")
-                    return self._create_simple_demo_profile(profile_url, f"Process {final_status.lower()}")
+            elif final_status == "FAILED":
+                self._fail(on_progress, "FAILED", f"Scraping failed: {run.get('errorMessage', 'Unknown error')}")
+            
+            else:
+                self._fail(on_progress, final_status, f"Process {final_status.lower()}")
                     
+        except ScrapeError:
+            raise
         except Exception as e:
-            st.error(f"Unexpected error: {str(e)}")
-            return self._create_simple_demo_profile(profile_url, f"Technical error: {str(e)}")
+            self._fail(on_progress, "ERROR", f"Technical error: {str(e)}")
+
+    def _fail(self, on_progress: Optional[Callable[[str, float, str], None]], status: str, message: str):
+        """Report a failed scrape as its final progress event and raise"""
+        self._report_progress(on_progress, status, 1.0, message)
+        raise ScrapeError(message)
 
     def _normalize_profile_data(self, raw_data: Dict, profile_url: str) -> LinkedInProfile:
         """Normalize scraped profile data to our LinkedInProfile format"""
@@ -344,13 +342,15 @@ class LinkedInScraperService:
             skills_data = raw_data.get("skills", [])
             
             if isinstance(skills_data, list):
-                for skill in skills_data[:20]:  # Limit to 20 skills
+                for skill in skills_data:
                     if isinstance(skill, dict):
                         skill_name = skill.get("name") or skill.get("skill")
                         if skill_name:
                             skills.append(skill_name)
                     elif isinstance(skill, str):
                         skills.append(skill)
+            # Canonical names, so "ML" and "Machine Learning" are one skill; limit to 20 skills
+            skills = get_skill_taxonomy().canonicalize(skills)[:20]
             
             return LinkedInProfile(
                 full_name=full_name,
@@ -366,43 +366,8 @@ class LinkedInScraperService:
             )
             
         except Exception as e:
-            st.error(f"Error normalizing profile data: {e}")
-            return self._create_simple_demo_profile(profile_url, f"Data processing error: {str(e)}")
-
-    def _create_simple_demo_profile(self, profile_url: str, reason: str) -> LinkedInProfile:
-        """Create a simple demo profile when real scraping isn't possible"""
-        username = self._extract_username_from_url(profile_url)
-        
-        return LinkedInProfile(
-            full_name=f"Demo User ({username})",
-            headline="Demo Profile - Real LinkedIn scraping not available",
-            about=f"""This is a demo profile because: {reason}
-
-To get real LinkedIn data:
-• Ensure you have Apify credits ($5-10 recommended)
-• Verify the LinkedIn URL is correct and public
-• Check your Apify account configuration
+            raise ScrapeError(f"Data processing error: {str(e)}") from e
 
-Real LinkedIn scraping requires proper setup and credits.""",
-            experience=[{
-                "title": "Demo Position",
-                "company": "Demo Company",
-                "description": "This is example data. Real scraping would show actual work history.",
-                "duration": "Demo Period",
-                "location": "Demo Location"
-            }],
-            education=[{
-                "school": "Demo University",
-                "degree": "Demo Degree",
-                "field": "Demo Field",
-                "duration": "Demo Years"
-            }],
-            skills=["Demo Skill 1", "Demo Skill 2", "Demo Skill 3"],
-            location="Demo Location",
-            connections_count=500,
-            profile_url=profile_url
-        )
-    
     def _is_valid_profile_data(self, profile_data: Dict) -> bool:
         """Check if the profile data contains meaningful information"""
         if not profile_data:
@@ -414,25 +379,14 @@ Real LinkedIn scraping requires proper setup and credits.""",
         return has_name and has_headline
 
 class JobDatabaseService:
-    """Service to provide job description templates for analysis"""
+    """Service to provide job descriptions for analysis, looked up in the local job corpus"""
     
-    def __init__(self):
-        self.job_templates = {
-            "data_scientist": {
-                "title": "Senior Data Scientist",
-                "requirements": [
-                    "PhD or Master's in Data Science, Statistics, or related field",
-                    "5+ years experience in machine learning and statistical analysis",
-                    "Proficiency in Python, R, and SQL",
-                    "Experience with ML frameworks (TensorFlow, PyTorch, scikit-learn)",
-                    "Strong communication and presentation skills"
-                ]
-            }
-        }
+    def __init__(self, job_index: Optional[JobIndex] = None):
+        self.job_index = job_index or get_job_index()
     
     async def get_job_description(self, role: str) -> Dict:
-        """Get job description template for a specific role"""
-        return self.job_templates.get(role.lower().replace(" ", "_"), {
+        """Get the corpus job whose title best matches a role"""
+        return self.job_index.find_title(role) or {
             "title": f"{role}",
             "requirements": ["Role-specific requirements would be listed here"]
-        }) 
\ No newline at end of file
+        }
@@ -0,0 +1,157 @@
+import math
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from ..config.settings import settings
+from ..utils import telemetry
+from .token_usage import parse_agent_budgets
+
+
+class ModelRouter:
+    """Picks the Gemini model of each call, falling back to the fast model while the chosen one is degraded
+
+    Each intent route or agent can have its own model; anything else uses the
+    default. A model is degraded while the p95 latency of its calls in the
+    last window_seconds is above the SLO, for a cooldown after it answered
+    with a rate limit, and while its requests in the last minute are near its
+    per-minute quota. Latency samples age out of the window, so a degraded
+    model gets traffic again and is re-measured instead of being dropped for
+    good. The fast model itself never falls back.
+    """
+
+    def __init__(
+        self,
+        default_model: str,
+        fast_model: str,
+        models: Optional[Dict[str, str]] = None,
+        latency_slo: float = 0.0,
+        window_seconds: float = 300.0,
+        min_samples: int = 5,
+        requests_per_minute: Optional[Dict[str, int]] = None,
+        quota_share: float = 0.9,
+        rate_limit_cooldown: float = 60.0
+    ):
+        self.default_model = default_model
+        self.fast_model = fast_model
+        self.models = models or {}
+        self.latency_slo = latency_slo
+        self.window_seconds = window_seconds
+        self.min_samples = min_samples
+        self.requests_per_minute = requests_per_minute or {}
+        self.quota_share = quota_share
+        self.rate_limit_cooldown = rate_limit_cooldown
+        self._lock = threading.Lock()
+        self._latencies: Dict[str, Deque[Tuple[float, float]]] = {}
+        self._requests: Dict[str, Deque[float]] = {}
+        self._rate_limited_until: Dict[str, float] = {}
+
+    def primary(self, route: Optional[str], agent: Optional[str]) -> str:
+        """Model configured for a route, else for its agent, else the default"""
+        return self.models.get(route or "") or self.models.get(agent or "") or self.default_model
+
+    def select(self, route: Optional[str], agent: Optional[str]) -> str:
+        """Model to call now: the primary, or the fast model while the primary is degraded"""
+        model = self.primary(route, agent)
+        if model == self.fast_model:
+            return model
+        reason = self.degraded(model)
+        if reason:
+            telemetry.MODEL_FALLBACKS.inc(model=model, reason=reason)
+            return self.fast_model
+        return model
+
+    def degraded(self, model: str) -> Optional[str]:
+        """Why calls to a model should fall back right now, or None"""
+        now = time.time()
+        with self._lock:
+            if self._rate_limited_until.get(model, 0.0) > now:
+                return "rate_limit"
+            quota = self.requests_per_minute.get(model)
+            if quota and len(self._prune(self._requests.get(model), now - 60)) >= quota * self.quota_share:
+                return "quota"
+            if self.latency_slo > 0:
+                samples = self._prune(self._latencies.get(model), now - self.window_seconds)
+                if len(samples) >= self.min_samples and _p95([latency for _, latency in samples]) > self.latency_slo:
+                    return "latency"
+        return None
+
+    def record_request(self, model: str):
+        """Count a request against the model's per-minute quota, when it is sent"""
+        with self._lock:
+            self._requests.setdefault(model, deque()).append(time.time())
+
+    def record_latency(self, model: str, seconds: float):
+        """Latency of a completed (or timed out) call"""
+        with self._lock:
+            self._latencies.setdefault(model, deque()).append((time.time(), seconds))
+
+    def record_rate_limit(self, model: str):
+        """The model answered with a rate limit: treat its quota as used up for a while"""
+        with self._lock:
+            self._rate_limited_until[model] = time.time() + self.rate_limit_cooldown
+
+    @staticmethod
+    def _prune(entries: Optional[Deque], cutoff: float) -> Deque:
+        """Drop entries older than cutoff; entries are timestamps or (timestamp, value) pairs in time order"""
+        if entries is None:
+            return deque()
+        while entries and (entries[0][0] if isinstance(entries[0], tuple) else entries[0]) < cutoff:
+            entries.popleft()
+        return entries
+
+    def stats(self) -> Dict:
+        """Recent p95 latency, requests in the last minute and fallback state per model"""
+        now = time.time()
+        with self._lock:
+            models = set(self._latencies) | set(self._requests) | set(self.models.values()) | {self.default_model}
+        stats = {}
+        for model in sorted(models):
+            with self._lock:
+                samples = [latency for _, latency in self._prune(self._latencies.get(model), now - self.window_seconds)]
+                requests = len(self._prune(self._requests.get(model), now - 60))
+            stats[model] = {
+                "p95_seconds": round(_p95(samples), 3) if samples else None,
+                "samples": len(samples),
+                "requests_last_minute": requests,
+                "fallback": None if model == self.fast_model else self.degraded(model)
+            }
+        return stats
+
+
+def _p95(values) -> float:
+    ordered = sorted(values)
+    return ordered[max(math.ceil(0.95 * len(ordered)) - 1, 0)]
+
+
+_router_instance: Optional[ModelRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_model_router() -> ModelRouter:
+    """Return the process-wide model router, configured from settings"""
+    global _router_instance
+    with _router_lock:
+        if _router_instance is None:
+            _router_instance = ModelRouter(
+                settings.GEMINI_MODEL,
+                settings.GEMINI_FAST_MODEL,
+                models=parse_model_map(settings.GEMINI_ROUTE_MODELS),
+                latency_slo=settings.MODEL_LATENCY_SLO_SECONDS,
+                window_seconds=settings.MODEL_LATENCY_WINDOW_SECONDS,
+                requests_per_minute=parse_agent_budgets(settings.MODEL_REQUESTS_PER_MINUTE),
+                quota_share=settings.MODEL_QUOTA_FALLBACK_SHARE,
+                rate_limit_cooldown=settings.MODEL_RATE_LIMIT_COOLDOWN
+            )
+        return _router_instance
+
+
+def parse_model_map(spec: str) -> Dict[str, str]:
+    """Parse "content_generation:gemini-1.5-flash,JobMatcher:gemini-1.5-pro" into a model per route or agent"""
+    models = {}
+    for part in (spec or "").split(","):
+        name, _, model = part.partition(":")
+        if name.strip() and model.strip():
+            models[name.strip()] = model.strip()
+    return models
@@ -0,0 +1,183 @@
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from ..agents.memory_manager import SimpleMemoryManager, add_profile_listener
+from ..config.settings import settings
+from ..utils.profile_scoring import mentioned_skills
+
+FEATURE_COLUMNS = [
+    "user_id", "profile_url", "full_name", "headline", "timestamp",
+    "has_full_name", "has_headline", "about_chars", "experience_count", "described_experience_count",
+    "education_count", "skills_count", "unique_skills_count", "evidenced_skills_count", "skills"
+]
+
+COMPLETENESS_LEVELS = ["Excellent", "Good", "Fair", "Needs Improvement"]
+
+
+def profile_features(user_id: str, record: Dict) -> Dict[str, Any]:
+    """Flat feature row for one stored profile record ({"profile_data", "timestamp"})"""
+    profile_data = record.get("profile_data") or {}
+    experience = [exp for exp in profile_data.get("experience") or [] if isinstance(exp, dict)]
+    skills = [skill for skill in profile_data.get("skills") or [] if isinstance(skill, str) and skill]
+
+    text = " ".join(
+        [profile_data.get("headline") or "", profile_data.get("about") or ""]
+        + [f"{exp.get('title', '')} {exp.get('description') or ''}" for exp in experience]
+    )
+
+    return {
+        "user_id": user_id,
+        "profile_url": profile_data.get("profile_url") or "",
+        "full_name": profile_data.get("full_name") or "",
+        "headline": profile_data.get("headline") or "",
+        "timestamp": record.get("timestamp"),
+        "has_full_name": bool(profile_data.get("full_name")),
+        "has_headline": bool(profile_data.get("headline")),
+        "about_chars": len(profile_data.get("about") or ""),
+        "experience_count": len(experience),
+        "described_experience_count": sum(1 for exp in experience if exp.get("description")),
+        "education_count": len(profile_data.get("education") or []),
+        "skills_count": len(skills),
+        "unique_skills_count": len({skill.lower() for skill in skills}),
+        "evidenced_skills_count": len(mentioned_skills(text, skills)),
+        # Deduplicated, so exploding the column counts each profile once per skill
+        "skills": sorted({skill.lower() for skill in skills})
+    }
+
+
+def completeness_columns(frame: pd.DataFrame) -> pd.DataFrame:
+    """The completeness rubric of profile_scoring.completeness_score, evaluated for every row at once"""
+    about = frame["about_chars"].to_numpy()
+    experience = frame["experience_count"].to_numpy()
+    skills = frame["skills_count"].to_numpy()
+
+    raw_score = (
+        frame["has_full_name"].to_numpy(dtype=np.int64)
+        + frame["has_headline"].to_numpy(dtype=np.int64)
+        + np.select([about > 100, about > 0], [2, 1], 0)
+        + np.select([experience >= 3, experience >= 1], [2, 1], 0)
+        + (frame["described_experience_count"].to_numpy() > 0).astype(np.int64)
+        + (frame["education_count"].to_numpy() > 0).astype(np.int64)
+        + np.select([skills >= 10, skills >= 5], [2, 1], 0)
+    )
+    score = raw_score * 100 // 10
+
+    return pd.DataFrame({
+        "raw_score": raw_score,
+        "completeness_score": score,
+        "completeness_level": np.select([score >= 90, score >= 75, score >= 50], COMPLETENESS_LEVELS[:3], COMPLETENESS_LEVELS[3])
+    }, index=frame.index)
+
+
+class ProfileFeatureTable:
+    """Columnar feature table over a profile store, kept current as profiles are stored
+
+    New and updated profiles are queued as rows and merged into the frame in one
+    concat the next time it is read, so a steady trickle of store_profile calls
+    never rebuilds the whole table.
+    """
+
+    def __init__(self, memory_store_path: str):
+        self.memory_store_path = os.path.abspath(memory_store_path)
+        self._lock = threading.Lock()
+        self._frame = pd.DataFrame(columns=FEATURE_COLUMNS).set_index("user_id")
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self.load()
+
+    def load(self):
+        """Rebuild the table from the stored profiles"""
+        profiles = SimpleMemoryManager(self.memory_store_path).all_profiles()
+        rows = [profile_features(user_id, record) for user_id, record in profiles.items()]
+        with self._lock:
+            self._frame = self._to_frame(rows)
+            self._pending = {}
+
+    @staticmethod
+    def _to_frame(rows: List[Dict[str, Any]]) -> pd.DataFrame:
+        return pd.DataFrame(rows, columns=FEATURE_COLUMNS).set_index("user_id")
+
+    def upsert(self, user_id: str, record: Dict):
+        """Queue the latest profile of a user; the frame picks it up on the next read"""
+        row = profile_features(user_id, record)
+        with self._lock:
+            self._pending[user_id] = row
+
+    def on_profile_stored(self, memory_store_path: str, user_id: str, record: Dict):
+        """store_profile listener; ignores other memory stores in the same process"""
+        if os.path.abspath(memory_store_path) == self.memory_store_path:
+            self.upsert(user_id, record)
+
+    def frame(self) -> pd.DataFrame:
+        """Feature table with the completeness columns, one row per user"""
+        with self._lock:
+            if self._pending:
+                updates = self._to_frame(list(self._pending.values()))
+                kept = self._frame.drop(index=updates.index, errors="ignore")
+                self._frame = updates if kept.empty else pd.concat([kept, updates])
+                self._pending = {}
+            frame = self._frame
+        return frame.join(completeness_columns(frame)) if not frame.empty else frame
+
+    def skill_stats(self, top_n: int = 20, frame: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """Most common skills with the number and share of profiles listing each"""
+        frame = self.frame() if frame is None else frame
+        if frame.empty:
+            return pd.DataFrame(columns=["skill", "profiles", "share"])
+        counts = frame["skills"].explode().dropna().value_counts().head(top_n)
+        return pd.DataFrame({
+            "skill": counts.index,
+            "profiles": counts.to_numpy(),
+            "share": np.round(counts.to_numpy() / len(frame), 4)
+        })
+
+    def summary(self, top_n: int = 20) -> Dict[str, Any]:
+        """Cohort-level completeness and skill metrics, JSON-serializable for dashboards"""
+        frame = self.frame()
+        if frame.empty:
+            return {"profiles": 0}
+
+        scores = frame["completeness_score"]
+        skills = frame["skills_count"]
+        levels = frame["completeness_level"].value_counts()
+        return {
+            "profiles": int(len(frame)),
+            "completeness": {
+                "mean": round(float(scores.mean()), 2),
+                "median": float(scores.median()),
+                "p25": float(scores.quantile(0.25)),
+                "p75": float(scores.quantile(0.75)),
+                "levels": {level: int(levels.get(level, 0)) for level in COMPLETENESS_LEVELS}
+            },
+            "skills": {
+                "mean": round(float(skills.mean()), 2),
+                "median": float(skills.median()),
+                "p90": float(skills.quantile(0.9)),
+                "evidenced_share": round(float(frame["evidenced_skills_count"].sum() / max(int(skills.sum()), 1)), 4),
+                "top": self.skill_stats(top_n, frame).to_dict(orient="records")
+            },
+            "missing": {
+                "about": int((frame["about_chars"] == 0).sum()),
+                "experience_descriptions": int((frame["described_experience_count"] == 0).sum()),
+                "education": int((frame["education_count"] == 0).sum()),
+                "skills": int((skills == 0).sum())
+            }
+        }
+
+
+_tables: Dict[str, ProfileFeatureTable] = {}
+_tables_lock = threading.Lock()
+
+
+def get_profile_feature_table(memory_store_path: Optional[str] = None) -> ProfileFeatureTable:
+    """Return the process-wide feature table of a memory store, subscribed to its store_profile calls"""
+    path = os.path.abspath(memory_store_path or settings.MEMORY_STORE_PATH)
+    with _tables_lock:
+        if path not in _tables:
+            table = ProfileFeatureTable(path)
+            add_profile_listener(table.on_profile_stored)
+            _tables[path] = table
+        return _tables[path]
@@ -0,0 +1,472 @@
+"""
+Similar-profile search over one vector per stored profile
+
+Profiles are embedded locally by feature hashing: canonical skills and their
+categories, headline and recent titles, and the About section, each with its
+own weight, hashed into a fixed number of signed dimensions and L2-normalized,
+so cosine similarity is a dot product.
+
+Vectors live in a memory-mapped float16 file next to an append-only row log.
+Small stores are searched brute force. Past PROFILE_INDEX_IVF_THRESHOLD rows an
+inverted-file (IVF) index is trained with spherical k-means: every row is
+assigned to its nearest centroid, and a query only scans the rows of its
+PROFILE_INDEX_NPROBE nearest centroids, which keeps a million profiles
+interactive. Re-storing a profile appends a new row; older rows of the same user
+are skipped at query time and dropped at the next retrain.
+"""
+
+import json
+import math
+import os
+import threading
+from array import array
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from ..agents.memory_manager import SimpleMemoryManager, add_profile_listener
+from ..config.settings import settings
+from ..utils.profile_scoring import score_profile
+from ..utils.skill_taxonomy import get_skill_taxonomy
+from .embedding_service import hashed_vector
+from .job_index import tokenize
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use only
+    fcntl = None
+
+# Weight of each profile section in the embedding
+SECTION_WEIGHTS = {"skills": 2.0, "skill_categories": 0.5, "headline": 1.5, "titles": 1.5, "about": 0.5}
+
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE = 32768
+MAX_LISTS = 1024
+
+# Rows added since the inverted lists were last grouped are scanned brute force until there are this many
+TAIL_ROWS = 8192
+
+
+def profile_vector(profile_data: Dict, dim: int) -> np.ndarray:
+    """Unit-length hashed embedding of a profile; counts are damped with 1 + log(count)"""
+    profile_data = profile_data or {}
+    taxonomy = get_skill_taxonomy()
+    skills = [skill for skill in profile_data.get("skills") or [] if isinstance(skill, str) and skill.strip()]
+    experience = [exp for exp in profile_data.get("experience") or [] if isinstance(exp, dict)]
+
+    sections = {
+        "skills": [f"skill:{taxonomy.key(skill)}" for skill in skills],
+        "skill_categories": [
+            f"category:{taxonomy.category(skill_id)}" for skill_id in (taxonomy.skill_id(skill) for skill in skills)
+            if skill_id is not None
+        ],
+        "headline": tokenize(profile_data.get("headline") or ""),
+        "titles": tokenize(" ".join(exp.get("title") or "" for exp in experience[:3])),
+        "about": tokenize((profile_data.get("about") or "")[:2000])
+    }
+    features: Dict[str, float] = Counter()
+    for section, terms in sections.items():
+        for term, count in Counter(terms).items():
+            features[term] += SECTION_WEIGHTS[section] * (1 + math.log(count))
+    return hashed_vector(features, dim)
+
+
+def spherical_kmeans(vectors: np.ndarray, num_lists: int, seed: int = 0) -> np.ndarray:
+    """Unit-length centroids of unit-length vectors, by cosine k-means"""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), num_lists, replace=False)].astype(np.float32)
+    for _ in range(KMEANS_ITERATIONS):
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        counts = np.bincount(assignment, minlength=num_lists)
+        empty = counts == 0
+        sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()))]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = sums / np.where(norms == 0, 1, norms)
+    return centroids
+
+
+class ProfileIndex:
+    """Profile vectors of one memory store with brute-force or IVF nearest-neighbour search
+
+    Files in <memory_store>/profile_index/:
+    - vectors.f16: float16 rows, grown in blocks and memory-mapped
+    - rows.jsonl: one {"user_id", "full_name", "headline"} line per row, append-only
+    - lists.i32: IVF list of each row (-1 before the first training)
+    - centroids.npy and meta.json: the IVF centroids and the row count they were trained on
+
+    Writers append under a file lock, so API and batch workers can share one
+    index; readers pick up other processes' rows when rows.jsonl grows.
+    """
+
+    def __init__(self, memory_store_path: str, dim: Optional[int] = None):
+        self.memory_store_path = os.path.abspath(memory_store_path)
+        self.directory = os.path.join(self.memory_store_path, "profile_index")
+        os.makedirs(self.directory, exist_ok=True)
+        self.vectors_file = os.path.join(self.directory, "vectors.f16")
+        self.rows_file = os.path.join(self.directory, "rows.jsonl")
+        self.lists_file = os.path.join(self.directory, "lists.i32")
+        self.centroids_file = os.path.join(self.directory, "centroids.npy")
+        self.meta_file = os.path.join(self.directory, "meta.json")
+        self.lock_file = os.path.join(self.directory, ".lock")
+
+        self.meta = self._read_meta()
+        if not self.meta:
+            self.meta = {"dim": dim or settings.PROFILE_INDEX_DIM, "generation": 0, "trained_rows": 0}
+            self._write_meta(self.meta)
+        self.dim = self.meta["dim"]
+        self._lock = threading.RLock()
+        self._training = False
+        self._file_lock_held = False
+        self._generation = self.meta.get("generation")
+        self._reset()
+        self._refresh()
+
+    def _read_meta(self) -> Dict[str, Any]:
+        try:
+            with open(self.meta_file, 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def _write_meta(self, meta: Dict[str, Any]):
+        with open(self.meta_file + ".tmp", 'w') as f:
+            json.dump(meta, f)
+        os.replace(self.meta_file + ".tmp", self.meta_file)
+
+    def _reset(self):
+        self._row_users: List[str] = []
+        self._row_offsets = array('q')
+        self._rows_size = 0
+        self._latest: Dict[str, int] = {}
+        self._current = np.zeros(0, dtype=bool)
+        self._vectors: Optional[np.ndarray] = None
+        self._lists: Optional[np.ndarray] = None
+        self._centroids: Optional[np.ndarray] = None
+        self._meta_mtime = None
+        self._grouped_rows = 0
+        self._list_offsets = self._list_rows = None
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool = True):
+        """Cross-process lock on the index files: exclusive for writers, shared for readers
+
+        Callers hold self._lock, so a nested call (a writer refreshing) reuses the lock it already has.
+        """
+        if self._file_lock_held:
+            yield
+            return
+        with open(self.lock_file, 'a') as handle:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            self._file_lock_held = True
+            try:
+                yield
+            finally:
+                self._file_lock_held = False
+
+    def _map(self, path: str, dtype, width: int, rows: int) -> Optional[np.ndarray]:
+        """Memory-map the first rows of a file of fixed-width records, or None if it has none"""
+        item = np.dtype(dtype).itemsize * width
+        capacity = os.path.getsize(path) // item if os.path.exists(path) else 0
+        if capacity < max(rows, 1):
+            return None
+        shape = (capacity, width) if width > 1 else (capacity,)
+        return np.memmap(path, dtype=dtype, mode="r", shape=shape)
+
+    def _ensure_capacity(self, rows: int):
+        """Grow the vector and list files to hold at least rows records, doubling in blocks"""
+        capacity = os.path.getsize(self.vectors_file) // (2 * self.dim) if os.path.exists(self.vectors_file) else 0
+        if rows <= capacity:
+            return
+        capacity = max(1024, capacity * 2, rows)
+        for path, width in ((self.vectors_file, 2 * self.dim), (self.lists_file, 4)):
+            with open(path, 'ab') as f:
+                f.truncate(capacity * width)
+        # -1 marks rows without an IVF list; the file grows zero-filled, so mark the new block
+        lists = np.memmap(self.lists_file, dtype=np.int32, mode="r+", shape=(capacity,))
+        lists[len(self._row_users):] = -1
+        lists.flush()
+        self._vectors = self._lists = None
+
+    def _refresh(self):
+        """Load rows other processes appended, and centroids another process retrained"""
+        with self._lock, self._file_lock(exclusive=False):
+            meta_mtime = os.stat(self.meta_file).st_mtime_ns if os.path.exists(self.meta_file) else None
+            if meta_mtime != self._meta_mtime:
+                meta = self._read_meta() or self.meta
+                if meta.get("generation") != self._generation or (self._centroids is None and os.path.exists(self.centroids_file)):
+                    # A retrain compacts and rewrites every file, so start over from disk
+                    self._reset()
+                    if os.path.exists(self.centroids_file):
+                        self._centroids = np.load(self.centroids_file)
+                    self._generation = meta.get("generation")
+                self.meta = meta
+                self._meta_mtime = meta_mtime
+
+            size = os.path.getsize(self.rows_file) if os.path.exists(self.rows_file) else 0
+            if size > self._rows_size:
+                with open(self.rows_file, 'rb') as f:
+                    f.seek(self._rows_size)
+                    data = f.read(size - self._rows_size)
+                # Only whole lines; a writer may be mid-append
+                data = data[:data.rfind(b"\n") + 1]
+                offset = self._rows_size
+                first_new = len(self._row_users)
+                stale = []
+                for line in data.splitlines(keepends=True):
+                    user_id = json.loads(line)["user_id"]
+                    row = len(self._row_users)
+                    if user_id in self._latest:
+                        stale.append(self._latest[user_id])
+                    self._latest[user_id] = row
+                    self._row_users.append(user_id)
+                    self._row_offsets.append(offset)
+                    offset += len(line)
+                self._rows_size = offset
+                current = np.ones(len(self._row_users), dtype=bool)
+                current[:first_new] = self._current
+                current[stale] = False
+                self._current = current
+
+            rows = len(self._row_users)
+            if rows and (self._vectors is None or len(self._vectors) < rows):
+                self._vectors = self._map(self.vectors_file, np.float16, self.dim, rows)
+                self._lists = self._map(self.lists_file, np.int32, 1, rows)
+            if self._centroids is not None and rows and (self._list_offsets is None or rows - self._grouped_rows > TAIL_ROWS):
+                self._group_lists()
+
+    def _group_lists(self):
+        """Sort row numbers by IVF list into CSR offsets, so a list's rows are one slice"""
+        rows = len(self._row_users)
+        lists = np.asarray(self._lists[:rows])
+        assigned = np.flatnonzero(lists >= 0)
+        order = assigned[np.argsort(lists[assigned], kind="stable")]
+        counts = np.bincount(lists[assigned], minlength=len(self._centroids))
+        self._list_offsets = np.concatenate([[0], np.cumsum(counts)])
+        self._list_rows = order.astype(np.int64)
+        self._grouped_rows = rows
+
+    def add(self, user_id: str, profile_data: Dict):
+        """Append the latest vector of a user; retrain the IVF index in the background once the store has grown enough"""
+        self.add_many([(user_id, profile_data)])
+
+    def add_many(self, profiles: List[tuple]):
+        """Append (user_id, profile_data) pairs in one locked write"""
+        if not profiles:
+            return
+        vectors = np.stack([profile_vector(profile_data, self.dim) for _, profile_data in profiles])
+        records = "".join(json.dumps({
+            "user_id": user_id,
+            "full_name": profile_data.get("full_name") or "",
+            "headline": profile_data.get("headline") or ""
+        }) + "\n" for user_id, profile_data in profiles)
+        with self._lock:
+            with self._file_lock():
+                self._refresh()
+                start = len(self._row_users)
+                end = start + len(vectors)
+                self._ensure_capacity(end)
+                stored = np.memmap(self.vectors_file, dtype=np.float16, mode="r+", shape=(end, self.dim))
+                stored[start:end] = vectors
+                stored.flush()
+                if self._centroids is not None:
+                    lists = np.memmap(self.lists_file, dtype=np.int32, mode="r+", shape=(end,))
+                    lists[start:end] = np.argmax(vectors @ self._centroids.T, axis=1)
+                    lists.flush()
+                # The row log is written last: a row exists for readers once its line does
+                with open(self.rows_file, 'a') as f:
+                    f.write(records)
+                self._refresh()
+            needs_training = self._needs_training()
+        if needs_training:
+            self._start_training()
+
+    def _needs_training(self) -> bool:
+        live = int(self._current.sum())
+        trained = self.meta.get("trained_rows") or 0
+        return live >= settings.PROFILE_INDEX_IVF_THRESHOLD and live >= 4 * trained and not self._training
+
+    def _start_training(self):
+        self._training = True
+        threading.Thread(target=self.train, name="profile-index-train", daemon=True).start()
+
+    def train(self):
+        """Compact to the latest row per user, train IVF centroids on a sample and assign every row"""
+        try:
+            # k-means runs on a copied sample without any lock, so searches and adds carry on meanwhile
+            with self._lock:
+                self._refresh()
+                keep = np.flatnonzero(self._current)
+                if not len(keep):
+                    return
+                rng = np.random.default_rng(len(keep))
+                sample = keep if len(keep) <= KMEANS_SAMPLE else np.sort(rng.choice(keep, KMEANS_SAMPLE, replace=False))
+                sample = np.asarray(self._vectors[sample], dtype=np.float32)
+            num_lists = int(min(MAX_LISTS, max(16, math.sqrt(len(keep))), len(sample)))
+            centroids = spherical_kmeans(sample, num_lists)
+
+            with self._lock:
+                with self._file_lock():
+                    self._refresh()
+                    self._write_compacted(np.flatnonzero(self._current), centroids)
+                self._refresh()
+        except Exception as e:
+            print(f"Error training profile index: {e}")
+        finally:
+            self._training = False
+
+    def _write_compacted(self, keep: np.ndarray, centroids: np.ndarray):
+        """Rewrite the files with only the kept rows, grouped by nearest centroid, and swap them in
+
+        Rows of one IVF list end up contiguous on disk, so probing a list reads one run of pages.
+        """
+        assignment = np.empty(len(keep), dtype=np.int32)
+        for start in range(0, len(keep), 65536):
+            block = np.asarray(self._vectors[keep[start:start + 65536]], dtype=np.float32)
+            assignment[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        order = np.argsort(assignment, kind="stable")
+        keep, assignment = keep[order], assignment[order]
+
+        with open(self.rows_file, 'rb') as f:
+            lines = f.read().splitlines(keepends=True)
+        rows = len(keep)
+        capacity = max(1024, rows * 2)
+        temp_vectors, temp_lists, temp_rows = (path + ".tmp" for path in (self.vectors_file, self.lists_file, self.rows_file))
+        out_vectors = np.memmap(temp_vectors, dtype=np.float16, mode="w+", shape=(capacity, self.dim))
+        out_lists = np.memmap(temp_lists, dtype=np.int32, mode="w+", shape=(capacity,))
+        out_lists[:] = -1
+        out_lists[:rows] = assignment
+        for start in range(0, rows, 65536):
+            chunk = keep[start:start + 65536]
+            out_vectors[start:start + len(chunk)] = self._vectors[chunk]
+        out_vectors.flush()
+        out_lists.flush()
+        del out_vectors, out_lists
+        with open(temp_rows, 'wb') as f:
+            f.writelines(lines[row] for row in keep)
+
+        np.save(self.centroids_file + ".tmp.npy", centroids)
+        os.replace(self.centroids_file + ".tmp.npy", self.centroids_file)
+        for temp, path in ((temp_vectors, self.vectors_file), (temp_lists, self.lists_file), (temp_rows, self.rows_file)):
+            os.replace(temp, path)
+        self._write_meta({
+            "dim": self.dim, "generation": (self.meta.get("generation") or 0) + 1,
+            "trained_rows": rows, "lists": len(centroids)
+        })
+
+    def __len__(self) -> int:
+        self._refresh()
+        return len(self._latest)
+
+    def _candidates(self, vector: np.ndarray) -> np.ndarray:
+        """Rows worth scoring: all of them, or the rows of the nearest IVF lists plus the ungrouped tail"""
+        rows = len(self._row_users)
+        if self._list_offsets is None:
+            return np.arange(rows)
+        nprobe = min(settings.PROFILE_INDEX_NPROBE, len(self._centroids))
+        probes = np.argpartition(-(self._centroids @ vector), nprobe - 1)[:nprobe]
+        parts = [self._list_rows[self._list_offsets[probe]:self._list_offsets[probe + 1]] for probe in probes]
+        parts.append(np.arange(self._grouped_rows, rows))
+        return np.concatenate(parts)
+
+    def search(self, vector: np.ndarray, k: int = 10, exclude_user: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Most similar stored profiles to a vector, best first, one per user"""
+        with self._lock, self._file_lock(exclusive=False):
+            self._refresh()
+            if not self._row_users or self._vectors is None:
+                return []
+            candidates = self._candidates(vector)
+            candidates = candidates[self._current[candidates]]
+            if exclude_user in self._latest:
+                candidates = candidates[candidates != self._latest[exclude_user]]
+            if not len(candidates):
+                return []
+            scores = np.empty(len(candidates), dtype=np.float32)
+            # Contiguous runs when brute force, so read the memmap in blocks
+            for start in range(0, len(candidates), 65536):
+                chunk = candidates[start:start + 65536]
+                scores[start:start + len(chunk)] = np.asarray(self._vectors[chunk], dtype=np.float32) @ vector
+            k = min(k, len(candidates))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind="stable")]
+
+            results = []
+            with open(self.rows_file, 'rb') as f:
+                for position in top:
+                    f.seek(self._row_offsets[candidates[position]])
+                    record = json.loads(f.readline())
+                    record["similarity"] = round(float(scores[position]), 4)
+                    results.append(record)
+        return results
+
+    def similar_to_user(self, user_id: str, k: int = 10) -> List[Dict[str, Any]]:
+        """Profiles most like a stored user's latest profile"""
+        with self._lock:
+            self._refresh()
+            row = self._latest.get(user_id)
+            if row is None:
+                return []
+            vector = np.asarray(self._vectors[row], dtype=np.float32)
+        return self.search(vector, k, exclude_user=user_id)
+
+    def similar_to_profile(self, profile_data: Dict, k: int = 10, exclude_user: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Stored profiles most like a profile that may not be stored"""
+        return self.search(profile_vector(profile_data, self.dim), k, exclude_user)
+
+    def backfill(self, profiles: Dict[str, Dict]):
+        """Add stored profiles ({user_id: {"profile_data", ...}}) that have no row yet"""
+        self._refresh()
+        missing = [(user_id, record["profile_data"]) for user_id, record in profiles.items()
+                   if user_id not in self._latest and record.get("profile_data")]
+        for start in range(0, len(missing), 10000):
+            self.add_many(missing[start:start + 10000])
+
+    def on_profile_stored(self, memory_store_path: str, user_id: str, record: Dict):
+        """store_profile listener; ignores other memory stores in the same process"""
+        if os.path.abspath(memory_store_path) == self.memory_store_path:
+            try:
+                self.add(user_id, record.get("profile_data") or {})
+            except Exception as e:
+                print(f"Error indexing profile of {user_id}: {e}")
+
+
+def peer_benchmark(profile_data: Dict, peer_profiles: List[Dict]) -> Dict[str, Any]:
+    """Local score of a profile next to the median of its peers, overall and per section"""
+    if not peer_profiles:
+        return {}
+    own = score_profile(profile_data)
+    peers = [score_profile(peer) for peer in peer_profiles]
+    overall = np.array([peer["overall"] for peer in peers])
+    return {
+        "peers": len(peers),
+        "overall": own["overall"],
+        "peer_median": float(np.median(overall)),
+        "percentile": round(float((overall < own["overall"]).mean() * 100), 1),
+        "sections": {
+            section: {"score": score, "peer_median": float(np.median([peer["section_scores"][section] for peer in peers]))}
+            for section, score in own["section_scores"].items()
+        }
+    }
+
+
+_indexes: Dict[str, ProfileIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_profile_index(memory_store_path: Optional[str] = None) -> ProfileIndex:
+    """Return the process-wide profile index of a memory store, subscribed to its store_profile calls
+
+    Stored profiles missing from the index (e.g. saved before it existed) are added on first use.
+    """
+    path = os.path.abspath(memory_store_path or settings.MEMORY_STORE_PATH)
+    with _indexes_lock:
+        if path not in _indexes:
+            index = ProfileIndex(path)
+            index.backfill(SimpleMemoryManager(path).all_profiles())
+            add_profile_listener(index.on_profile_stored)
+            _indexes[path] = index
+        return _indexes[path]
@@ -0,0 +1,93 @@
+import hashlib
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from ..config.settings import settings
+from ..utils import telemetry
+from .gemini_transport import GeminiTransport, estimate_tokens
+
+
+class PromptCache:
+    """Handles of static prompt prefixes registered as Gemini cached content
+
+    Each agent mode sends the same instruction prefix on every request. A prefix
+    is uploaded once per model and referenced by name afterwards, so requests
+    only carry their dynamic part. Handles are renewed shortly before their TTL
+    runs out; the transport is told to release a handle once it is replaced or
+    invalidated, and no other. Prefixes below min_tokens (Gemini rejects small cached contents)
+    get no handle and are sent inline; a failed registration is not retried
+    for a while, so callers fall back to inline prompts instead of erroring.
+    """
+
+    def __init__(self, ttl_seconds: int = 3600, min_tokens: int = 32768, retry_after: float = 300.0):
+        self.ttl_seconds = ttl_seconds
+        self.min_tokens = min_tokens
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, str], Dict] = {}
+        self._failed_until = 0.0
+
+    def handle(self, transport: GeminiTransport, model_name: str, prefix: str) -> Optional[str]:
+        """Cached content name for a prefix, registering it on first use; None to send the prefix inline"""
+        if estimate_tokens(prefix) < self.min_tokens:
+            return None
+
+        key = (model_name, hashlib.sha256(prefix.encode("utf-8")).hexdigest())
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            # Renew a little early, so a request never references content that expires mid-flight
+            if entry and entry["expires_at"] - now > min(60, self.ttl_seconds / 10):
+                entry["hits"] += 1
+                telemetry.CACHE_REQUESTS.inc(cache="prompt_prefix", result="hit")
+                return entry["name"]
+            if now < self._failed_until:
+                return None
+
+        telemetry.CACHE_REQUESTS.inc(cache="prompt_prefix", result="miss")
+        try:
+            name = transport.cache_content(model_name, prefix, self.ttl_seconds)
+        except Exception as e:
+            print(f"Prompt prefix caching unavailable, sending prefixes inline: {e}")
+            with self._lock:
+                self._failed_until = now + self.retry_after
+            return None
+
+        with self._lock:
+            replaced = self._entries.get(key)
+            self._entries[key] = {
+                "name": name, "expires_at": now + self.ttl_seconds, "tokens": estimate_tokens(prefix), "hits": 0, "transport": transport
+            }
+        if replaced and replaced["name"] != name:
+            replaced["transport"].release_content(replaced["name"])
+        return name
+
+    def invalidate(self, name: str):
+        """Forget a handle the API no longer knows, so the next request registers its prefix again"""
+        with self._lock:
+            removed = [self._entries.pop(key) for key, entry in list(self._entries.items()) if entry["name"] == name]
+        for entry in removed:
+            entry["transport"].release_content(name)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries = list(self._entries.values())
+        return {
+            "prefixes": len(entries),
+            "cached_tokens": sum(entry["tokens"] for entry in entries),
+            "hits": sum(entry["hits"] for entry in entries)
+        }
+
+
+_prompt_cache_instance: Optional[PromptCache] = None
+_prompt_cache_lock = threading.Lock()
+
+
+def get_prompt_cache() -> PromptCache:
+    """Return the process-wide prompt prefix cache"""
+    global _prompt_cache_instance
+    with _prompt_cache_lock:
+        if _prompt_cache_instance is None:
+            _prompt_cache_instance = PromptCache(settings.PROMPT_CACHE_TTL_SECONDS, settings.PROMPT_CACHE_MIN_TOKENS)
+        return _prompt_cache_instance
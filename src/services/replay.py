@@ -0,0 +1,132 @@
+"""
+Shared pieces of the record/replay transport layer: transport errors,
+synthetic latency distributions, failure injection and cassette files
+"""
+
+import hashlib
+import json
+import os
+import random
+import threading
+from typing import Dict, Optional
+
+
+class TransportError(Exception):
+    """Base class for errors raised by a service transport"""
+
+
+class RateLimitError(TransportError):
+    """The service answered with HTTP 429 / quota exhausted"""
+
+
+class TransportTimeout(TransportError):
+    """The request did not complete within the service deadline"""
+
+
+class CachedContentNotFound(TransportError):
+    """A request referenced cached content that expired or was deleted"""
+
+
+class LatencyModel:
+    """Synthetic latency distribution, parsed from a spec string
+
+    Supported specs (all values in seconds):
+        fixed:0.5             always 0.5
+        uniform:0.2,1.5       uniform between 0.2 and 1.5
+        normal:1.0,0.3        normal with mean 1.0 and std 0.3, clipped at 0
+        lognormal:0.0,0.5     exp(N(mu, sigma))
+        recorded              the latency stored in the cassette, 0 if none
+        recorded*2            recorded latency scaled by a factor
+    """
+
+    def __init__(self, spec: str = "fixed:0", seed: Optional[int] = None):
+        self.spec = (spec or "fixed:0").strip()
+        self.random = random.Random(seed)
+        self.scale = 1.0
+
+        name, _, params = self.spec.partition(":")
+        if name.startswith("recorded"):
+            self.kind = "recorded"
+            if "*" in name:
+                self.scale = float(name.split("*", 1)[1])
+            self.params = []
+        else:
+            self.kind = name
+            self.params = [float(value) for value in params.split(",") if value.strip()]
+
+        if self.kind not in ("fixed", "uniform", "normal", "lognormal", "recorded"):
+            raise ValueError(f"Unknown latency distribution: {self.spec}")
+
+    def sample(self, recorded: Optional[float] = None) -> float:
+        """Draw one latency in seconds"""
+        if self.kind == "recorded":
+            return max((recorded or 0.0) * self.scale, 0.0)
+        if self.kind == "fixed":
+            return self.params[0] if self.params else 0.0
+        if self.kind == "uniform":
+            return self.random.uniform(self.params[0], self.params[1])
+        if self.kind == "normal":
+            return max(self.random.gauss(self.params[0], self.params[1]), 0.0)
+        return self.random.lognormvariate(self.params[0], self.params[1])
+
+
+class FailureInjector:
+    """Randomly raises rate-limit and timeout errors at configured rates"""
+
+    def __init__(self, rate_limit_rate: float = 0.0, timeout_rate: float = 0.0, seed: Optional[int] = None):
+        self.rate_limit_rate = rate_limit_rate
+        self.timeout_rate = timeout_rate
+        self.random = random.Random(seed)
+
+    def maybe_fail(self, service: str):
+        """Raise an injected failure, or return normally"""
+        roll = self.random.random()
+        if roll < self.rate_limit_rate:
+            raise RateLimitError(f"429 Resource exhausted (injected by {service} replay)")
+        if roll < self.rate_limit_rate + self.timeout_rate:
+            raise TransportTimeout(f"Deadline exceeded (injected by {service} replay)")
+
+
+def request_key(request: Dict) -> str:
+    """Stable hash identifying a request in a cassette"""
+    canonical = json.dumps(request, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """Append-only JSONL file of recorded request/response pairs"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.entries: Dict[str, Dict] = {}
+
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    self.entries[entry["key"]] = entry
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Look up a recorded entry"""
+        return self.entries.get(key)
+
+    def record(self, key: str, request: Dict, response: Dict, latency: float):
+        """Persist a request/response pair"""
+        entry = {"key": key, "request": request, "response": response, "latency": latency}
+        with self._lock:
+            self.entries[key] = entry
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def __len__(self) -> int:
+        return len(self.entries)
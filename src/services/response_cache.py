@@ -0,0 +1,125 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Dict, Optional
+
+from ..config.settings import settings
+from ..utils import telemetry
+from .concurrency import PriorityTicket
+
+
+def response_key(agent_name: str, task_data: Dict[str, Any], context: Optional[str]) -> str:
+    """Hash of everything an agent's answer depends on, so a cached answer is only served for an identical prompt"""
+    payload = {
+        "agent": agent_name,
+        "query": task_data.get("query", ""),
+        "mode": task_data.get("mode"),
+        "profile_data": task_data.get("profile_data"),
+        "context": context or ""
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """Precomputed agent results per user, consumed by the first matching request
+
+    An entry is either ready (a result dict) or pending (a future being computed
+    in the background). Asking for a pending entry promotes its work to
+    interactive priority and waits for it instead of making a second call.
+    Entries are served once: storing the interaction changes the agent's
+    context, so the same key would not come up again.
+    """
+
+    def __init__(self, ttl_seconds: int = 900, max_users: int = 500):
+        self.ttl_seconds = ttl_seconds
+        self.max_users = max_users
+        self._lock = threading.Lock()
+        # user_id -> key -> {"result"|"future", "ticket", "created"}, least recently used user first
+        self._entries: "OrderedDict[str, Dict[str, Dict]]" = OrderedDict()
+
+    def has_entries(self, user_id: str) -> bool:
+        with self._lock:
+            return bool(self._entries.get(user_id))
+
+    def put_pending(self, user_id: str, key: str, future: Future, ticket: PriorityTicket):
+        """Register work in progress so a request for it can wait instead of recomputing"""
+        self._set(user_id, key, {"future": future, "ticket": ticket, "created": time.time()})
+
+    def complete(self, user_id: str, key: str, future: Future, result: Optional[Dict[str, Any]]):
+        """Turn a pending entry into a ready one, unless it was taken, replaced or invalidated meanwhile"""
+        with self._lock:
+            entries = self._entries.get(user_id, {})
+            entry = entries.get(key)
+            if not entry or entry.get("future") is not future:
+                return
+            if result is None:
+                del entries[key]
+            else:
+                entries[key] = {"result": result, "created": entry["created"]}
+
+    def _set(self, user_id: str, key: str, entry: Dict):
+        with self._lock:
+            self._entries.setdefault(user_id, {})[key] = entry
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                _, evicted = self._entries.popitem(last=False)
+                self._cancel_pending(evicted)
+
+    def invalidate(self, user_id: str):
+        """Drop every entry of a user, cancelling work that has not started yet"""
+        with self._lock:
+            self._cancel_pending(self._entries.pop(user_id, {}))
+
+    @staticmethod
+    def _cancel_pending(entries: Dict[str, Dict]):
+        for entry in entries.values():
+            if "ticket" in entry:
+                entry["ticket"].cancel()
+
+    async def fetch(self, user_id: str, key: str) -> Optional[Dict[str, Any]]:
+        """Take the result for a key, waiting for it if it is still being computed"""
+        with self._lock:
+            entries = self._entries.get(user_id, {})
+            entry = entries.pop(key, None)
+            if entry and time.time() - entry["created"] > self.ttl_seconds:
+                self._cancel_pending({key: entry})
+                entry = None
+
+        if entry is None:
+            telemetry.CACHE_REQUESTS.inc(cache="response", result="miss")
+            return None
+        if "result" in entry:
+            telemetry.CACHE_REQUESTS.inc(cache="response", result="hit")
+            return entry["result"]
+
+        entry["ticket"].promote()
+        result = await asyncio.wrap_future(entry["future"])
+        telemetry.CACHE_REQUESTS.inc(cache="response", result="joined" if result is not None else "miss")
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries = [entry for user_entries in self._entries.values() for entry in user_entries.values()]
+        return {
+            "users": len(self._entries),
+            "ready": sum(1 for entry in entries if "result" in entry),
+            "pending": sum(1 for entry in entries if "future" in entry)
+        }
+
+
+_cache_instance: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Return the process-wide response cache"""
+    global _cache_instance
+    with _cache_lock:
+        if _cache_instance is None:
+            _cache_instance = ResponseCache(settings.PREFETCH_TTL_SECONDS, settings.RESPONSE_CACHE_MAX_USERS)
+            telemetry.QUEUE_DEPTH.set_function(lambda: _cache_instance.stats()["pending"], queue="prefetch")
+        return _cache_instance
@@ -0,0 +1,349 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+from ..config.settings import settings
+from ..utils import telemetry
+from .linkedin_scraper import ScrapeError
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+TERMINAL_STATUSES = (SUCCEEDED, FAILED)
+
+# A running job whose worker has not reported progress for this long is
+# assumed to belong to a dead process and is put back on the queue
+STALE_JOB_SECONDS = 120
+
+
+class ScrapeJobQueue:
+    """SQLite-backed queue of LinkedIn scrape jobs served by background worker threads
+
+    The database is the source of truth, so job status survives browser reloads
+    and app restarts, and the cap on concurrent Apify actor runs holds across
+    every process sharing the same database file.
+    """
+
+    def __init__(
+        self,
+        scraper,
+        db_path: str,
+        num_workers: int = 2,
+        max_concurrent_runs: int = 1,
+        idle_interval: float = 1.0
+    ):
+        self.scraper = scraper
+        self.db_path = db_path
+        self.num_workers = max(1, num_workers)
+        self.max_concurrent_runs = max(1, max_concurrent_runs)
+        self.idle_interval = idle_interval
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        self._workers: List[threading.Thread] = []
+        self._stop_event = threading.Event()
+        self._start_lock = threading.Lock()
+        # Notified whenever this process records an event, for in-process subscribers
+        self._event_condition = threading.Condition()
+
+        self._init_db()
+        self._requeue_stale_jobs()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection in autocommit mode so transactions are explicit"""
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def _db(self) -> Iterator[sqlite3.Connection]:
+        """Connection that is closed when the block exits"""
+        conn = self._connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self):
+        """Create the job and event tables if they do not exist"""
+        with self._db() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS scrape_jobs (
+                    job_id TEXT PRIMARY KEY,
+                    user_id TEXT NOT NULL,
+                    profile_url TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    apify_status TEXT,
+                    progress REAL NOT NULL DEFAULT 0,
+                    message TEXT,
+                    result TEXT,
+                    error TEXT,
+                    created_at TEXT NOT NULL,
+                    started_at TEXT,
+                    finished_at TEXT,
+                    heartbeat REAL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS scrape_job_events (
+                    event_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    job_id TEXT NOT NULL,
+                    timestamp TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    apify_status TEXT,
+                    progress REAL NOT NULL,
+                    message TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_scrape_jobs_status ON scrape_jobs (status, created_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_scrape_job_events_job ON scrape_job_events (job_id, event_id)")
+
+    def _requeue_stale_jobs(self):
+        """Return jobs left running by a crashed process to the queue"""
+        cutoff = time.time() - STALE_JOB_SECONDS
+        with self._db() as conn:
+            stale = conn.execute(
+                "SELECT job_id FROM scrape_jobs WHERE status = ? AND (heartbeat IS NULL OR heartbeat < ?)",
+                (RUNNING, cutoff)
+            ).fetchall()
+            for row in stale:
+                conn.execute(
+                    "UPDATE scrape_jobs SET status = ?, message = ?, heartbeat = NULL WHERE job_id = ?",
+                    (QUEUED, "Requeued after worker interruption", row["job_id"])
+                )
+                self._insert_event(conn, row["job_id"], QUEUED, 0.0, "Requeued after worker interruption")
+
+    def _insert_event(
+        self,
+        conn: sqlite3.Connection,
+        job_id: str,
+        status: str,
+        progress: float,
+        message: str,
+        apify_status: Optional[str] = None
+    ):
+        """Append a progress event for a job"""
+        conn.execute(
+            """INSERT INTO scrape_job_events (job_id, timestamp, status, apify_status, progress, message)
+               VALUES (?, ?, ?, ?, ?, ?)""",
+            (job_id, datetime.now().isoformat(), status, apify_status, progress, message)
+        )
+
+    def _notify(self):
+        """Wake up in-process subscribers waiting for new events"""
+        with self._event_condition:
+            self._event_condition.notify_all()
+
+    def submit(self, user_id: str, profile_url: str) -> str:
+        """Queue a scrape job and return its ID"""
+        job_id = str(uuid.uuid4())
+        with self._db() as conn:
+            conn.execute(
+                """INSERT INTO scrape_jobs (job_id, user_id, profile_url, status, progress, message, created_at)
+                   VALUES (?, ?, ?, ?, 0, ?, ?)""",
+                (job_id, user_id, profile_url, QUEUED, "Waiting for a free scraper slot", datetime.now().isoformat())
+            )
+            self._insert_event(conn, job_id, QUEUED, 0.0, "Waiting for a free scraper slot")
+        self._notify()
+        self.start()
+        return job_id
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """Get the current state of a job, with the scraped profile once it succeeded"""
+        with self._db() as conn:
+            row = conn.execute("SELECT * FROM scrape_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if not row:
+            return None
+
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        job.pop("heartbeat", None)
+        return job
+
+    def get_events(self, job_id: str, after_event_id: int = 0) -> List[Dict]:
+        """Get progress events for a job newer than after_event_id"""
+        with self._db() as conn:
+            rows = conn.execute(
+                "SELECT * FROM scrape_job_events WHERE job_id = ? AND event_id > ? ORDER BY event_id",
+                (job_id, after_event_id)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def list_jobs(self, user_id: Optional[str] = None, limit: int = 20) -> List[Dict]:
+        """List the most recent jobs, optionally for a single user"""
+        query = "SELECT job_id, user_id, profile_url, status, apify_status, progress, message, created_at, finished_at FROM scrape_jobs"
+        params: tuple = ()
+        if user_id:
+            query += " WHERE user_id = ?"
+            params = (user_id,)
+        query += " ORDER BY created_at DESC LIMIT ?"
+
+        with self._db() as conn:
+            rows = conn.execute(query, params + (limit,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def queue_depth(self) -> int:
+        """Number of jobs waiting for a worker"""
+        with self._db() as conn:
+            return conn.execute("SELECT COUNT(*) FROM scrape_jobs WHERE status = ?", (QUEUED,)).fetchone()[0]
+
+    def watch(self, job_id: str, timeout: float = 600.0) -> Iterator[Dict]:
+        """Yield progress events for a job as they are recorded, until it finishes or timeout expires"""
+        last_event_id = 0
+        deadline = time.time() + timeout
+
+        while time.time() < deadline:
+            events = self.get_events(job_id, last_event_id)
+            for event in events:
+                last_event_id = event["event_id"]
+                yield event
+
+            job = self.get_job(job_id)
+            if not job or job["status"] in TERMINAL_STATUSES:
+                return
+
+            # Events from other processes are only seen by polling, so never wait indefinitely
+            with self._event_condition:
+                self._event_condition.wait(timeout=min(self.idle_interval, max(deadline - time.time(), 0)))
+
+    def start(self):
+        """Start the background workers if they are not already running"""
+        with self._start_lock:
+            self._workers = [worker for worker in self._workers if worker.is_alive()]
+            self._stop_event.clear()
+            while len(self._workers) < self.num_workers:
+                worker = threading.Thread(
+                    target=self._worker_loop,
+                    name=f"scrape-worker-{len(self._workers)}",
+                    daemon=True
+                )
+                worker.start()
+                self._workers.append(worker)
+
+    def stop(self, timeout: float = 5.0):
+        """Ask the workers to exit after their current job"""
+        self._stop_event.set()
+        self._notify()
+        for worker in self._workers:
+            worker.join(timeout=timeout)
+
+    def _claim_next_job(self) -> Optional[Dict]:
+        """Atomically move the oldest queued job to running, if a run slot is free"""
+        cutoff = time.time() - STALE_JOB_SECONDS
+        conn = None
+        try:
+            conn = self._connect()
+            # BEGIN IMMEDIATE takes the write lock so that two workers, even in
+            # different processes, cannot both see a free slot
+            conn.execute("BEGIN IMMEDIATE")
+            running = conn.execute(
+                "SELECT COUNT(*) FROM scrape_jobs WHERE status = ? AND heartbeat >= ?",
+                (RUNNING, cutoff)
+            ).fetchone()[0]
+            if running >= self.max_concurrent_runs:
+                conn.execute("ROLLBACK")
+                return None
+
+            row = conn.execute(
+                "SELECT * FROM scrape_jobs WHERE status = ? ORDER BY created_at LIMIT 1",
+                (QUEUED,)
+            ).fetchone()
+            if not row:
+                conn.execute("ROLLBACK")
+                return None
+
+            conn.execute(
+                "UPDATE scrape_jobs SET status = ?, message = ?, started_at = ?, heartbeat = ? WHERE job_id = ?",
+                (RUNNING, "Starting scraper", datetime.now().isoformat(), time.time(), row["job_id"])
+            )
+            self._insert_event(conn, row["job_id"], RUNNING, 0.0, "Starting scraper")
+            conn.execute("COMMIT")
+            return dict(row)
+        except Exception as e:
+            print(f"Error claiming scrape job: {e}")
+            try:
+                conn.execute("ROLLBACK")
+            except Exception:
+                pass
+            return None
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def _record_progress(self, job_id: str, apify_status: str, progress: float, message: str):
+        """Persist a progress event reported by the scraper"""
+        with self._db() as conn:
+            conn.execute(
+                "UPDATE scrape_jobs SET apify_status = ?, progress = ?, message = ?, heartbeat = ? WHERE job_id = ?",
+                (apify_status, progress, message, time.time(), job_id)
+            )
+            self._insert_event(conn, job_id, RUNNING, progress, message, apify_status)
+        self._notify()
+
+    def _finish_job(self, job_id: str, status: str, message: str, result: Optional[Dict] = None, error: Optional[str] = None):
+        """Mark a job as finished and store its result"""
+        with self._db() as conn:
+            conn.execute(
+                """UPDATE scrape_jobs SET status = ?, progress = 1.0, message = ?, result = ?, error = ?,
+                   finished_at = ?, heartbeat = NULL WHERE job_id = ?""",
+                (status, message, json.dumps(result) if result is not None else None, error, datetime.now().isoformat(), job_id)
+            )
+            self._insert_event(conn, job_id, status, 1.0, message)
+        self._notify()
+
+    def _worker_loop(self):
+        """Claim and run jobs until stopped"""
+        while not self._stop_event.is_set():
+            job = self._claim_next_job()
+            if not job:
+                self._stop_event.wait(self.idle_interval)
+                continue
+            self._run_job(job)
+
+    def _run_job(self, job: Dict):
+        """Scrape one profile, recording progress events as the Apify run advances"""
+        job_id = job["job_id"]
+
+        def on_progress(apify_status: str, progress: float, message: str):
+            self._record_progress(job_id, apify_status, progress, message)
+
+        try:
+            with telemetry.request_context(job_id), telemetry.span("scrape", profile_url=job["profile_url"]):
+                profile = asyncio.run(self.scraper.scrape_profile(job["profile_url"], on_progress=on_progress))
+            self._finish_job(job_id, SUCCEEDED, f"Scraped profile: {profile.full_name}", result=profile.dict())
+        except ScrapeError as e:
+            self._finish_job(job_id, FAILED, str(e), error=str(e))
+        except Exception as e:
+            print(f"Error running scrape job {job_id}: {e}")
+            self._finish_job(job_id, FAILED, "Scraping failed", error=str(e))
+
+
+_queue_instance: Optional[ScrapeJobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_scrape_queue(scraper) -> ScrapeJobQueue:
+    """Return the process-wide scrape queue, creating and starting it on first use"""
+    global _queue_instance
+    with _queue_lock:
+        if _queue_instance is None:
+            _queue_instance = ScrapeJobQueue(
+                scraper,
+                settings.SCRAPE_QUEUE_PATH,
+                num_workers=settings.SCRAPE_WORKERS,
+                max_concurrent_runs=settings.SCRAPE_MAX_CONCURRENT_RUNS
+            )
+            _queue_instance.start()
+            telemetry.QUEUE_DEPTH.set_function(_queue_instance.queue_depth, queue="scrape")
+        return _queue_instance
@@ -0,0 +1,200 @@
+import json
+import os
+import threading
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+from ..config.settings import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: saves are still atomic, but not serialized across processes
+    fcntl = None
+
+USAGE_FIELDS = ("calls", "input_tokens", "output_tokens", "latency_seconds", "cost")
+
+
+class TokenBudgetExceeded(Exception):
+    """A call would take a user or agent over its daily token budget"""
+
+    def __init__(self, scope: str, name: str, used: int, budget: int):
+        self.scope = scope
+        self.name = name
+        self.used = used
+        self.budget = budget
+        super().__init__(f"Daily token budget for {scope} '{name}' reached ({used:,}/{budget:,} tokens)")
+
+
+def parse_agent_budgets(spec: str) -> Dict[str, int]:
+    """Parse "CareerCounselor:200000,JobMatcher:100000" into a budget per agent"""
+    budgets = {}
+    for part in (spec or "").split(","):
+        name, _, value = part.partition(":")
+        if name.strip() and value.strip():
+            budgets[name.strip()] = int(value)
+    return budgets
+
+
+def _empty_usage() -> Dict:
+    return {field: 0 for field in USAGE_FIELDS}
+
+
+def _add_usage(total: Dict, usage: Dict):
+    for field in USAGE_FIELDS:
+        total[field] = total.get(field, 0) + usage.get(field, 0)
+
+
+class TokenUsageTracker:
+    """Per-user and per-agent LLM token accounting, persisted in the memory store
+
+    Usage is kept per day as daily[date][user_id][agent] so budgets can be
+    enforced on today's totals and older days pruned after the retention period.
+    Each call is added to the file's current totals under a file lock, so API
+    workers and batch runs sharing a memory store all count against one budget.
+    """
+
+    def __init__(self, memory_store_path: str):
+        self.memory_store_path = memory_store_path
+        self.usage_file = os.path.join(memory_store_path, "token_usage.json")
+        self.lock_file = os.path.join(memory_store_path, ".token_usage.lock")
+        self._lock = threading.Lock()
+        self.daily: Dict[str, Dict[str, Dict[str, Dict]]] = {}
+        self._mtime: Optional[int] = None
+
+        os.makedirs(memory_store_path, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        """Reload the totals if another process saved them since this one last read or wrote the file"""
+        try:
+            mtime = os.stat(self.usage_file).st_mtime_ns
+        except OSError:
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            with open(self.usage_file, 'r') as f:
+                self.daily = json.load(f).get("daily", {})
+            self._mtime = mtime
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"Error loading {self.usage_file}: {e}")
+
+    def _save(self):
+        try:
+            # Swap in a complete file, so other processes never read a partial one
+            temp_path = f"{self.usage_file}.{os.getpid()}.tmp"
+            with open(temp_path, 'w') as f:
+                json.dump({"daily": self.daily}, f, indent=2)
+            os.replace(temp_path, self.usage_file)
+            self._mtime = os.stat(self.usage_file).st_mtime_ns
+        except Exception as e:
+            print(f"Error saving {self.usage_file}: {e}")
+
+    def _prune(self, today: date):
+        cutoff = (today - timedelta(days=settings.TOKEN_USAGE_RETENTION_DAYS)).isoformat()
+        for day in [day for day in self.daily if day < cutoff]:
+            del self.daily[day]
+
+    def estimate_cost(self, input_tokens: int, output_tokens: int) -> float:
+        """Cost in USD at the configured per-million-token prices"""
+        return (input_tokens * settings.LLM_INPUT_COST_PER_MTOK + output_tokens * settings.LLM_OUTPUT_COST_PER_MTOK) / 1_000_000
+
+    def record(self, user_id: Optional[str], agent: Optional[str], input_tokens: int, output_tokens: int, latency: float = 0.0) -> Dict:
+        """Add one LLM call to today's totals and persist them"""
+        usage = {
+            "calls": 1,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "latency_seconds": latency,
+            "cost": self.estimate_cost(input_tokens, output_tokens)
+        }
+        today = date.today()
+        with self._lock, open(self.lock_file, 'a') as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            self._load()
+            per_user = self.daily.setdefault(today.isoformat(), {}).setdefault(user_id or "unknown", {})
+            _add_usage(per_user.setdefault(agent or "unknown", _empty_usage()), usage)
+            self._prune(today)
+            self._save()
+        return usage
+
+    def _totals(self, days: Optional[int], group_by: str, user_id: Optional[str] = None, agent: Optional[str] = None) -> Dict[str, Dict]:
+        """Sum usage over the last `days` days (all retained days if None), grouped by user or agent"""
+        cutoff = (date.today() - timedelta(days=days - 1)).isoformat() if days else ""
+        totals: Dict[str, Dict] = {}
+        with self._lock:
+            self._load()
+            for day, users in self.daily.items():
+                if day < cutoff:
+                    continue
+                for usage_user, agents in users.items():
+                    if user_id is not None and usage_user != user_id:
+                        continue
+                    for usage_agent, usage in agents.items():
+                        if agent is not None and usage_agent != agent:
+                            continue
+                        key = usage_user if group_by == "user" else usage_agent
+                        _add_usage(totals.setdefault(key, _empty_usage()), usage)
+        return totals
+
+    def usage_by_agent(self, days: Optional[int] = None, user_id: Optional[str] = None) -> Dict[str, Dict]:
+        """Totals per agent, optionally for a single user"""
+        return self._totals(days, "agent", user_id=user_id)
+
+    def usage_by_user(self, days: Optional[int] = None, agent: Optional[str] = None) -> Dict[str, Dict]:
+        """Totals per user, optionally for a single agent"""
+        return self._totals(days, "user", agent=agent)
+
+    def tokens_today(self, user_id: Optional[str] = None, agent: Optional[str] = None) -> int:
+        """Input plus output tokens used today by a user, an agent, or both"""
+        totals = self._totals(1, "agent", user_id=user_id, agent=agent)
+        return sum(usage["input_tokens"] + usage["output_tokens"] for usage in totals.values())
+
+    def budget_status(self, user_id: Optional[str], agent: Optional[str]) -> List[Dict]:
+        """Today's usage against each budget that applies to this user and agent"""
+        statuses = []
+        if user_id and settings.USER_DAILY_TOKEN_BUDGET > 0:
+            statuses.append({
+                "scope": "user",
+                "name": user_id,
+                "used": self.tokens_today(user_id=user_id),
+                "budget": settings.USER_DAILY_TOKEN_BUDGET
+            })
+        agent_budget = parse_agent_budgets(settings.AGENT_DAILY_TOKEN_BUDGETS).get(agent or "")
+        if agent_budget:
+            statuses.append({
+                "scope": "agent",
+                "name": agent,
+                "used": self.tokens_today(agent=agent),
+                "budget": agent_budget
+            })
+        return statuses
+
+    def check_budget(self, user_id: Optional[str], agent: Optional[str], estimated_tokens: int = 0):
+        """Raise TokenBudgetExceeded if a call of about estimated_tokens would go over a budget"""
+        for status in self.budget_status(user_id, agent):
+            if status["used"] + estimated_tokens > status["budget"]:
+                raise TokenBudgetExceeded(status["scope"], status["name"], status["used"], status["budget"])
+
+    def summary(self, days: Optional[int] = None) -> Dict:
+        """Usage per agent and per user, with the agent that dominates spend"""
+        by_agent = self.usage_by_agent(days)
+        return {
+            "by_agent": by_agent,
+            "by_user": self.usage_by_user(days),
+            "top_agent": max(by_agent, key=lambda name: by_agent[name]["cost"]) if by_agent else None
+        }
+
+
+_trackers: Dict[str, TokenUsageTracker] = {}
+_trackers_lock = threading.Lock()
+
+
+def get_token_usage_tracker(memory_store_path: Optional[str] = None) -> TokenUsageTracker:
+    """Return the process-wide tracker for a memory store, so all sessions share one set of totals"""
+    path = os.path.abspath(memory_store_path or settings.MEMORY_STORE_PATH)
+    with _trackers_lock:
+        if path not in _trackers:
+            _trackers[path] = TokenUsageTracker(path)
+        return _trackers[path]
@@ -2,6 +2,7 @@ import streamlit as st
 import asyncio
 import uuid
 import time
+import json
 from typing import Dict, Any, Optional
 import sys
 import os
@@ -14,9 +15,21 @@ from src.agents.job_matcher import JobMatcherAgent
 from src.agents.content_generator import ContentGeneratorAgent
 from src.agents.career_counselor import CareerCounselorAgent
 from src.agents.memory_manager import MemoryManagerAgent
-from src.services.linkedin_scraper import LinkedInScraperService
-from src.services.gemini_client import GeminiClient
+from src.agents.orchestrator import FullReportOrchestrator, QUICK_ACTION_QUERIES
+from src.agents.prefetch import get_prefetcher
+from src.services.linkedin_scraper import LinkedInScraperService, LinkedInProfile
+from src.services.scrape_queue import get_scrape_queue, SUCCEEDED, FAILED
+from src.services.gemini_client import GeminiClient, stream_to
+from src.services.token_usage import get_token_usage_tracker, parse_agent_budgets
+from src.services.profile_features import get_profile_feature_table
+from src.services.profile_index import get_profile_index, peer_benchmark
 from src.config.settings import settings
+from src.utils.profile_diff import describe_section, fingerprint
+from src.utils.profile_scoring import score_profile, format_score_summary
+from src.utils.intent_router import classify_intent
+from src.utils.response_parser import ResponseParser
+from src.utils import telemetry
+from src.utils.profiling import list_reports, profile_request
 
 class LinkedInEnhancerApp:
     def __init__(self):
@@ -30,9 +43,21 @@ class LinkedInEnhancerApp:
             # Validate settings first
             self.settings.validate_settings()
             
-            self.gemini_client = GeminiClient(self.settings.GEMINI_API_KEY)
+            self.usage_tracker = get_token_usage_tracker(self.settings.MEMORY_STORE_PATH)
+            self.gemini_client = GeminiClient(self.settings.GEMINI_API_KEY, usage_tracker=self.usage_tracker)
             self.linkedin_scraper = LinkedInScraperService(self.settings.APIFY_API_TOKEN)
-            self.memory_manager = MemoryManagerAgent("./data/memory_store")
+            self.memory_manager = MemoryManagerAgent(self.settings.MEMORY_STORE_PATH)
+            self.scrape_queue = get_scrape_queue(self.linkedin_scraper)
+            self.prefetcher = get_prefetcher()
+            self.profile_features = get_profile_feature_table(self.settings.MEMORY_STORE_PATH)
+            self.profile_index = get_profile_index(self.settings.MEMORY_STORE_PATH)
+            telemetry.register_json_route(
+                "/usage", lambda query: self.usage_tracker.summary(int(query["days"]) if query.get("days") else None)
+            )
+            telemetry.register_json_route(
+                "/profile-metrics", lambda query: self.profile_features.summary(int(query.get("top", 20)))
+            )
+            telemetry.start_metrics_server(self.settings.METRICS_PORT, self.settings.METRICS_HOST)
         except Exception as e:
             st.error(f"Failed to initialize services: {e}")
             raise
@@ -56,6 +81,10 @@ class LinkedInEnhancerApp:
                 self.gemini_client, 
                 self.memory_manager
             )
+            self.full_report = FullReportOrchestrator(
+                [self.profile_analyzer, self.job_matcher, self.content_generator, self.career_counselor],
+                self.memory_manager
+            )
         except Exception as e:
             st.error(f"Failed to initialize agents: {e}")
             raise
@@ -96,6 +125,20 @@ class LinkedInEnhancerApp:
             st.session_state.processing = False
         if "pending_query" not in st.session_state:
             st.session_state.pending_query = None
+        if "pending_full_report" not in st.session_state:
+            st.session_state.pending_full_report = False
+        if "profiling_enabled" not in st.session_state:
+            st.session_state.profiling_enabled = self.settings.PROFILING_ENABLED
+        if "scrape_job_id" not in st.session_state:
+            st.session_state.scrape_job_id = None
+            st.session_state.completed_scrape_job_id = None
+            
+            # Resume a scrape that was submitted before the browser tab reloaded
+            job_id = st.query_params.get("scrape_job")
+            job = self.scrape_queue.get_job(job_id) if job_id else None
+            if job:
+                st.session_state.scrape_job_id = job_id
+                st.session_state.user_id = job["user_id"]
             
     def render_sidebar(self):
         """Render sidebar with profile input"""
@@ -108,11 +151,18 @@ class LinkedInEnhancerApp:
                 profile = st.session_state.profile_data
                 st.write(f"**Name:** {profile.get('full_name', 'N/A')}")
                 st.write(f"**Headline:** {profile.get('headline', 'N/A')}")
+                local_score = score_profile(profile)
+                st.write(f"**Profile Score:** {local_score['overall']}/100 · {local_score['completeness']['level']}")
+                self.render_similar_profiles(profile)
+                self.render_completeness_check(profile)
                 
                 if st.button("🔄 Load New Profile", key="new_profile_btn"):
+                    self.prefetcher.cancel(st.session_state.user_id)
                     st.session_state.profile_data = None
                     st.session_state.profile_analyzed = False
                     st.session_state.messages = []
+                    st.session_state.scrape_job_id = None
+                    st.query_params.pop("scrape_job", None)
                     st.rerun()
             else:
                 st.info("👆 Enter your LinkedIn profile URL to get started")
@@ -127,12 +177,15 @@ class LinkedInEnhancerApp:
             analyze_button = st.button(
                 "🔍 Analyze Profile", 
                 type="primary",
-                disabled=not linkedin_url or st.session_state.processing,
+                disabled=not linkedin_url or st.session_state.processing or self.is_scrape_in_progress(),
                 key="analyze_btn"
             )
             
             if analyze_button and linkedin_url:
-                asyncio.run(self.process_linkedin_profile(linkedin_url))
+                self.submit_scrape_job(linkedin_url)
+            
+            if st.session_state.scrape_job_id:
+                self.render_scrape_job_status()
             
             # Quick actions
             if st.session_state.profile_data:
@@ -142,25 +195,30 @@ class LinkedInEnhancerApp:
                 col1, col2 = st.columns(2)
                 with col1:
                     if st.button("📊 Profile Analysis", key="quick_analysis", disabled=st.session_state.processing):
-                        st.session_state.pending_query = "Please provide a comprehensive analysis of my LinkedIn profile including strengths, weaknesses, and improvement suggestions."
+                        st.session_state.pending_query = QUICK_ACTION_QUERIES["profile_analysis"]
                         st.rerun()
                 
                 with col2:
                     if st.button("🎯 Job Matching", key="quick_jobs", disabled=st.session_state.processing):
-                        st.session_state.pending_query = "Based on my profile, what job opportunities would be the best match for me?"
+                        st.session_state.pending_query = QUICK_ACTION_QUERIES["job_matching"]
                         st.rerun()
                 
                 col3, col4 = st.columns(2)
                 with col3:
                     if st.button("✍️ Content Ideas", key="quick_content", disabled=st.session_state.processing):
-                        st.session_state.pending_query = "Generate content ideas for my LinkedIn posts to increase engagement."
+                        st.session_state.pending_query = QUICK_ACTION_QUERIES["content_ideas"]
                         st.rerun()
                 
                 with col4:
                     if st.button("🎯 Career Advice", key="quick_career", disabled=st.session_state.processing):
-                        st.session_state.pending_query = "What career development advice do you have based on my current profile?"
+                        st.session_state.pending_query = QUICK_ACTION_QUERIES["career_advice"]
                         st.rerun()
                 
+                # All four quick actions at once, run concurrently
+                if st.button("📑 Full Report", key="quick_full_report", disabled=st.session_state.processing, use_container_width=True):
+                    st.session_state.pending_full_report = True
+                    st.rerun()
+                
                 # Enhanced Features Section
                 st.divider()
                 st.subheader("🚀 Enhanced Features")
@@ -191,6 +249,10 @@ class LinkedInEnhancerApp:
                     st.session_state.pending_query = f"Please rewrite and enhance my {content_section} for better alignment with industry best practices and to make it more compelling to recruiters."
                     st.rerun()
                 
+                # Section-level review, reusing analyses of unchanged sections
+                if st.button("🧩 Section-by-Section Review", key="section_review_btn", disabled=st.session_state.processing):
+                    asyncio.run(self.process_section_review())
+                
                 # Skill Gap Analysis
                 target_role = st.text_input(
                     "Target Role (Optional)",
@@ -227,6 +289,7 @@ class LinkedInEnhancerApp:
                 st.write("**Environment Variables:**")
                 st.write(f"- GEMINI_API_KEY: {'✅ Set' if self.settings.GEMINI_API_KEY else '❌ Missing'}")
                 st.write(f"- APIFY_API_TOKEN: {'✅ Set' if self.settings.APIFY_API_TOKEN else '❌ Missing'}")
+                st.write(f"- TRANSPORT_MODE: {self.settings.TRANSPORT_MODE}")
                 
                 st.write("**Session State:**")
                 st.write(f"- User ID: {st.session_state.user_id}")
@@ -234,12 +297,172 @@ class LinkedInEnhancerApp:
                 st.write(f"- Messages Count: {len(st.session_state.messages)}")
                 st.write(f"- Processing: {st.session_state.processing}")
                 st.write(f"- Pending Query: {st.session_state.pending_query is not None}")
+                st.write(f"- Scrape Job: {st.session_state.scrape_job_id or 'None'}")
+                st.write(f"- Scrape Queue Depth: {self.scrape_queue.queue_depth()}")
+                
+                self.render_performance_panel()
+                self.render_token_usage_panel()
+                self.render_profiling_panel()
                 
                 if st.button("🔄 Clear All Data", help="Reset all session data"):
                     for key in list(st.session_state.keys()):
                         del st.session_state[key]
                     st.rerun()
     
+    def render_similar_profiles(self, profile: Dict):
+        """Most similar stored profiles, and how this profile's local score compares with theirs"""
+        with st.expander("👥 Similar Profiles"):
+            with telemetry.span("similar_profiles"):
+                peers = self.profile_index.similar_to_profile(profile, 5, exclude_user=st.session_state.user_id)
+            if not peers:
+                st.caption("No other profiles stored yet")
+                return
+            # Peers are other users of a shared deployment, so only their role is shown, never their name
+            for peer in peers:
+                st.write(f"**{peer['headline'] or 'No headline'}** ({peer['similarity']:.0%} similar)")
+            peer_profiles = [self.memory_manager.get_profile(peer["user_id"]) for peer in peers]
+            benchmark = peer_benchmark(profile, [peer for peer in peer_profiles if peer])
+            if benchmark:
+                st.caption(
+                    f"Your score {benchmark['overall']}/100 vs. a peer median of {benchmark['peer_median']:.0f} "
+                    f"(ahead of {benchmark['percentile']:.0f}% of these peers)"
+                )
+    
+    def render_completeness_check(self, profile: Dict):
+        """Structured completeness assessment, rendered from its typed fields instead of parsed text"""
+        with st.expander("🧾 Completeness Check"):
+            profile_key = fingerprint(profile)
+            check = st.session_state.get("completeness_check")
+            if not check or check["profile"] != profile_key:
+                if not st.button("Run Check", key="completeness_check_btn", disabled=st.session_state.processing):
+                    st.caption("One structured Gemini call scoring completeness and listing missing sections")
+                    return
+                with st.spinner("Checking profile..."), telemetry.tagged(agent="CompletenessCheck", user_id=st.session_state.user_id):
+                    result = asyncio.run(self.gemini_client.analyze_profile_structured(profile, "profile_completeness"))
+                if result is None:
+                    st.warning("The check could not be completed. Please try again.")
+                    return
+                check = {"profile": profile_key, "result": result}
+                st.session_state.completeness_check = check
+            
+            result = check["result"]
+            st.progress(result.completeness_score / 100, text=f"Completeness: {result.completeness_score}/100")
+            for label, items in (
+                ("Missing sections", result.missing_sections),
+                ("Strengths", result.strengths),
+                ("To improve", result.improvement_areas),
+                ("Recommendations", result.recommendations)
+            ):
+                if items:
+                    st.write(f"**{label}:**")
+                    st.markdown("\n".join(f"- {item}" for item in items))
+    
+    def render_performance_panel(self):
+        """Show per-stage latency and hot-path counters collected by the telemetry module"""
+        with st.expander("⏱️ Performance", expanded=True):
+            summary = telemetry.span_summary()
+            if summary:
+                st.write("**Stage Latency (recent requests):**")
+                st.dataframe(summary, hide_index=True, use_container_width=True)
+            else:
+                st.caption("No traced requests yet")
+            
+            cache = telemetry.CACHE_REQUESTS.values()
+            hits = sum(value for (_, result), value in cache.items() if result in ("hit", "joined"))
+            lookups = sum(cache.values())
+            llm_calls = telemetry.LLM_CALLS.values()
+            tokens = telemetry.LLM_TOKENS.values()
+            tokens_in = sum(value for (direction, _), value in tokens.items() if direction == "input")
+            tokens_out = sum(value for (direction, _), value in tokens.items() if direction == "output")
+            
+            st.write("**Counters:**")
+            st.write(f"- LLM Calls: {int(sum(llm_calls.values()))} ({int(llm_calls.get(('error',), 0))} failed)")
+            st.write(f"- LLM Retries: {int(sum(telemetry.LLM_RETRIES.values().values()))}")
+            st.write(f"- Tokens In/Out: {int(tokens_in)} / {int(tokens_out)}")
+            st.write(f"- Cache Hit Rate: {hits / lookups:.0%} of {int(lookups)} lookups" if lookups else "- Cache Hit Rate: no lookups yet")
+            prefetched = self.prefetcher.cache.stats()
+            st.write(f"- Prefetched Answers: {prefetched['ready']} ready, {prefetched['pending']} in progress")
+            
+            latest = telemetry.recent_requests(limit=1)
+            if latest:
+                request_id, spans = latest[0]
+                st.write(f"**Last Request** `{request_id}`:")
+                for record in sorted(spans, key=lambda record: record["start"]):
+                    indent = "  " if record["parent"] else ""
+                    st.text(f"{indent}{record['name']:<14} {record['duration'] * 1000:8.1f} ms  {record['status']}")
+            
+            if self.settings.METRICS_PORT:
+                st.caption(f"Prometheus metrics: http://localhost:{self.settings.METRICS_PORT}/metrics")
+    
+    def render_token_usage_panel(self):
+        """Show today's token spend per agent and the budgets that apply to this session"""
+        with st.expander("💰 Token Usage"):
+            user_id = st.session_state.user_id
+            user_tokens = self.usage_tracker.tokens_today(user_id=user_id)
+            if self.settings.USER_DAILY_TOKEN_BUDGET > 0:
+                st.write(f"**Your Tokens Today:** {user_tokens:,} / {self.settings.USER_DAILY_TOKEN_BUDGET:,}")
+                st.progress(min(user_tokens / self.settings.USER_DAILY_TOKEN_BUDGET, 1.0))
+            else:
+                st.write(f"**Your Tokens Today:** {user_tokens:,} (no budget)")
+            
+            by_agent = self.usage_tracker.usage_by_agent(days=1)
+            if not by_agent:
+                st.caption("No LLM calls recorded today")
+                return
+            
+            agent_budgets = parse_agent_budgets(self.settings.AGENT_DAILY_TOKEN_BUDGETS)
+            rows = []
+            for agent, usage in sorted(by_agent.items(), key=lambda item: item[1]["cost"], reverse=True):
+                rows.append({
+                    "agent": agent,
+                    "calls": usage["calls"],
+                    "input_tokens": usage["input_tokens"],
+                    "output_tokens": usage["output_tokens"],
+                    "avg_tokens_per_call": round((usage["input_tokens"] + usage["output_tokens"]) / usage["calls"]),
+                    "avg_latency_s": round(usage["latency_seconds"] / usage["calls"], 2),
+                    "cost_usd": round(usage["cost"], 4),
+                    "budget": agent_budgets.get(agent)
+                })
+            st.write("**All Users Today, by Agent:**")
+            st.dataframe(rows, hide_index=True, use_container_width=True)
+    
+    def render_profiling_panel(self):
+        """Toggle per-request profiling and show the latest reports"""
+        with st.expander("🔬 Profiling"):
+            # Kept outside the widget key so the setting survives while Debug Mode is hidden
+            st.session_state.profiling_enabled = st.checkbox(
+                "Profile requests",
+                value=st.session_state.profiling_enabled,
+                help="Record cProfile and tracemalloc reports for each query and profile load"
+            )
+            
+            reports = list_reports(self.settings.PROFILE_REPORT_DIR, limit=5)
+            if not reports:
+                st.caption(f"No reports yet in {self.settings.PROFILE_REPORT_DIR}")
+                return
+            
+            for report in reports:
+                memory = report.get("memory", {})
+                session_kb = report.get("session_state", {}).get("total_bytes", 0) / 1024
+                st.write(
+                    f"**{report['name']}** `{report.get('request_id') or '-'}` · {report['duration_ms']:.0f} ms · "
+                    f"peak {memory.get('peak_kb', 0):.0f} KB · session {session_kb:.0f} KB"
+                )
+                st.dataframe(report.get("top_functions", [])[:5], hide_index=True, use_container_width=True)
+                st.download_button(
+                    "⬇️ Full Report",
+                    data=json.dumps(report, indent=2),
+                    file_name=os.path.basename(report["path"]),
+                    mime="application/json",
+                    key=f"profile_report_{report['path']}"
+                )
+    
+    def is_profiling(self, session_driven: bool) -> bool:
+        """Whether to profile a request; the Debug Mode toggle applies only to session-driven calls"""
+        if session_driven:
+            return st.session_state.get("profiling_enabled", self.settings.PROFILING_ENABLED)
+        return self.settings.PROFILING_ENABLED
+    
     def render_chat_interface(self):
         """Render the main chat interface"""
         
@@ -254,6 +477,11 @@ class LinkedInEnhancerApp:
             # Process the query
             asyncio.run(self.process_and_display_response(query))
         
+        # Process pending full report
+        if st.session_state.pending_full_report and not st.session_state.processing:
+            st.session_state.pending_full_report = False
+            asyncio.run(self.process_full_report())
+        
         # Welcome message
         if not st.session_state.messages and not st.session_state.profile_data:
             st.markdown("""
@@ -313,11 +541,32 @@ class LinkedInEnhancerApp:
             
             # Generate and display assistant response
             with st.chat_message("assistant"):
+                scores_placeholder = st.empty()
                 response_placeholder = st.empty()
-                response_placeholder.write("🤔 Thinking...")
+                # The local score needs no LLM call, so show it while the agent works
+                if st.session_state.profile_data:
+                    response_placeholder.markdown(f"{format_score_summary(score_profile(st.session_state.profile_data))}\n\n🤔 Thinking...")
+                else:
+                    response_placeholder.write("🤔 Thinking...")
+                
+                parser = ResponseParser()
+                streamed = []
                 
-                response = await self.process_user_query(query)
-                response_placeholder.markdown(response)
+                def on_chunk(chunk: str):
+                    """Show the answer as it streams in, and its scores as metrics as soon as they appear"""
+                    streamed.append(chunk)
+                    events = parser.feed(chunk)
+                    response_placeholder.markdown("".join(streamed) + " ▌")
+                    if any(event["type"] == "score" for event in events):
+                        scores = list(parser.scores.items())[:4]
+                        with scores_placeholder.container():
+                            for column, (label, value) in zip(st.columns(len(scores)), scores):
+                                column.metric(label, f"{value}/100")
+                
+                with telemetry.request_context(), stream_to(on_chunk):
+                    response = await self.process_user_query(query)
+                    with telemetry.span("render"):
+                        response_placeholder.markdown(response)
                 
                 # Add assistant response to chat history
                 st.session_state.messages.append({"role": "assistant", "content": response})
@@ -331,43 +580,149 @@ class LinkedInEnhancerApp:
             st.session_state.processing = False
             st.rerun()
 
-    async def process_linkedin_profile(self, linkedin_url: str):
-        """Process LinkedIn profile URL"""
+    async def process_full_report(self):
+        """Run all four agents concurrently and render each section as soon as it is ready"""
+        query = "Give me a full report: profile analysis, job matches, content ideas and career advice."
         try:
             st.session_state.processing = True
+            st.session_state.messages.append({"role": "user", "content": query})
             
-            # Show progress with more detailed steps
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            
-            status_text.text("🔍 Initializing LinkedIn scraper...")
-            progress_bar.progress(20)
+            with st.chat_message("user"):
+                st.markdown(query)
             
-            # Scrape profile
-            status_text.text("📊 Scraping LinkedIn profile data...")
-            progress_bar.progress(40)
+            with st.chat_message("assistant"):
+                st.markdown("## 📑 Full Report")
+                placeholders = {}
+                for section in self.full_report.sections:
+                    placeholders[section["key"]] = st.empty()
+                    placeholders[section["key"]].info(f"⏳ {section['title']}...")
+                
+                def render_section(section: Dict, result: Dict[str, Any], seconds: float):
+                    with telemetry.span("render", section=section["key"]):
+                        placeholders[section["key"]].markdown(self.format_report_section(section, result))
+                
+                with telemetry.request_context():
+                    report = await self.full_report.run(
+                        st.session_state.user_id,
+                        st.session_state.profile_data,
+                        on_section_complete=render_section
+                    )
+                
+                st.caption(f"Generated {len(report['sections'])} sections in {report['elapsed']:.1f}s")
             
-            profile_data = await self.linkedin_scraper.scrape_profile(linkedin_url)
+            parts = ["## 📑 Full Report"] + [
+                self.format_report_section(section, report["sections"][section["key"]])
+                for section in self.full_report.sections
+            ]
+            st.session_state.messages.append({"role": "assistant", "content": "\n\n".join(parts)})
             
-            status_text.text("💾 Storing profile data...")
-            progress_bar.progress(60)
+        except Exception as e:
+            error_msg = f"I apologize, but I encountered an error: {str(e)}"
+            st.session_state.messages.append({"role": "assistant", "content": error_msg})
+        finally:
+            st.session_state.processing = False
+            st.rerun()
+    
+    def format_report_section(self, section: Dict, result: Dict[str, Any]) -> str:
+        """Markdown for one full-report section"""
+        return f"### {section['title']}\n\n{self.format_agent_result(section['agent'], result)}"
+    
+    def format_agent_result(self, agent_name: str, result: Dict[str, Any]) -> str:
+        """Response text of an agent result, as shown in the chat"""
+        if agent_name == "ProfileAnalyzer":
+            return self.format_profile_response(result)
+        if agent_name == "JobMatcher":
+            return self.format_job_match_response(result)
+        if "error" in result:
+            return f"Error: {result['error']}"
+        if agent_name == "ContentGenerator":
+            return result.get("generated_content", "I've generated some content ideas for you based on your query.")
+        return result.get("counseling_response", "Here's my career advice for you based on your background and goals.")
+    
+    def submit_scrape_job(self, linkedin_url: str):
+        """Queue a background scrape so the script thread is not held while Apify runs"""
+        job_id = self.scrape_queue.submit(st.session_state.user_id, linkedin_url)
+        st.session_state.scrape_job_id = job_id
+        # Keep the job in the URL so a reloaded tab picks it back up
+        st.query_params["scrape_job"] = job_id
+        st.rerun()
+    
+    def is_scrape_in_progress(self) -> bool:
+        """Check whether this session has a scrape job that has not finished"""
+        job_id = st.session_state.get("scrape_job_id")
+        if not job_id or job_id == st.session_state.get("completed_scrape_job_id"):
+            return False
+        job = self.scrape_queue.get_job(job_id)
+        return bool(job) and job["status"] not in (SUCCEEDED, FAILED)
+    
+    @st.fragment(run_every=2)
+    def render_scrape_job_status(self):
+        """Poll the scrape queue and show real progress until the job finishes"""
+        job_id = st.session_state.scrape_job_id
+        if not job_id or job_id == st.session_state.completed_scrape_job_id:
+            return
+        
+        job = self.scrape_queue.get_job(job_id)
+        if not job:
+            st.session_state.scrape_job_id = None
+            st.query_params.pop("scrape_job", None)
+            return
+        
+        if job["status"] == SUCCEEDED:
+            st.session_state.completed_scrape_job_id = job_id
+            asyncio.run(self.process_linkedin_profile(LinkedInProfile(**job["result"])))
+            return
+        
+        if job["status"] == FAILED:
+            st.session_state.completed_scrape_job_id = job_id
+            error = job.get('error') or job.get('message') or ""
+            st.error(f"❌ Error analyzing profile: {error}")
+            if "Actor with this name was not found" in error:
+                st.info("💡 **Note:** The LinkedIn scraping actor is unavailable. Check the actor ID in `linkedin_scraper.py` and your Apify account, then try again.")
+            else:
+                st.info("💡 **Tip:** Make sure your LinkedIn URL is public and in the format: https://linkedin.com/in/your-profile")
+            return
+        
+        status_label = job.get("apify_status") or job["status"].upper()
+        st.progress(job["progress"], text=f"📊 {job.get('message') or 'Scraping LinkedIn profile data...'}")
+        st.caption(f"Status: {status_label}")
+        
+        with st.expander("Scrape progress log"):
+            for event in self.scrape_queue.get_events(job_id)[-10:]:
+                st.write(f"- {event['timestamp'][11:19]} {event['message']}")
+
+    async def process_linkedin_profile(self, profile_data: LinkedInProfile):
+        """Store a scraped LinkedIn profile and greet the user with an overview"""
+        with telemetry.request_context() as request_id, profile_request(
+            "process_linkedin_profile",
+            enabled=self.is_profiling(session_driven=True),
+            request_id=request_id,
+            session_state=lambda: st.session_state.to_dict()
+        ):
+            await self._handle_linkedin_profile(profile_data)
+    
+    async def _handle_linkedin_profile(self, profile_data: LinkedInProfile):
+        """Store the profile, then show the welcome message and a data preview"""
+        try:
+            st.session_state.processing = True
             
             # Store profile in memory and session state
-            await self.memory_manager.store_profile(
-                st.session_state.user_id, 
-                profile_data.dict()
-            )
+            with telemetry.span("store", kind="profile"):
+                version = await self.memory_manager.store_profile(
+                    st.session_state.user_id, 
+                    profile_data.dict()
+                )
             
             st.session_state.profile_data = profile_data.dict()
             st.session_state.profile_analyzed = True
             
-            status_text.text("✨ Generating initial analysis...")
-            progress_bar.progress(80)
-            
-            # Clear progress indicators
-            progress_bar.progress(100)
-            status_text.empty()
-            progress_bar.empty()
+            # Most users click a Quick Action next, so start on those answers in the background
+            self.prefetcher.schedule(
+                st.session_state.user_id,
+                st.session_state.profile_data,
+                [self.profile_analyzer, self.job_matcher, self.content_generator, self.career_counselor],
+                self.memory_manager
+            )
             
             st.success("✅ Profile analyzed successfully!")
             
@@ -398,6 +753,12 @@ class LinkedInEnhancerApp:
             What would you like to explore first?
             """
             
+            with telemetry.span("local_score"):
+                welcome_msg += "\n\n" + format_score_summary(score_profile(st.session_state.profile_data))
+            
+            if version.get("version", 1) > 1:
+                welcome_msg += self.format_profile_changes(version)
+            
             st.session_state.messages.append({"role": "assistant", "content": welcome_msg})
             
             # Also show a quick preview of the profile data
@@ -420,9 +781,7 @@ class LinkedInEnhancerApp:
             st.error(f"❌ Error analyzing profile: {str(e)}")
             
             # Show helpful error message based on error type
-            if "Actor with this name was not found" in str(e):
-                st.info("💡 **Note:** The LinkedIn scraping service is currently unavailable. The app will use demo data for testing purposes.")
-            elif "Missing required environment variables" in str(e):
+            if "Missing required environment variables" in str(e):
                 st.warning("⚠️ **Configuration Issue:** Please check that your API keys are properly set in the .env file.")
             else:
                 st.info("💡 **Tip:** Make sure your LinkedIn URL is public and in the format: https://linkedin.com/in/your-profile")
@@ -431,47 +790,123 @@ class LinkedInEnhancerApp:
             st.session_state.processing = False
             st.rerun()
     
-    async def process_user_query(self, query: str) -> str:
-        """Process user query and route to appropriate agent"""
+    def format_profile_changes(self, version: Dict[str, Any]) -> str:
+        """Summarize which profile sections changed since the previous scrape"""
+        touched = version.get("added", []) + version.get("changed", [])
+        if not touched and not version.get("removed"):
+            return "\n\n**No changes since your last profile scrape** - earlier section analyses will be reused."
+        
+        lines = [f"\n\n**Changes since your last scrape (version {version['version']}):**"]
+        for key in touched:
+            lines.append(f"- ✏️ {describe_section(key)}")
+        for key in version.get("removed", []):
+            lines.append(f"- 🗑️ {describe_section(key)} (removed)")
+        
+        skills_diff = version.get("skills_diff", {})
+        if skills_diff.get("added"):
+            lines.append(f"- ➕ New skills: {', '.join(skills_diff['added'])}")
+        if skills_diff.get("removed"):
+            lines.append(f"- ➖ Removed skills: {', '.join(skills_diff['removed'])}")
+        
+        return "\n".join(lines)
+    
+    async def process_section_review(self):
+        """Review each profile section, re-analyzing only the sections that changed"""
+        try:
+            st.session_state.processing = True
+            st.session_state.messages.append({"role": "user", "content": "Review my profile section by section."})
+            
+            with st.spinner("Reviewing profile sections..."):
+                result = await self.profile_analyzer.analyze_sections(
+                    st.session_state.profile_data, st.session_state.user_id
+                )
+            
+            parts = ["## 🧩 Section-by-Section Review"]
+            if result["reused"]:
+                parts.append(f"_♻️ Reused earlier analysis for {len(result['reused'])} unchanged section(s); "
+                             f"re-analyzed {len(result['reanalyzed'])}._")
+            for section_key, analysis in result["sections"].items():
+                marker = " ♻️" if section_key in result["reused"] else ""
+                parts.append(f"### {describe_section(section_key)}{marker}\n\n{analysis}")
+            
+            st.session_state.messages.append({"role": "assistant", "content": "\n\n".join(parts)})
+            
+        except Exception as e:
+            st.session_state.messages.append({"role": "assistant", "content": f"I apologize, but I encountered an error: {str(e)}"})
+        finally:
+            st.session_state.processing = False
+            st.rerun()
+    
+    async def process_user_query(
+        self,
+        query: str,
+        user_id: Optional[str] = None,
+        profile_data: Optional[Dict] = None
+    ) -> str:
+        """Process user query and route to appropriate agent
+
+        user_id and profile_data default to the current Streamlit session,
+        so the same pipeline can be driven headlessly.
+        """
+        session_driven = user_id is None
+        with telemetry.request_context() as request_id, profile_request(
+            "process_user_query",
+            enabled=self.is_profiling(session_driven),
+            request_id=request_id,
+            session_state=(lambda: st.session_state.to_dict()) if session_driven else None
+        ):
+            return await self._handle_user_query(query, user_id, profile_data)
+    
+    async def _handle_user_query(self, query: str, user_id: Optional[str], profile_data: Optional[Dict]) -> str:
+        """Route one query to its agent, with every stage traced under the current request ID"""
         try:
+            if user_id is None:
+                user_id = st.session_state.user_id
+                profile_data = st.session_state.get("profile_data")
+            
             # Add a small delay to make it feel more natural
             await asyncio.sleep(0.5)
             
-            # Determine which agent should handle the query
-            agent_choice = await self.route_query(query)
+            # Determine which agent should handle the query, and in which mode, once per request
+            with telemetry.span("route") as route_span:
+                intent = classify_intent(query)
+                route_span["attributes"].update(route=intent.route, confidence=intent.confidence, source=intent.source)
+            agent_choice = intent.route
             
             task_data = {
                 "query": query,
-                "profile_data": st.session_state.get("profile_data")
+                "profile_data": profile_data,
+                "intent": intent.route,
+                "mode": intent.mode
             }
             
             if agent_choice == "profile_analysis":
-                if not st.session_state.profile_data:
+                if not profile_data:
                     return "👆 Please first provide your LinkedIn profile URL in the sidebar to get personalized profile analysis."
                 
                 result = await self.profile_analyzer.execute_with_memory(
-                    task_data, st.session_state.user_id
+                    task_data, user_id
                 )
                 return self.format_profile_response(result)
                 
             elif agent_choice == "job_matching" or agent_choice == "job_fit_analysis":
-                if not st.session_state.profile_data:
+                if not profile_data:
                     return "👆 Please first provide your LinkedIn profile URL in the sidebar to get personalized job matching."
                 
                 result = await self.job_matcher.execute_with_memory(
-                    task_data, st.session_state.user_id
+                    task_data, user_id
                 )
                 return self.format_job_match_response(result)
                 
             elif agent_choice == "content_generation" or agent_choice == "content_enhancement":
                 result = await self.content_generator.execute_with_memory(
-                    task_data, st.session_state.user_id
+                    task_data, user_id
                 )
                 return result.get("generated_content", "I've generated some content ideas for you based on your query.")
                 
             elif agent_choice == "career_counseling" or agent_choice == "skill_gap_analysis":
                 result = await self.career_counselor.execute_with_memory(
-                    task_data, st.session_state.user_id
+                    task_data, user_id
                 )
                 return result.get("counseling_response", "Here's my career advice for you based on your background and goals.")
                 
@@ -495,68 +930,30 @@ class LinkedInEnhancerApp:
     
     async def route_query(self, query: str) -> str:
         """Route query to appropriate agent based on content"""
-        query_lower = query.lower()
-        
-        # Enhanced routing with new features
-        
-        # Job fit analysis keywords
-        if any(word in query_lower for word in [
-            "job description", "job fit", "job match", "match score", "job requirements",
-            "compare", "qualification", "fit analysis", "recruiter"
-        ]):
-            return "job_fit_analysis"
-            
-        # Content enhancement keywords
-        elif any(word in query_lower for word in [
-            "rewrite", "enhance", "improve content", "best practices", "headline",
-            "about section", "experience descriptions", "optimize content"
-        ]):
-            return "content_enhancement"
-            
-        # Skill gap analysis keywords  
-        elif any(word in query_lower for word in [
-            "skill gap", "missing skills", "learning resources", "skill analysis",
-            "target role", "skill development", "learning path", "career path"
-        ]):
-            return "skill_gap_analysis"
-        
-        # Profile analysis keywords
-        elif any(word in query_lower for word in [
-            "profile", "analyze", "analysis", "improve", "optimization", "review", 
-            "completeness", "strength", "weakness", "recommendation"
-        ]):
-            return "profile_analysis"
-        
-        # Job matching keywords
-        elif any(word in query_lower for word in [
-            "job", "position", "role", "opportunity", "career", "match", "hiring",
-            "application", "interview", "company"
-        ]):
-            return "job_matching"
-        
-        # Content generation keywords
-        elif any(word in query_lower for word in [
-            "content", "post", "write", "generate", "create", "ideas"
-        ]):
-            return "content_generation"
-        
-        # Career counseling keywords (default)
-        else:
-            return "career_counseling"
+        return classify_intent(query).route
     
     def format_profile_response(self, result: Dict[str, Any]) -> str:
         """Format profile analysis response"""
         if "error" in result:
             return f"Error analyzing profile: {result['error']}"
         
-        return result.get("analysis", "Profile analysis completed successfully.")
+        response = result.get("analysis", "Profile analysis completed successfully.")
+        if result.get("local_score"):
+            response += f"\n\n---\n\n{format_score_summary(result['local_score'])}"
+        return response
     
     def format_job_match_response(self, result: Dict[str, Any]) -> str:
         """Format job matching response"""
         if "error" in result:
             return f"Error in job matching: {result['error']}"
         
-        return result.get("match_analysis", "Job matching analysis completed successfully.")
+        response = result.get("match_analysis", "Job matching analysis completed successfully.")
+        if result.get("candidate_jobs"):
+            jobs = "\n".join(
+                f"{number}. {job['title']} at {job['company']}" for number, job in enumerate(result["candidate_jobs"], 1)
+            )
+            response += f"\n\n---\n\n**🗂️ Matched from our job corpus:**\n\n{jobs}"
+        return response
 
 def main():
     """Main function to run the Streamlit app"""
@@ -0,0 +1,259 @@
+"""
+Query intent classification shared by the app router and the agents
+
+All keyword phrases are compiled into one regex, so a query is scanned once
+and every phrase it contains adds its weight to the intents it signals. The
+highest-scoring intent wins; an optional naive Bayes classifier takes over
+when no keyword matches or the keyword scores are too close to call.
+"""
+
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from ..config.settings import settings
+
+# Route name -> (agent name, sub-mode the agent should run)
+ROUTES = {
+    "job_fit_analysis": ("JobMatcher", "job_fit"),
+    "job_matching": ("JobMatcher", "general"),
+    "content_enhancement": ("ContentGenerator", "enhancement"),
+    "content_generation": ("ContentGenerator", "general"),
+    "skill_gap_analysis": ("CareerCounselor", "skill_gap"),
+    "career_counseling": ("CareerCounselor", "general"),
+    "profile_analysis": ("ProfileAnalyzer", "general")
+}
+
+DEFAULT_ROUTE = "career_counseling"
+
+# Ties go to the more specific route, in this order
+ROUTE_PRIORITY = [
+    "job_fit_analysis", "content_enhancement", "skill_gap_analysis",
+    "profile_analysis", "job_matching", "content_generation", "career_counseling"
+]
+
+# Phrase -> weight per route. Phrases match at the start of a word, so "job" also matches "jobs".
+# Multi-word phrases are strong signals; generic verbs such as "improve" are weak so that
+# the object of the sentence ("improve my chances for this job") decides.
+INTENT_KEYWORDS: Dict[str, Dict[str, float]] = {
+    "job_fit_analysis": {
+        "job description": 3.0, "job fit": 3.0, "job market fit": 3.0, "job match": 3.0, "match score": 3.0,
+        "job requirements": 3.0, "fit analysis": 3.0, "analyze how well": 3.0,
+        "compare": 1.5, "qualification": 1.5, "requirements": 1.0, "responsibilities": 1.5,
+        "recruiter": 1.0, "years experience": 1.5, "years of experience": 1.5, "what you'll do": 2.0,
+        "who you are": 1.0, "must have": 1.5, "nice to have": 1.5
+    },
+    "content_enhancement": {
+        "rewrite": 2.5, "enhance": 1.5, "improve content": 3.0, "optimize content": 3.0,
+        "best practices": 2.0, "headline": 2.0, "about section": 2.5, "summary section": 2.5,
+        "experience descriptions": 2.5, "skills section": 2.0
+    },
+    "skill_gap_analysis": {
+        "skill gap": 3.0, "missing skills": 3.0, "skills needed": 2.5, "skill requirements": 2.5,
+        "skill analysis": 2.5, "skill development": 2.5, "learning resources": 2.5,
+        "learning path": 2.5, "career path": 2.0, "target role": 2.0, "upskill": 2.0,
+        "certification": 1.5, "learn": 1.0, "missing": 2.0, "skills": 0.5
+    },
+    "profile_analysis": {
+        "improve my profile": 3.0, "profile": 1.0, "analyze": 1.0, "analysis": 1.0, "review": 1.0,
+        "completeness": 2.0, "optimization": 1.0, "strength": 1.0, "weakness": 1.0, "improve": 0.5,
+        "recommendation": 0.5
+    },
+    "job_matching": {
+        "job": 1.5, "position": 1.0, "role": 1.0, "opportunit": 1.0, "hiring": 1.0,
+        "match": 1.0, "application": 1.0, "apply": 1.0, "interview": 1.5, "company": 1.0,
+        "career": 0.5
+    },
+    "content_generation": {
+        "content": 1.5, "post": 1.5, "write": 1.5, "generate": 1.0, "create": 1.0,
+        "ideas": 1.0, "article": 1.5
+    },
+    "career_counseling": {
+        "advice": 1.5, "career": 0.5, "promotion": 1.5, "salary": 1.5, "negotiat": 1.5,
+        "transition": 1.5, "switch": 1.0, "mentor": 1.0, "long-term": 1.0
+    }
+}
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Queries this long are almost always a pasted job description
+JOB_DESCRIPTION_MIN_CHARS = 600
+
+
+class Intent(BaseModel):
+    """Classified intent of a user query"""
+    route: str
+    agent: str
+    mode: str
+    confidence: float
+    source: str  # "keywords", "classifier" or "default"
+    scores: Dict[str, float] = {}
+
+
+class NaiveBayesIntentClassifier:
+    """Multinomial naive Bayes over word unigrams and bigrams, trained locally in milliseconds"""
+
+    def __init__(self, alpha: float = 1.0):
+        self.alpha = alpha
+        self.class_counts: Counter = Counter()
+        self.token_counts: Dict[str, Counter] = defaultdict(Counter)
+        self.vocabulary = set()
+
+    @staticmethod
+    def features(text: str) -> List[str]:
+        tokens = TOKEN_PATTERN.findall(text.lower())
+        return tokens + [f"{first} {second}" for first, second in zip(tokens, tokens[1:])]
+
+    def fit(self, examples: Iterable[Tuple[str, str]]) -> "NaiveBayesIntentClassifier":
+        """Train on (text, route) pairs"""
+        for text, route in examples:
+            features = self.features(text)
+            self.class_counts[route] += 1
+            self.token_counts[route].update(features)
+            self.vocabulary.update(features)
+        return self
+
+    def knows_any(self, text: str) -> bool:
+        """Whether any feature of the text was seen in training"""
+        return any(feature in self.vocabulary for feature in self.features(text))
+
+    def predict_proba(self, text: str) -> Dict[str, float]:
+        """Posterior probability per route"""
+        if not self.class_counts:
+            return {}
+        features = self.features(text)
+        total_examples = sum(self.class_counts.values())
+        vocabulary_size = len(self.vocabulary) or 1
+
+        log_scores = {}
+        for route, count in self.class_counts.items():
+            token_total = sum(self.token_counts[route].values())
+            score = math.log(count / total_examples)
+            for feature in features:
+                score += math.log((self.token_counts[route][feature] + self.alpha) / (token_total + self.alpha * vocabulary_size))
+            log_scores[route] = score
+
+        highest = max(log_scores.values())
+        exponentials = {route: math.exp(score - highest) for route, score in log_scores.items()}
+        total = sum(exponentials.values())
+        return {route: value / total for route, value in exponentials.items()}
+
+
+class IntentRouter:
+    """Classifies queries into a route, agent and sub-mode with one compiled regex scan"""
+
+    def __init__(self, keywords: Optional[Dict[str, Dict[str, float]]] = None, classifier: Optional[NaiveBayesIntentClassifier] = None,
+                 min_margin: float = 0.5):
+        self.keywords = keywords or INTENT_KEYWORDS
+        self.classifier = classifier
+        self.min_margin = min_margin
+
+        # phrase -> [(route, weight)], so one match credits every route the phrase signals
+        self.phrase_routes: Dict[str, List[Tuple[str, float]]] = defaultdict(list)
+        for route, phrases in self.keywords.items():
+            for phrase, weight in phrases.items():
+                self.phrase_routes[phrase].append((route, weight))
+
+        # Longest phrases first, so "job description" wins over "job" at the same position
+        alternatives = sorted(self.phrase_routes, key=len, reverse=True)
+        self.pattern = re.compile(r"\b(?:" + "|".join(re.escape(phrase) for phrase in alternatives) + r")")
+
+    def score(self, query: str) -> Dict[str, float]:
+        """Keyword weight per route found in the query"""
+        scores: Dict[str, float] = defaultdict(float)
+        for match in self.pattern.finditer(query.lower()):
+            for route, weight in self.phrase_routes[match.group(0)]:
+                scores[route] += weight
+        if len(query) >= JOB_DESCRIPTION_MIN_CHARS:
+            scores["job_fit_analysis"] += 3.0
+        return dict(scores)
+
+    def classify(self, query: str) -> Intent:
+        """Pick the route for a query"""
+        scores = self.score(query)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], ROUTE_PRIORITY.index(item[0])))
+
+        if ranked:
+            best_route, best_score = ranked[0]
+            runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+            margin = best_score - runner_up
+            if margin >= self.min_margin or not self.classifier:
+                return self._intent(best_route, min(margin / best_score + 0.5, 1.0), "keywords", scores)
+
+        # A classifier that has seen none of the query's words would only echo its class priors
+        if self.classifier and self.classifier.knows_any(query):
+            probabilities = self.classifier.predict_proba(query)
+            # Keep the keyword evidence when the classifier is unsure
+            candidates = {route: probabilities.get(route, 0.0) + 0.1 * scores.get(route, 0.0) for route in probabilities}
+            if candidates:
+                best_route = max(candidates, key=lambda route: (candidates[route], -ROUTE_PRIORITY.index(route)))
+                return self._intent(best_route, probabilities.get(best_route, 0.0), "classifier", scores)
+
+        return self._intent(DEFAULT_ROUTE, 0.0, "default", scores)
+
+    def mode_for(self, agent_name: str, query: str) -> str:
+        """Sub-mode for a query sent straight to an agent, without going through the app router"""
+        scores = self.score(query)
+        specialised = [route for route, (agent, mode) in ROUTES.items() if agent == agent_name and mode != "general"]
+        for route in specialised:
+            if scores.get(route, 0.0) > 0:
+                return ROUTES[route][1]
+        return "general"
+
+    def _intent(self, route: str, confidence: float, source: str, scores: Dict[str, float]) -> Intent:
+        agent, mode = ROUTES[route]
+        return Intent(route=route, agent=agent, mode=mode, confidence=round(confidence, 3), source=source, scores=scores)
+
+
+def seed_examples(keywords: Optional[Dict[str, Dict[str, float]]] = None) -> List[Tuple[str, str]]:
+    """Training pairs built from the keyword table, repeated by weight"""
+    examples = []
+    for route, phrases in (keywords or INTENT_KEYWORDS).items():
+        for phrase, weight in phrases.items():
+            examples.extend([(phrase, route)] * max(int(round(weight * 2)), 1))
+    return examples
+
+
+def load_training_examples(path: str) -> List[Tuple[str, str]]:
+    """Labelled queries from a JSONL file of {"query": ..., "route": ...} lines"""
+    examples = []
+    if not path or not os.path.exists(path):
+        return examples
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if entry.get("query") and entry.get("route") in ROUTES:
+                examples.append((entry["query"], entry["route"]))
+    return examples
+
+
+_router: Optional[IntentRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_intent_router() -> IntentRouter:
+    """Process-wide router, compiled once; adds the local classifier if INTENT_CLASSIFIER is enabled"""
+    global _router
+    with _router_lock:
+        if _router is None:
+            classifier = None
+            if settings.INTENT_CLASSIFIER == "naive_bayes":
+                classifier = NaiveBayesIntentClassifier().fit(
+                    seed_examples() + load_training_examples(settings.INTENT_TRAINING_PATH)
+                )
+            _router = IntentRouter(classifier=classifier)
+        return _router
+
+
+def classify_intent(query: str) -> Intent:
+    """Classify a query with the shared router"""
+    return get_intent_router().classify(query)
@@ -0,0 +1,105 @@
+"""
+Section-level splitting, fingerprinting and diffing of LinkedIn profiles
+"""
+
+import hashlib
+import json
+import re
+from typing import Any, Dict, List
+
+from .skill_taxonomy import get_skill_taxonomy
+
+SINGLE_SECTIONS = ("headline", "about", "skills", "education")
+
+
+def _slug(text: str) -> str:
+    """Lowercase text with runs of non-alphanumerics collapsed to dashes"""
+    return re.sub(r'[^a-z0-9]+', '-', (text or '').lower()).strip('-')
+
+
+def experience_section_key(experience: Dict) -> str:
+    """Stable key for an experience entry, so reordering entries is not a change"""
+    return f"experience:{_slug(experience.get('company', ''))}:{_slug(experience.get('title', ''))}"
+
+
+def split_profile_sections(profile_data: Dict) -> Dict[str, Any]:
+    """Split a profile into independently diffable sections"""
+    sections = {}
+    for name in SINGLE_SECTIONS:
+        value = profile_data.get(name)
+        if name == "skills" and isinstance(value, list):
+            value = sorted(value, key=str.lower)
+        if value:
+            sections[name] = value
+
+    for experience in profile_data.get("experience", []) or []:
+        if not isinstance(experience, dict):
+            continue
+        key = experience_section_key(experience)
+        # Two entries with the same title at the same company get distinct keys
+        suffix = 2
+        unique_key = key
+        while unique_key in sections:
+            unique_key = f"{key}:{suffix}"
+            suffix += 1
+        sections[unique_key] = experience
+
+    return sections
+
+
+def fingerprint(value: Any) -> str:
+    """Content hash of a section value"""
+    canonical = json.dumps(value, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+def section_fingerprints(profile_data: Dict) -> Dict[str, str]:
+    """Map each section of a profile to its content hash"""
+    return {key: fingerprint(value) for key, value in split_profile_sections(profile_data).items()}
+
+
+def diff_profile_sections(old_fingerprints: Dict[str, str], new_sections: Dict[str, Any]) -> Dict[str, Any]:
+    """Compare a new profile's sections against the fingerprints of the previous version"""
+    new_fingerprints = {key: fingerprint(value) for key, value in new_sections.items()}
+
+    added = [key for key in new_fingerprints if key not in old_fingerprints]
+    removed = [key for key in old_fingerprints if key not in new_fingerprints]
+    changed = [
+        key for key in new_fingerprints
+        if key in old_fingerprints and old_fingerprints[key] != new_fingerprints[key]
+    ]
+    unchanged = [
+        key for key in new_fingerprints
+        if key in old_fingerprints and old_fingerprints[key] == new_fingerprints[key]
+    ]
+
+    return {
+        "added": added,
+        "removed": removed,
+        "changed": changed,
+        "unchanged": unchanged,
+        "fingerprints": new_fingerprints,
+        # Only the new content of touched sections is kept, not full snapshots
+        "values": {key: new_sections[key] for key in added + changed}
+    }
+
+
+def diff_skills(old_skills: List[str], new_skills: List[str]) -> Dict[str, List[str]]:
+    """Skill additions and removals between two versions; renaming a skill to an alias ("ML" -> "Machine Learning") is no change"""
+    taxonomy = get_skill_taxonomy()
+    old_lookup = {taxonomy.key(skill): skill for skill in old_skills or []}
+    new_lookup = {taxonomy.key(skill): skill for skill in new_skills or []}
+    return {
+        "added": [new_lookup[key] for key in new_lookup if key not in old_lookup],
+        "removed": [old_lookup[key] for key in old_lookup if key not in new_lookup]
+    }
+
+
+def describe_section(key: str) -> str:
+    """Human-readable label for a section key"""
+    if key.startswith("experience:"):
+        parts = key.split(":")
+        company = parts[1].replace('-', ' ').title() if len(parts) > 1 else ""
+        title = parts[2].replace('-', ' ').title() if len(parts) > 2 else ""
+        return f"Experience: {title} at {company}".strip()
+    return key.replace('_', ' ').title()
@@ -0,0 +1,287 @@
+"""
+Deterministic local scoring of LinkedIn profiles
+
+Everything here is plain string and list work over the scraped profile, so a
+full score takes well under a millisecond. It is shown the moment a profile
+loads and handed to the LLM as precomputed facts, so the model spends its
+tokens on advice rather than on counting.
+"""
+
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, List
+
+WORD_PATTERN = re.compile(r"[a-z][a-z0-9+#.\-]*[a-z0-9+#]|[a-z]")
+NUMBER_PATTERN = re.compile(r"\d")
+HEADLINE_SEPARATORS = ("|", "•", "·", " - ", " @ ", " at ")
+
+STOPWORDS = frozenset("""
+a about above after again all also am an and any are as at be because been before being below between both but by
+can could did do does doing down during each few for from further had has have having he her here hers him his how
+i if in into is it its itself just me more most my myself no nor not now of off on once only or other our ours out
+over own same she should so some such than that the their theirs them then there these they this those through to
+too under until up very was we were what when where which while who whom why will with would you your yours
+""".split())
+
+# (field, label) pairs every complete profile has
+REQUIRED_FIELDS = [
+    ("full_name", "Full name"),
+    ("headline", "Headline"),
+    ("about", "About section"),
+    ("location", "Location"),
+    ("experience", "Work experience"),
+    ("education", "Education"),
+    ("skills", "Skills")
+]
+
+TARGET_ABOUT_WORDS = 200
+TARGET_EXPERIENCE_ENTRIES = 3
+TARGET_SKILLS = 15
+TOP_KEYWORDS = 10
+
+
+def completeness_score(profile_data: Dict) -> Dict:
+    """Calculate profile completeness score"""
+    score = 0
+    total_points = 10
+    feedback = []
+
+    # Basic info (2 points)
+    if profile_data.get('full_name'):
+        score += 1
+    else:
+        feedback.append("Add your full name")
+
+    if profile_data.get('headline'):
+        score += 1
+    else:
+        feedback.append("Add a professional headline")
+
+    # About section (2 points)
+    about = profile_data.get('about') or ''
+    if len(about) > 100:
+        score += 2
+    elif len(about) > 0:
+        score += 1
+        feedback.append("Expand your About section (aim for 200+ words)")
+    else:
+        feedback.append("Add an About section")
+
+    # Experience (3 points)
+    experience = _entries(profile_data.get('experience'))
+    if len(experience) >= 3:
+        score += 2
+    elif len(experience) >= 1:
+        score += 1
+        feedback.append("Add more work experience entries")
+    else:
+        feedback.append("Add your work experience")
+
+    # Check if experience has descriptions
+    if any(exp.get('description') for exp in experience):
+        score += 1
+    else:
+        feedback.append("Add descriptions to your experience entries")
+
+    # Education (1 point)
+    if profile_data.get('education'):
+        score += 1
+    else:
+        feedback.append("Add your education background")
+
+    # Skills (2 points)
+    skills = profile_data.get('skills') or []
+    if len(skills) >= 10:
+        score += 2
+    elif len(skills) >= 5:
+        score += 1
+        feedback.append("Add more relevant skills (aim for 10+)")
+    else:
+        feedback.append("Add your key skills")
+
+    percentage = int((score / total_points) * 100)
+
+    return {
+        "score": percentage,
+        "raw_score": score,
+        "total_points": total_points,
+        "feedback": feedback,
+        "level": completeness_level(percentage)
+    }
+
+
+def completeness_level(score: int) -> str:
+    """Get completeness level based on score"""
+    if score >= 90:
+        return "Excellent"
+    elif score >= 75:
+        return "Good"
+    elif score >= 50:
+        return "Fair"
+    else:
+        return "Needs Improvement"
+
+
+def _entries(value: Any) -> List[Dict]:
+    return [entry for entry in value or [] if isinstance(entry, dict)]
+
+
+@lru_cache(maxsize=4096)
+def _skill_regex(skill: str):
+    """Whole-word pattern for one lowercased skill; cached, since cohorts share a small skill vocabulary"""
+    return re.compile(r"(?<![a-z0-9])" + re.escape(skill) + r"(?![a-z0-9])")
+
+
+def skill_mentions(text: str, skills: List[str]) -> Dict[str, int]:
+    """How often each listed skill appears in the text"""
+    lowered = text.lower()
+    return {skill: len(_skill_regex(skill.lower()).findall(lowered)) for skill in skills}
+
+
+def mentioned_skills(text: str, skills: List[str]) -> List[str]:
+    """Listed skills that appear in the text at least once"""
+    lowered = text.lower()
+    return [skill for skill in skills if _skill_regex(skill.lower()).search(lowered)]
+
+
+def keyword_stats(text: str, skills: List[str]) -> Dict:
+    """Word count, most frequent keywords and how often each listed skill appears in the text"""
+    lowered = text.lower()
+    words = WORD_PATTERN.findall(lowered)
+    total_words = len(words)
+    counts = Counter(word for word in words if word not in STOPWORDS and len(word) > 2)
+
+    return {
+        "total_words": total_words,
+        "top": [
+            {"keyword": word, "count": count, "density": round(count / total_words, 4)}
+            for word, count in counts.most_common(TOP_KEYWORDS)
+        ],
+        "skill_mentions": skill_mentions(lowered, skills)
+    }
+
+
+def section_scores(profile_data: Dict, skill_mentions: Dict[str, int]) -> Dict[str, int]:
+    """0-100 score for each profile section"""
+    skills = [skill for skill in profile_data.get('skills') or [] if isinstance(skill, str) and skill]
+
+    headline = (profile_data.get('headline') or '').strip()
+    headline_score = 0
+    if headline:
+        headline_score = 60 if 50 <= len(headline) <= 220 else 30
+        if any(separator in headline for separator in HEADLINE_SEPARATORS):
+            headline_score += 20
+        if mentioned_skills(headline, skills):
+            headline_score += 20
+
+    about = (profile_data.get('about') or '').strip()
+    about_score = 0
+    if about:
+        about_words = len(about.split())
+        about_score = round(min(about_words / TARGET_ABOUT_WORDS, 1.0) * 60)
+        if len(mentioned_skills(about, skills)) >= 3:
+            about_score += 20
+        if NUMBER_PATTERN.search(about):
+            about_score += 20
+
+    experience = _entries(profile_data.get('experience'))
+    experience_score = 0
+    if experience:
+        described = [exp for exp in experience if exp.get('description')]
+        quantified = [exp for exp in described if NUMBER_PATTERN.search(exp['description'])]
+        experience_score = round(
+            min(len(experience) / TARGET_EXPERIENCE_ENTRIES, 1.0) * 40
+            + len(described) / len(experience) * 40
+            + len(quantified) / len(experience) * 20
+        )
+
+    education = _entries(profile_data.get('education'))
+    education_score = 0
+    if education:
+        detailed = [edu for edu in education if edu.get('school') and (edu.get('degree') or edu.get('field'))]
+        education_score = round(60 + len(detailed) / len(education) * 40)
+
+    skills_score = 0
+    if skills:
+        evidenced = sum(1 for skill in skills if skill_mentions.get(skill))
+        skills_score = round(min(len(skills) / TARGET_SKILLS, 1.0) * 70 + evidenced / len(skills) * 30)
+
+    return {
+        "headline": headline_score,
+        "about": about_score,
+        "experience": experience_score,
+        "education": education_score,
+        "skills": skills_score
+    }
+
+
+def missing_fields(profile_data: Dict) -> List[str]:
+    """Labels of empty profile fields, plus experience entries without a description"""
+    missing = [label for field, label in REQUIRED_FIELDS if not profile_data.get(field)]
+    undescribed = [exp for exp in _entries(profile_data.get('experience')) if not exp.get('description')]
+    if undescribed:
+        missing.append(f"Description for {len(undescribed)} experience entr{'y' if len(undescribed) == 1 else 'ies'}")
+    return missing
+
+
+def score_profile(profile_data: Dict) -> Dict[str, Any]:
+    """Completeness, section scores, missing fields, keyword density and skill counts of a profile"""
+    profile_data = profile_data or {}
+    skills = [skill for skill in profile_data.get('skills') or [] if isinstance(skill, str) and skill]
+    experience = _entries(profile_data.get('experience'))
+
+    text = " ".join(
+        [profile_data.get('headline') or '', profile_data.get('about') or '']
+        + [f"{exp.get('title', '')} {exp.get('description') or ''}" for exp in experience]
+    )
+    keywords = keyword_stats(text, skills)
+    sections = section_scores(profile_data, keywords["skill_mentions"])
+    evidenced = [skill for skill in skills if keywords["skill_mentions"].get(skill)]
+
+    return {
+        "completeness": completeness_score(profile_data),
+        "section_scores": sections,
+        "overall": round(sum(sections.values()) / len(sections)),
+        "missing_fields": missing_fields(profile_data),
+        "keywords": {"total_words": keywords["total_words"], "top": keywords["top"]},
+        "skills": {
+            "total": len(skills),
+            "unique": len({skill.lower() for skill in skills}),
+            "evidenced": evidenced,
+            "unevidenced": [skill for skill in skills if skill not in evidenced],
+            "mentions": keywords["skill_mentions"]
+        }
+    }
+
+
+def format_score_summary(score: Dict[str, Any]) -> str:
+    """Markdown summary of a local score for the chat"""
+    completeness = score["completeness"]
+    lines = [
+        f"**📏 Profile Score: {score['overall']}/100** · Completeness {completeness['score']}% ({completeness['level']})",
+        " · ".join(f"{section.title()} {value}" for section, value in score["section_scores"].items())
+    ]
+    if score["missing_fields"]:
+        lines.append(f"Missing: {', '.join(score['missing_fields'])}")
+    skills = score["skills"]
+    if skills["total"]:
+        lines.append(f"Skills: {skills['total']} listed, {len(skills['evidenced'])} backed up by your headline, About or experience")
+    if score["keywords"]["top"]:
+        lines.append(f"Top keywords: {', '.join(entry['keyword'] for entry in score['keywords']['top'][:5])}")
+    return "\n\n".join(lines)
+
+
+def format_score_facts(score: Dict[str, Any]) -> str:
+    """Plain-text facts for LLM prompts, so the model does not have to count"""
+    completeness = score["completeness"]
+    skills = score["skills"]
+    sections = ", ".join(f"{section} {value}/100" for section, value in score["section_scores"].items())
+    top_keywords = ", ".join(f"{entry['keyword']} ({entry['count']})" for entry in score["keywords"]["top"])
+    return "\n".join([
+        f"- Completeness: {completeness['score']}% ({completeness['level']})",
+        f"- Section scores: {sections}",
+        f"- Missing: {', '.join(score['missing_fields']) or 'nothing'}",
+        f"- Skills: {skills['total']} listed; not mentioned anywhere else in the profile: {', '.join(skills['unevidenced'][:10]) or 'none'}",
+        f"- Profile text: {score['keywords']['total_words']} words; top keywords: {top_keywords or 'none'}"
+    ])
@@ -0,0 +1,205 @@
+"""
+Per-request cProfile and tracemalloc reports for diagnosing slow or memory-heavy sessions
+"""
+
+import contextvars
+import cProfile
+import glob
+import io
+import json
+import os
+import pickle
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional
+
+from ..config.settings import settings
+
+# Only the outermost profiled call of a request writes a report
+_active: contextvars.ContextVar[bool] = contextvars.ContextVar("profiling_active", default=False)
+
+# tracemalloc is process-wide, so it stays on while any request is being profiled
+_tracemalloc_users = 0
+_tracemalloc_lock = threading.Lock()
+
+
+def _start_tracemalloc() -> bool:
+    """Start tracing allocations if needed; returns whether this call owns a reference"""
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and tracemalloc.is_tracing():
+            return False  # Someone else (e.g. python -X tracemalloc) controls it
+        if _tracemalloc_users == 0:
+            tracemalloc.start(settings.PROFILE_TRACEMALLOC_FRAMES)
+        _tracemalloc_users += 1
+        return True
+
+
+def _stop_tracemalloc():
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0:
+            tracemalloc.stop()
+
+
+def value_size(value: Any) -> int:
+    """Approximate size of a value in bytes, by pickling it when possible"""
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+def _short_path(filename: str) -> str:
+    """Path relative to the working directory, for readable reports"""
+    return os.path.relpath(filename) if os.path.isabs(filename) else filename
+
+
+def session_state_sizes(session_state: Mapping) -> Dict[str, int]:
+    """Size of each session-state entry, largest first"""
+    sizes = {str(key): value_size(value) for key, value in session_state.items()}
+    return dict(sorted(sizes.items(), key=lambda item: item[1], reverse=True))
+
+
+def top_functions(profiler: cProfile.Profile, limit: int) -> List[Dict]:
+    """The functions with the highest cumulative time"""
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    rows = []
+    for (filename, line, function), (primitive_calls, calls, total_time, cumulative_time, _) in stats.stats.items():
+        rows.append({
+            "function": f"{_short_path(filename)}:{line}({function})",
+            "calls": calls,
+            "primitive_calls": primitive_calls,
+            "total_time_ms": round(total_time * 1000, 3),
+            "cumulative_time_ms": round(cumulative_time * 1000, 3)
+        })
+    rows.sort(key=lambda row: row["cumulative_time_ms"], reverse=True)
+    return rows[:limit]
+
+
+def top_allocations(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot, limit: int) -> List[Dict]:
+    """Allocation sites that grew the most between two snapshots"""
+    filters = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<unknown>")
+    ]
+    differences = after.filter_traces(filters).compare_to(before.filter_traces(filters), "lineno")
+    return [
+        {
+            "site": f"{_short_path(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+            "size_diff_kb": round(stat.size_diff / 1024, 2),
+            "size_kb": round(stat.size / 1024, 2),
+            "count_diff": stat.count_diff
+        }
+        for stat in differences[:limit]
+    ]
+
+
+def rotate_reports(report_dir: str, keep: int):
+    """Delete all but the newest `keep` reports"""
+    reports = sorted(glob.glob(os.path.join(report_dir, "*.json")), key=os.path.getmtime, reverse=True)
+    for report in reports[keep:]:
+        for path in (report, report[:-len(".json")] + ".prof"):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def list_reports(report_dir: Optional[str] = None, limit: int = 10) -> List[Dict]:
+    """Most recent reports, newest first"""
+    report_dir = report_dir or settings.PROFILE_REPORT_DIR
+    reports = sorted(glob.glob(os.path.join(report_dir, "*.json")), key=os.path.getmtime, reverse=True)
+    loaded = []
+    for path in reports[:limit]:
+        try:
+            with open(path, 'r') as f:
+                report = json.load(f)
+            report["path"] = path
+            loaded.append(report)
+        except (OSError, json.JSONDecodeError):
+            continue
+    return loaded
+
+
+@contextmanager
+def profile_request(
+    name: str,
+    enabled: bool = True,
+    request_id: Optional[str] = None,
+    session_state: Optional[Callable[[], Mapping]] = None
+) -> Iterator[Optional[Dict]]:
+    """Profile the block with cProfile and tracemalloc and save a JSON report
+
+    session_state is called after the block so the report reflects the state the
+    request left behind. Profiling covers the calling thread only; work handed to
+    asyncio.to_thread shows up as time spent waiting.
+    """
+    if not enabled or _active.get():
+        yield None
+        return
+
+    token = _active.set(True)
+    owns_tracemalloc = _start_tracemalloc()
+    before = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+    report: Dict[str, Any] = {
+        "name": name,
+        "request_id": request_id,
+        "started_at": datetime.now().isoformat(),
+        "status": "ok"
+    }
+    profiler = cProfile.Profile()
+    start_time = time.perf_counter()
+    profiler.enable()
+    try:
+        yield report
+    except BaseException as e:
+        # st.rerun() ends a request by raising, which is not a failure
+        report["status"] = "rerun" if type(e).__name__ == "RerunException" else "error"
+        raise
+    finally:
+        profiler.disable()
+        report["duration_ms"] = round((time.perf_counter() - start_time) * 1000, 2)
+        _active.reset(token)
+        try:
+            if before is not None:
+                after = tracemalloc.take_snapshot()
+                current, peak = tracemalloc.get_traced_memory()
+                report["memory"] = {"traced_kb": round(current / 1024, 2), "peak_kb": round(peak / 1024, 2)}
+                report["top_allocations"] = top_allocations(before, after, settings.PROFILE_TOP_N)
+        except Exception as e:
+            print(f"Error collecting allocation statistics: {e}")
+        finally:
+            if owns_tracemalloc:
+                _stop_tracemalloc()
+
+        try:
+            report["top_functions"] = top_functions(profiler, settings.PROFILE_TOP_N)
+            if session_state is not None:
+                sizes = session_state_sizes(session_state())
+                report["session_state"] = {"total_bytes": sum(sizes.values()), "keys": sizes}
+            _save_report(report, profiler)
+        except Exception as e:
+            print(f"Error writing profiling report: {e}")
+
+
+def _save_report(report: Dict, profiler: cProfile.Profile):
+    """Write the JSON report and raw pstats next to it, then rotate old reports"""
+    report_dir = settings.PROFILE_REPORT_DIR
+    os.makedirs(report_dir, exist_ok=True)
+    stem = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{report['name']}"
+    if report.get("request_id"):
+        stem += f"-{report['request_id']}"
+    path = os.path.join(report_dir, stem)
+
+    profiler.dump_stats(path + ".prof")
+    with open(path + ".json", 'w') as f:
+        json.dump(report, f, indent=2)
+    rotate_reports(report_dir, settings.PROFILE_MAX_REPORTS)
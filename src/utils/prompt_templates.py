@@ -1,8 +1,214 @@
 """
 Prompt templates for different LinkedIn Enhancer agents
+
+Templates are compiled once at import: whitespace is normalized (dedented,
+no trailing spaces, no runs of blank lines) and placeholders are split out,
+so rendering only joins strings. Profiles go into prompts as the compact
+"Label: value" lines of compact_profile(), never as indented JSON.
 """
 
-PROFILE_ANALYSIS_PROMPTS = {
+import re
+import textwrap
+from string import Formatter
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import telemetry
+
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token), for prompt sections and responses without usage metadata"""
+    return max(len(text) // 4, 1) if text else 0
+
+
+def normalize_whitespace(text: str) -> str:
+    """Text dedented, without trailing spaces, and with runs of blank lines collapsed to one"""
+    lines = [line.rstrip() for line in textwrap.dedent(text).split("\n")]
+    return _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
+
+
+class Prompt(str):
+    """Prompt split into a static instruction prefix and a per-request part
+
+    The string value is the whole prompt, instructions first, so a Prompt works
+    wherever a str does. GeminiClient sends the static part as cached content
+    when it can, and only the per-request part with each call. sections holds
+    the estimated tokens of each part of the prompt, and route the agent mode
+    it was rendered for, which picks the model.
+    """
+
+    def __new__(cls, static: str, dynamic: str):
+        prompt = super().__new__(cls, f"{static}\n\n{dynamic}" if static else dynamic)
+        prompt.static = static
+        prompt.dynamic = dynamic
+        prompt.sections = {}
+        prompt.route = None
+        return prompt
+
+    def __getnewargs__(self):
+        # Batch workers pickle prompts back to the parent process
+        return (self.static, self.dynamic)
+
+
+class PromptTemplate:
+    """Template compiled once into literal text and {name} placeholders
+
+    A placeholder alone on its line is an optional section: when its value is
+    empty the whole line is dropped. Values are stripped of surrounding
+    whitespace; a missing value raises KeyError, like str.format.
+    """
+
+    def __init__(self, text: str):
+        self.text = normalize_whitespace(text)
+        parts = [(literal, field) for literal, field, _, _ in Formatter().parse(self.text)]
+        self._parts: List[Tuple[str, Optional[str], bool]] = []
+        for index, (literal, field) in enumerate(parts):
+            following = parts[index + 1][0] if index + 1 < len(parts) else ""
+            standalone = field is not None and (not literal or literal.endswith("\n")) and (not following or following.startswith("\n"))
+            self._parts.append((literal, field, standalone))
+        self.fields = tuple(dict.fromkeys(field for _, field, _ in self._parts if field))
+        self._fixed = "".join(literal for literal, _, _ in self._parts) if not self.fields else None
+
+    def render(self, **values: Any) -> str:
+        if self._fixed is not None:
+            return self._fixed
+        pieces = []
+        drop_newline = False
+        for literal, field, standalone in self._parts:
+            if drop_newline and literal.startswith("\n"):
+                literal = literal[1:]
+            pieces.append(literal)
+            value = str(values[field]).strip() if field else ""
+            pieces.append(value)
+            drop_newline = standalone and not value
+        text = "".join(pieces)
+        # The literals are normalized already; only values can leave runs of blank lines
+        return _BLANK_LINES.sub("\n\n", text).strip() if "\n\n\n" in text else text.strip()
+
+    def format(self, **values: Any) -> str:
+        """str.format-compatible alias of render()"""
+        return self.render(**values)
+
+
+class ModePrompt:
+    """The static instructions and the per-request template of one agent mode
+
+    render() returns a Prompt whose sections are the estimated tokens of the
+    instructions, of each request field and of the request's own labels.
+    They are also observed in PROMPT_SECTION_TOKENS, by route and section, to
+    show which parts of a prompt cost the most.
+    """
+
+    def __init__(self, route: str, instructions: str, request: str):
+        self.route = route
+        self.instructions = PromptTemplate(instructions)
+        self.request = PromptTemplate(request)
+
+    def render(self, **values: Any) -> Prompt:
+        prompt = Prompt(self.instructions.render(**values), self.request.render(**values))
+        fields = {field: estimate_tokens(str(values[field]).strip()) for field in self.request.fields}
+        sections = {
+            "instructions": estimate_tokens(prompt.static),
+            **fields,
+            "labels": max(estimate_tokens(prompt.dynamic) - sum(fields.values()), 0)
+        }
+        for section, tokens in sections.items():
+            telemetry.PROMPT_SECTION_TOKENS.observe(tokens, route=self.route, section=section)
+        prompt.sections = sections
+        prompt.route = self.route
+        return prompt
+
+
+def compile_templates(templates: Dict[str, str]) -> Dict[str, PromptTemplate]:
+    return {name: PromptTemplate(text) for name, text in templates.items()}
+
+
+def _clean(value: Any) -> str:
+    return " ".join(str(value).split()) if value else ""
+
+
+def truncate(text: str, limit: int) -> str:
+    """Text cut to at most limit characters at a word boundary, marked with an ellipsis"""
+    if len(text) <= limit:
+        return text
+    cut = text[:limit].rsplit(" ", 1)[0] if " " in text[:limit] else text[:limit]
+    return cut.rstrip(",;:.") + "…"
+
+
+def _shorten(value: Any, limit: int) -> str:
+    # Only the start of a long text can survive truncation, so only that part is cleaned
+    return truncate(_clean(str(value)[:limit * 2]), limit) if value else ""
+
+
+def compact_profile(
+    profile_data: Optional[Dict[str, Any]],
+    about_chars: int = 400,
+    max_skills: Optional[int] = None,
+    max_experience: Optional[int] = 3,
+    max_education: Optional[int] = 2,
+    description_chars: int = 150,
+    skills: Optional[List[str]] = None
+) -> str:
+    """Profile as short "Label: value" lines for prompts, most recent experience first
+
+    Empty fields are left out instead of written as "Not provided", runs of
+    whitespace become single spaces, and long text is cut at a word boundary.
+    A limit of 0 turns skills, experience or education into a count. Pass
+    skills to list canonical names instead of the raw ones.
+    """
+    if not profile_data:
+        return "No profile provided"
+
+    lines = []
+    for label, key in (("Name", "full_name"), ("Headline", "headline"), ("Location", "location")):
+        value = _clean(profile_data.get(key))
+        if value:
+            lines.append(f"{label}: {value}")
+    about = _shorten(profile_data.get("about"), about_chars) if about_chars else ""
+    if about:
+        lines.append(f"About: {about}")
+
+    raw_skills = profile_data.get("skills") or []
+    if isinstance(raw_skills, str):
+        raw_skills = [raw_skills]
+    names = skills if skills is not None else [_clean(skill) for skill in raw_skills if skill]
+    if names and max_skills != 0:
+        lines.append(f"Skills ({len(names)}): {', '.join(names[:max_skills])}")
+    elif names:
+        lines.append(f"Skills: {len(names)} listed")
+
+    experience = [entry for entry in profile_data.get("experience") or [] if isinstance(entry, dict)]
+    if experience and max_experience != 0:
+        lines.append(f"Experience ({len(experience)}, most recent first):")
+        for entry in experience[:max_experience]:
+            details = ", ".join(_clean(entry.get(key)) for key in ("duration", "location") if entry.get(key))
+            line = f"- {_clean(entry.get('title')) or 'Unknown role'}, {_clean(entry.get('company')) or 'unknown company'}"
+            line += f" ({details})" if details else ""
+            description = _shorten(entry.get("description"), description_chars)
+            lines.append(f"{line}: {description}" if description else line)
+    elif experience:
+        lines.append(f"Experience: {len(experience)} positions")
+
+    education = [entry for entry in profile_data.get("education") or [] if isinstance(entry, dict)]
+    if education and max_education != 0:
+        entries = []
+        for entry in education[:max_education]:
+            degree = " in ".join(_clean(entry.get(key)) for key in ("degree", "field") if entry.get(key))
+            text = ", ".join(part for part in (degree, _clean(entry.get("school"))) if part)
+            if entry.get("duration"):
+                text += f" ({_clean(entry['duration'])})"
+            if text:
+                entries.append(text)
+        if entries:
+            lines.append(f"Education: {'; '.join(entries)}")
+    elif education:
+        lines.append(f"Education: {len(education)} entries")
+
+    return "\n".join(lines)
+
+
+PROFILE_ANALYSIS_PROMPTS = compile_templates({
     "about_analysis": """
     Analyze this LinkedIn 'About' section for professional quality and impact:
     
@@ -48,10 +254,34 @@ PROFILE_ANALYSIS_PROMPTS = {
     3. Skills to prioritize/highlight
     4. Skills that may be outdated
     5. Recommendations for skill development
+    """,
+    
+    "headline_analysis": """
+    Analyze this LinkedIn headline for recruiter search visibility and impact:
+    
+    Headline: "{headline}"
+    
+    Provide:
+    1. Overall quality score (1-10)
+    2. Keyword strength
+    3. Clarity of value proposition
+    4. Two alternative headlines
+    """,
+    
+    "education_analysis": """
+    Analyze how this education history is presented on a LinkedIn profile:
+    
+    Education: {education}
+    Current Headline: {headline}
+    
+    Provide:
+    1. Relevance to the current career direction
+    2. Missing details (degree, field, dates)
+    3. Suggestions for courses, honors or activities to add
     """
-}
+})
 
-JOB_MATCHING_PROMPTS = {
+JOB_MATCHING_PROMPTS = compile_templates({
     "compatibility_analysis": """
     Analyze the compatibility between this profile and job requirements:
     
@@ -90,9 +320,9 @@ JOB_MATCHING_PROMPTS = {
     4. Recommended resources/courses
     5. Estimated learning timeline
     """
-}
+})
 
-CONTENT_GENERATION_PROMPTS = {
+CONTENT_GENERATION_PROMPTS = compile_templates({
     "about_section": """
     Generate an optimized LinkedIn 'About' section based on this profile:
     
@@ -146,9 +376,9 @@ CONTENT_GENERATION_PROMPTS = {
     4. Shows progression and impact
     5. Is 2-4 bullet points or short paragraph
     """
-}
+})
 
-CAREER_COUNSELING_PROMPTS = {
+CAREER_COUNSELING_PROMPTS = compile_templates({
     "career_path_analysis": """
     Analyze career progression and provide guidance:
     
@@ -205,9 +435,9 @@ CAREER_COUNSELING_PROMPTS = {
     6. Networking strategy
     7. Online presence optimization
     """
-}
+})
 
-CONVERSATION_PROMPTS = {
+CONVERSATION_PROMPTS = compile_templates({
     "context_summary": """
     Summarize this conversation context for continuity:
     
@@ -238,4 +468,604 @@ CONVERSATION_PROMPTS = {
     4. Additional resources
     5. Success metrics to track
     """
-} 
\ No newline at end of file
+})
+
+
+# Prompts of GeminiClient.analyze_profile_structured, by analysis type; the reply shape comes from the response schema
+STRUCTURED_ANALYSIS_PROMPTS = compile_templates({
+    "profile_completeness": """
+    Analyze this LinkedIn profile for completeness and professional quality.
+    Sections the profile does not list are missing.
+    
+    {profile}
+    
+    Score completeness from 0 to 100, list the missing sections, strengths,
+    areas to improve and specific actionable recommendations.
+    """,
+    
+    "job_match": """
+    Analyze job match compatibility:
+    
+    Profile:
+    {profile}
+    
+    Job: {job}
+    
+    Score the overall match and the skills, experience and education match
+    from 0 to 100, list the missing skills and improvement suggestions.
+    """
+})
+
+# Instructions (the static, cacheable prefix) and per-request template of each agent mode, by intent route
+AGENT_PROMPTS: Dict[str, ModePrompt] = {prompt.route: prompt for prompt in (
+    ModePrompt(
+        "profile_analysis",
+        instructions="""
+    As a LinkedIn profile optimization expert, analyze the profile below and provide actionable insights.
+    
+    Provide a comprehensive analysis including:
+    1. Profile Completeness Assessment (rate 1-10, consistent with the measured completeness)
+    2. Key Strengths 
+    3. Areas for Improvement
+    4. Specific Recommendations
+    5. Next Steps
+    
+    Be specific, actionable, and encouraging. Format your response clearly with headers and bullet points.
+    """,
+        request="""
+    Profile:
+    {profile}
+    
+    Measured facts (computed from the profile, treat as accurate):
+    {facts}
+    
+    {context}
+    
+    User question: {query}
+    """
+    ),
+    ModePrompt(
+        "job_fit_analysis",
+        instructions="""
+    As an expert recruiter and career advisor, perform a comprehensive job fit analysis for the candidate below.
+    
+    Provide a comprehensive job fit analysis with:
+    
+    ## 📊 MATCH SCORE BREAKDOWN
+    - **Overall Match**: X/100 (with reasoning)
+    - **Skills Match**: X/100 (required vs. possessed skills)
+    - **Experience Match**: X/100 (years and relevance)
+    - **Education Match**: X/100 (degree requirements)
+    - **Culture Fit**: X/100 (based on background and role type)
+    
+    ## ✅ STRENGTHS & ALIGNMENT
+    - List specific qualifications that match perfectly
+    - Highlight competitive advantages
+    - Identify transferable skills
+    
+    ## ⚠️ GAPS & IMPROVEMENT AREAS
+    - Missing required skills (prioritized)
+    - Experience gaps to address
+    - Certification or education needs
+    
+    ## 🚀 IMPROVEMENT RECOMMENDATIONS
+    1. **Immediate Actions** (0-3 months)
+       - Quick wins to strengthen application
+       - Skills to highlight/develop
+       - Portfolio/project suggestions
+    
+    2. **Medium-term Goals** (3-12 months)
+       - Training programs to pursue
+       - Certifications to obtain
+       - Experience to gain
+    
+    3. **Profile Optimization**
+       - Specific LinkedIn headline improvements
+       - Keywords to add
+       - Experience descriptions to enhance
+    
+    ## 💡 APPLICATION STRATEGY
+    - How to position candidacy
+    - Key points to emphasize in cover letter
+    - Interview preparation focus areas
+    - Networking recommendations
+    
+    ## 🎯 RECRUITER APPEAL ENHANCEMENT
+    - What recruiters look for in this role
+    - Industry trends to leverage
+    - Competitive positioning advice
+    
+    Be specific, actionable, and honest about both strengths and areas for improvement.
+    """,
+        request="""
+    Candidate profile:
+    {profile}
+    
+    Analysis request:
+    {query}
+    
+    {skill_gap}
+    """
+    ),
+    ModePrompt(
+        "job_matching",
+        instructions="""
+    As a career advisor and job matching expert, analyze the LinkedIn profile below for optimal job opportunities.
+    
+    Provide comprehensive career guidance:
+    
+    ## 🎯 BEST JOB MATCHES
+    1. **Primary Target Roles** (90%+ match)
+       - Specific job titles
+       - Why they're perfect fits
+       - Salary ranges
+    
+    2. **Growth Opportunities** (70-90% match)
+       - Stretch roles for career advancement
+       - Skills needed to qualify
+       - Timeline to readiness
+    
+    3. **Adjacent Opportunities** (60-80% match)
+       - Related fields to consider
+       - Transferable skills leverage
+    
+    ## 🏢 INDUSTRY RECOMMENDATIONS
+    - Top 3 industries to target
+    - Emerging sectors with opportunity
+    - Industry-specific preparation needed
+    
+    ## 🛠️ SKILL GAP ANALYSIS
+    - **In-Demand Skills Missing**: Critical gaps to fill
+    - **Skills to Strengthen**: Existing skills needing improvement
+    - **Emerging Skills**: Future-focused additions
+    
+    ## 💪 COMPETITIVE ADVANTAGES
+    - Unique strengths in current market
+    - Differentiators from other candidates
+    - Experience combinations that stand out
+    
+    ## 📈 CAREER STRATEGY
+    1. **Short-term (3-6 months)**
+       - Immediate opportunities to pursue
+       - Quick skill enhancements
+    
+    2. **Medium-term (6-18 months)**
+       - Career advancement pathway
+       - Strategic skill development
+    
+    3. **Long-term (1-3 years)**
+       - Senior role preparation
+       - Leadership development
+    
+    ## 💰 MARKET POSITIONING
+    - Current market value assessment
+    - Salary negotiation leverage points
+    - Geographic market considerations
+    
+    ## 🎯 RECRUITER ATTRACTION STRATEGY
+    - Keywords to emphasize
+    - Profile sections to optimize
+    - Industry networking recommendations
+    
+    Be specific with job titles, companies, salary ranges, and actionable advice.
+    """,
+        request="""
+    Candidate profile:
+    {profile}
+    
+    {context}
+    
+    User query: {query}
+    
+    {candidate_jobs}
+    """
+    ),
+    ModePrompt(
+        "content_enhancement",
+        instructions="""
+    As a LinkedIn optimization expert and professional copywriter, enhance the {section} for the professional below using industry best practices.
+    
+    Please provide enhanced content following these guidelines:
+    
+    ## {section_upper} ENHANCEMENT
+    
+    ### ✨ ENHANCED VERSION:
+    
+    **Key Improvements Made:**
+    - Industry best practice alignment
+    - ATS optimization with relevant keywords
+    - Compelling value proposition
+    - Professional tone with personality
+    - Quantified achievements where applicable
+    
+    ### 📊 OPTIMIZATION FEATURES:
+    {guidelines}
+    
+    ### 🎯 TARGETING & KEYWORDS:
+    - Primary keywords incorporated
+    - Industry-specific terminology
+    - Role-relevant buzzwords
+    - Recruiter search optimization
+    
+    ### 💡 USAGE TIPS:
+    - Best practices for this section
+    - Common mistakes to avoid
+    - Update frequency recommendations
+    - Performance tracking suggestions
+    
+    Make the enhanced content compelling, professional, and optimized for both human readers and ATS systems.
+    """,
+        request="""
+    Profile:
+    {profile}
+    
+    Enhancement request: {query}
+    
+    {current_version}
+    """
+    ),
+    ModePrompt(
+        "content_generation",
+        instructions="""
+    As a LinkedIn content optimization expert, help create compelling content for the professional below.
+    
+    Based on the request, provide comprehensive content assistance:
+    
+    ## 📝 CONTENT RECOMMENDATIONS
+    
+    **If Post Ideas Requested:**
+    - 5-7 engaging LinkedIn post concepts
+    - Industry-relevant topics
+    - Personal branding angles
+    - Optimal hashtag strategies
+    - Engagement optimization tips
+    
+    **If Profile Content Requested:**
+    - Compelling, keyword-rich content
+    - Professional tone with personality
+    - Achievement-focused language
+    - Call-to-action optimization
+    
+    **If Experience Descriptions Requested:**
+    - Achievement-oriented bullet points
+    - Quantified results emphasis
+    - Action-verb focused language
+    - ATS-friendly keywords
+    
+    ## 🎯 OPTIMIZATION STRATEGY
+    - LinkedIn algorithm considerations
+    - Audience targeting advice
+    - Content calendar suggestions
+    - Performance tracking recommendations
+    
+    ## 💡 BEST PRACTICES
+    - Industry-specific guidelines
+    - Engagement optimization
+    - Professional networking tips
+    - Brand consistency advice
+    
+    Make all content authentic, professional, and optimized for LinkedIn's platform and audience.
+    """,
+        request="""
+    Profile:
+    {profile}
+    
+    {context}
+    
+    User request: {query}
+    """
+    ),
+    ModePrompt(
+        "skill_gap_analysis",
+        instructions="""
+    As a senior career development expert and skills analyst, perform a comprehensive skill gap analysis for the professional below.
+    
+    Provide a comprehensive skill gap analysis:
+    
+    ## 🎯 TARGET ROLE ANALYSIS
+    **Role Requirements Overview:**
+    - Essential technical skills
+    - Required soft skills
+    - Industry certifications
+    - Experience expectations
+    - Emerging skill trends
+    
+    ## 📊 CURRENT SKILL ASSESSMENT
+    
+    ### ✅ STRENGTHS & ADVANTAGES
+    - Skills that perfectly align with target role
+    - Unique skill combinations
+    - Transferable competencies
+    - Industry-relevant experience
+    - Competitive advantages
+    
+    ### ⚠️ CRITICAL SKILL GAPS
+    **High Priority (Immediate Focus):**
+    - Essential skills missing for target role
+    - Technical competencies to develop
+    - Industry-standard certifications needed
+    
+    **Medium Priority (3-6 months):**
+    - Skills that enhance competitiveness
+    - Emerging technologies to learn
+    - Leadership/management capabilities
+    
+    **Low Priority (6-12 months):**
+    - Nice-to-have skills
+    - Future-focused competencies
+    - Specialized knowledge areas
+    
+    ## 📚 DETAILED LEARNING ROADMAP
+    
+    ### 🚀 IMMEDIATE ACTIONS (0-3 months)
+    **Skill 1: [Primary Gap]**
+    - **Learning Resources:** Specific courses, platforms, books
+    - **Time Investment:** Recommended hours per week
+    - **Practical Application:** Projects, portfolios, certifications
+    - **Cost Estimate:** Budget for learning materials
+    
+    **Skill 2: [Secondary Gap]**
+    - **Learning Resources:** [Detailed recommendations]
+    - **Time Investment:** [Specific timeframe]
+    - **Practical Application:** [Hands-on practice suggestions]
+    - **Validation:** [How to demonstrate proficiency]
+    
+    ### 📈 MEDIUM-TERM DEVELOPMENT (3-12 months)
+    **Professional Development Areas:**
+    - Advanced technical skills
+    - Industry certifications
+    - Leadership capabilities
+    - Specialized knowledge domains
+    
+    **Learning Strategy:**
+    - Formal education options
+    - Professional bootcamps
+    - Industry conferences
+    - Mentorship opportunities
+    
+    ### 🔮 LONG-TERM CAREER PREPARATION (1-2 years)
+    **Future-Focused Skills:**
+    - Emerging technology trends
+    - Industry evolution preparation
+    - Senior role competencies
+    - Cross-functional expertise
+    
+    ## 🛠️ PRACTICAL IMPLEMENTATION
+    
+    ### 📅 LEARNING SCHEDULE
+    - Weekly time allocation recommendations
+    - Learning milestone checkpoints
+    - Progress tracking methods
+    - Skill validation approaches
+    
+    ### 💰 INVESTMENT STRATEGY
+    - Budget allocation for skill development
+    - Free vs. paid learning resources
+    - ROI calculation for certifications
+    - Company-sponsored learning opportunities
+    
+    ### 🤝 NETWORKING & MENTORSHIP
+    - Industry professionals to connect with
+    - Communities and forums to join
+    - Mentorship opportunity identification
+    - Knowledge sharing strategies
+    
+    ## 🎯 RECRUITER APPEAL ENHANCEMENT
+    
+    ### 📝 SKILL PRESENTATION
+    - How to highlight developing skills
+    - Portfolio project recommendations
+    - LinkedIn skill optimization
+    - Resume enhancement strategies
+    
+    ### 🏆 CREDIBILITY BUILDING
+    - Certification priorities
+    - Project showcasing methods
+    - Industry contribution opportunities
+    - Thought leadership development
+    
+    ## 📊 PROGRESS TRACKING
+    
+    ### 🎯 KPIs & METRICS
+    - Skill development milestones
+    - Learning progress indicators
+    - Market competitiveness measures
+    - Career advancement metrics
+    
+    ### 🔄 REGULAR ASSESSMENT
+    - Monthly skill review process
+    - Market demand monitoring
+    - Role requirement updates
+    - Career goal adjustment strategies
+    
+    ## 💡 SUCCESS OPTIMIZATION TIPS
+    - Learning efficiency maximization
+    - Retention and application strategies
+    - Networking integration with learning
+    - Continuous improvement mindset
+    
+    Provide specific, actionable recommendations with exact learning resources, timelines, and implementation strategies.
+    """,
+        request="""
+    Professional profile:
+    {profile}
+    
+    Analysis request: {query}
+    Target role: {target_role}
+    
+    {context}
+    
+    {skill_gap}
+    """
+    ),
+    ModePrompt(
+        "career_counseling",
+        instructions="""
+    As an experienced career counselor and professional development expert, provide personalized guidance for the professional below.
+    
+    Provide comprehensive career guidance:
+    
+    ## 🎯 CAREER ASSESSMENT & POSITIONING
+    
+    ### 📊 Current Position Analysis
+    - Professional strengths assessment
+    - Market positioning evaluation
+    - Competitive advantages identification
+    - Areas for improvement
+    
+    ### 🚀 Career Trajectory Evaluation
+    - Career progression analysis
+    - Growth pattern recognition
+    - Strategic positioning opportunities
+    - Experience leverage potential
+    
+    ## 📈 GROWTH OPPORTUNITIES
+    
+    ### 🎯 Immediate Opportunities (3-6 months)
+    - Quick advancement possibilities
+    - Internal promotion potential
+    - Skill-based role transitions
+    - Industry movement options
+    
+    ### 🌟 Medium-term Growth (6-18 months)
+    - Strategic career moves
+    - Leadership development paths
+    - Specialty area development
+    - Geographic expansion options
+    
+    ### 🔮 Long-term Vision (1-3 years)
+    - Senior role preparation
+    - Industry leadership positioning
+    - Entrepreneurial opportunities
+    - Executive career pathway
+    
+    ## 🛠️ SKILL DEVELOPMENT STRATEGY
+    
+    ### 💪 Core Competency Enhancement
+    - Existing skill strengthening
+    - Professional certification priorities
+    - Technical skill upgrades
+    - Soft skill development
+    
+    ### 🆕 Emerging Skill Acquisition
+    - Industry trend alignment
+    - Future-focused capabilities
+    - Cross-functional competencies
+    - Innovation and adaptability
+    
+    ## 🌐 INDUSTRY INSIGHTS & TRENDS
+    
+    ### 📊 Market Analysis
+    - Industry growth patterns
+    - Emerging opportunities
+    - Competitive landscape
+    - Salary trend analysis
+    
+    ### 🔮 Future Outlook
+    - Technology impact predictions
+    - Role evolution expectations
+    - Industry disruption preparation
+    - Adaptation strategies
+    
+    ## 🤝 NETWORKING & RELATIONSHIP STRATEGY
+    
+    ### 🌟 Professional Network Building
+    - Key relationship identification
+    - Industry community engagement
+    - Mentorship opportunity pursuit
+    - Strategic partnership development
+    
+    ### 💼 Industry Presence Enhancement
+    - Thought leadership development
+    - Professional visibility increase
+    - Industry contribution strategies
+    - Personal brand strengthening
+    
+    ## 🎨 PERSONAL BRANDING OPTIMIZATION
+    
+    ### 📱 Digital Presence Strategy
+    - LinkedIn optimization tactics
+    - Professional portfolio development
+    - Content creation strategies
+    - Online reputation management
+    
+    ### 🎯 Value Proposition Refinement
+    - Unique selling point identification
+    - Competitive differentiation
+    - Professional story crafting
+    - Brand consistency maintenance
+    
+    ## 📋 ACTIONABLE IMPLEMENTATION PLAN
+    
+    ### 🎯 30-Day Quick Wins
+    - Immediate action items
+    - Low-hanging fruit opportunities
+    - Quick improvement strategies
+    - Momentum building activities
+    
+    ### 📅 90-Day Strategic Initiatives
+    - Medium-term goal setting
+    - Skill development projects
+    - Network expansion activities
+    - Professional milestone achievements
+    
+    ### 🗓️ Annual Career Development
+    - Long-term objective setting
+    - Career advancement planning
+    - Continuous learning integration
+    - Progress measurement systems
+    
+    ## 💡 SUCCESS OPTIMIZATION
+    - Productivity enhancement tips
+    - Career satisfaction maximization
+    - Work-life balance strategies
+    - Continuous improvement mindset
+    
+    Be encouraging, specific, and practical. Consider their unique background and provide actionable steps for career advancement.
+    """,
+        request="""
+    Professional profile:
+    {profile}
+    
+    {context}
+    
+    User question: {query}
+    """
+    )
+)}
+
+# Optimization guidelines per profile section, filled into the content_enhancement instructions
+CONTENT_SECTION_GUIDELINES = {name: normalize_whitespace(text) for name, text in {
+    "About Section": """
+    - Hook: Compelling opening line
+    - Value proposition: Clear unique selling points
+    - Keywords: Industry-relevant terms naturally integrated
+    - Call-to-action: Clear next steps for connections
+    - Personality: Professional yet authentic voice
+    - Achievements: Quantified results and impact
+    """,
+    "Headline": """
+    - Primary keyword: Role-specific search terms
+    - Value proposition: What you deliver/achieve
+    - Industry focus: Sector-specific terminology
+    - Character optimization: Maximum 220 characters
+    - Action-oriented: Dynamic, engaging language
+    - Differentiation: Unique positioning elements
+    """,
+    "Experience Descriptions": """
+    - Action verbs: Strong, impactful opening words
+    - Quantified results: Numbers, percentages, metrics
+    - Keywords: Role and industry-specific terms
+    - Achievements: Focus on impact and outcomes
+    - Relevance: Skills applicable to target roles
+    - Readability: Bullet points and clear structure
+    """,
+    "Skills Section": """
+    - Keyword optimization: Recruiter search terms
+    - Skill prioritization: Most relevant skills first
+    - Industry alignment: Sector-specific competencies
+    - Endorsement strategy: Skills likely to be endorsed
+    - Future-focused: Emerging and in-demand skills
+    - Balance: Technical and soft skills mix
+    """
+}.items()}
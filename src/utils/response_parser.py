@@ -0,0 +1,128 @@
+"""
+Incremental parser for markdown agent responses
+
+Feed it text as it streams in. Each complete line is classified once, as a
+section header, a bullet item or a line carrying "X/100" (or "X/10") scores,
+and turned into an event, so a UI can fill score widgets and section cards
+while the model is still writing. The accumulated result is the response's
+insights, stored with the interaction so nothing re-parses the text later.
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+HEADER_PATTERN = re.compile(r"^(?:#{1,6}\s+(?P<markdown>.+?)\s*#*|\*\*(?P<bold>[^*]+?)\*\*:?|(?P<label>[A-Z][^.!?:]{2,60}):)$")
+BULLET_PATTERN = re.compile(r"^(?:[-•*+]|\d{1,2}[.)])\s+(?P<text>.+)$")
+SCORE_PATTERN = re.compile(r"(?<![\d.])(?P<value>\d{1,3}(?:\.\d+)?)\s*/\s*(?P<scale>100|10)\b")
+MARKUP_PATTERN = re.compile(r"[*_`#]+")
+
+# Section kind by words in its header, first match wins ("Improvement Recommendations" are recommendations)
+SECTION_KINDS = (
+    ("recommendations", ("recommend", "suggest", "next step", "action")),
+    ("strengths", ("strength", "positive", "alignment")),
+    ("improvements", ("improve", "gap", "weakness", "area"))
+)
+
+
+def strip_markup(text: str) -> str:
+    return MARKUP_PATTERN.sub("", text).strip(" :-–\t")
+
+
+def section_kind(title: str) -> Optional[str]:
+    lowered = title.lower()
+    for kind, words in SECTION_KINDS:
+        if any(word in lowered for word in words):
+            return kind
+    return None
+
+
+class ResponseParser:
+    """Turns streamed response text into section, item and score events
+
+    Only complete lines are parsed; the unfinished tail waits for the next
+    chunk or close(). Lines inside code fences are skipped.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._in_code = False
+        self._section: Optional[Dict[str, Any]] = None
+        self.sections: List[Dict[str, Any]] = []
+        self.scores: Dict[str, int] = {}
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Events for the lines a chunk completes"""
+        self._buffer += chunk
+        if "\n" not in chunk:
+            return []
+        *lines, self._buffer = self._buffer.split("\n")
+        events = []
+        for line in lines:
+            events.extend(self._parse_line(line))
+        return events
+
+    def close(self) -> List[Dict[str, Any]]:
+        """Events for the last line, once the response is complete"""
+        line, self._buffer = self._buffer, ""
+        return self._parse_line(line)
+
+    def _parse_line(self, line: str) -> List[Dict[str, Any]]:
+        line = line.strip()
+        if line.startswith("```"):
+            self._in_code = not self._in_code
+            return []
+        if not line or self._in_code:
+            return []
+
+        header = HEADER_PATTERN.match(line)
+        if header and not SCORE_PATTERN.search(line):
+            title = strip_markup(next(group for group in header.groups() if group))
+            self._section = {"title": title, "kind": section_kind(title), "items": []}
+            self.sections.append(self._section)
+            return [{"type": "section", "title": title, "kind": self._section["kind"]}]
+
+        events = []
+        bullet = BULLET_PATTERN.match(line)
+        text = bullet.group("text") if bullet else line
+        for match in SCORE_PATTERN.finditer(text):
+            value = float(match.group("value")) * (10 if match.group("scale") == "10" else 1)
+            if value > 100:
+                continue
+            label = strip_markup(text[:match.start()]) or (self._section["title"] if self._section else "Score")
+            self.scores[label] = round(value)
+            events.append({"type": "score", "label": label, "value": round(value), "section": self._title()})
+        if bullet:
+            item = strip_markup(text)
+            if item:
+                if self._section is None:
+                    self._section = {"title": "", "kind": None, "items": []}
+                    self.sections.append(self._section)
+                self._section["items"].append(item)
+                events.append({"type": "item", "section": self._title(), "kind": self._section["kind"], "text": item})
+        return events
+
+    def _title(self) -> str:
+        return self._section["title"] if self._section else ""
+
+    @property
+    def score(self) -> Optional[int]:
+        """The overall score if one is labelled so, else the first score"""
+        for label, value in self.scores.items():
+            if "overall" in label.lower():
+                return value
+        return next(iter(self.scores.values()), None)
+
+    def insights(self) -> Dict[str, Any]:
+        """Sections with their items, the scores by label, and the items of each section kind"""
+        insights = {"score": self.score, "scores": dict(self.scores), "sections": self.sections}
+        for kind, _ in SECTION_KINDS:
+            insights[kind] = [item for section in self.sections if section["kind"] == kind for item in section["items"]]
+        return insights
+
+
+def parse_response(text: str) -> Dict[str, Any]:
+    """Insights of a complete response"""
+    parser = ResponseParser()
+    parser.feed(text)
+    parser.close()
+    return parser.insights()
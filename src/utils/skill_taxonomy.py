@@ -0,0 +1,183 @@
+"""
+Skill taxonomy: canonical skills, their aliases and parent categories
+
+Every skill name and alias is stored as a token path in a trie, so canonicalizing
+a raw skill is one walk over its tokens, and scanning a job description for skills
+is a single left-to-right pass that takes the longest match at each position.
+Canonical skills have integer IDs, so matching and gap analysis are set operations
+instead of repeated string comparisons.
+"""
+
+import json
+import re
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from ..config.settings import settings
+
+# "-", "_" and "/" separate tokens ("machine-learning", "CI/CD"); ".", "+" and "#" stay inside them ("node.js", "c++")
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+PARENTHETICAL = re.compile(r"\([^)]*\)")
+
+# Trie key marking the end of a skill phrase
+_END = ""
+
+
+def skill_tokens(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall((text or "").lower())
+
+
+def clean_skill(raw: str) -> str:
+    """Raw skill with parentheticals dropped and whitespace collapsed, e.g. "Python (Programming Language)" -> "Python\""""
+    return " ".join(PARENTHETICAL.sub(" ", raw or "").split())
+
+
+class SkillTaxonomy:
+    """Canonical skills with alias lookup, categories and parent skills"""
+
+    def __init__(self, taxonomy: Dict[str, Any]):
+        self.categories = {entry["id"]: entry for entry in taxonomy.get("categories", [])}
+        self.skills: List[Dict[str, Any]] = list(taxonomy.get("skills", []))
+        self._ids = {entry["id"]: skill_id for skill_id, entry in enumerate(self.skills)}
+        self._parents = [self._ids.get(entry.get("parent")) for entry in self.skills]
+        exact_only = set(taxonomy.get("exact_only", []))
+
+        self._trie: Dict[str, Any] = {}
+        for skill_id, entry in enumerate(self.skills):
+            for phrase in [entry["name"]] + entry.get("aliases", []):
+                tokens = skill_tokens(phrase)
+                if not tokens:
+                    continue
+                node = self._trie
+                for token in tokens:
+                    node = node.setdefault(token, {})
+                # Ambiguous phrases ("go", "excel") only count as a whole skill string, never inside running text
+                node.setdefault(_END, (skill_id, phrase.lower() in exact_only))
+
+    @classmethod
+    def from_json(cls, path: str) -> "SkillTaxonomy":
+        """Load a taxonomy file; a missing or unreadable file gives an empty taxonomy that keeps skills as written"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return cls(json.load(f))
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Error loading skill taxonomy from {path}: {e}")
+            return cls({})
+
+    def _walk(self, tokens: List[str], start: int, in_text: bool) -> Tuple[Optional[int], int]:
+        """Longest skill phrase starting at tokens[start]: (skill id, end position)"""
+        node, best = self._trie, (None, start)
+        for position in range(start, len(tokens)):
+            node = node.get(tokens[position])
+            if node is None:
+                break
+            if _END in node and not (in_text and node[_END][1]):
+                best = (node[_END][0], position + 1)
+        return best
+
+    @lru_cache(maxsize=16384)
+    def skill_id(self, raw: str) -> Optional[int]:
+        """Canonical ID of a raw skill string, or None when the taxonomy does not know it"""
+        tokens = skill_tokens(clean_skill(raw))
+        if not tokens:
+            return None
+        skill_id, end = self._walk(tokens, 0, in_text=False)
+        return skill_id if end == len(tokens) else None
+
+    def key(self, raw: str) -> str:
+        """Stable comparison key: the canonical skill ID for known skills, the normalized tokens otherwise"""
+        skill_id = self.skill_id(raw)
+        return self.skills[skill_id]["id"] if skill_id is not None else " ".join(skill_tokens(clean_skill(raw)))
+
+    def name(self, skill_id: int) -> str:
+        return self.skills[skill_id]["name"]
+
+    def category(self, skill_id: int) -> str:
+        entry = self.categories.get(self.skills[skill_id]["category"])
+        return entry["name"] if entry else self.skills[skill_id]["category"]
+
+    def category_path(self, skill_id: int) -> List[str]:
+        """Category names from the top level down, e.g. ["Data & AI", "Machine Learning"]"""
+        path, category_id = [], self.skills[skill_id]["category"]
+        while category_id in self.categories and len(path) < 8:
+            path.insert(0, self.categories[category_id]["name"])
+            category_id = self.categories[category_id].get("parent")
+        return path
+
+    def ancestors(self, skill_id: int) -> List[int]:
+        """Parent skills from nearest to furthest, e.g. PyTorch -> Deep Learning -> Machine Learning"""
+        chain, parent = [], self._parents[skill_id]
+        while parent is not None and parent not in chain:
+            chain.append(parent)
+            parent = self._parents[parent]
+        return chain
+
+    def ids(self, skills: Iterable[str]) -> Set[int]:
+        return {skill_id for skill_id in (self.skill_id(skill) for skill in skills if isinstance(skill, str)) if skill_id is not None}
+
+    def canonicalize(self, skills: Iterable[str]) -> List[str]:
+        """Canonical names in first-seen order, duplicates and aliases folded; unknown skills are kept, cleaned"""
+        seen, names = set(), []
+        for skill in skills:
+            if not isinstance(skill, str) or not clean_skill(skill):
+                continue
+            skill_id = self.skill_id(skill)
+            key = skill_id if skill_id is not None else self.key(skill)
+            if key not in seen:
+                seen.add(key)
+                names.append(self.name(skill_id) if skill_id is not None else clean_skill(skill))
+        return names
+
+    def extract(self, text: str) -> List[int]:
+        """Skill IDs mentioned in free text such as a job description, in order of first mention"""
+        tokens = skill_tokens(text)
+        found: Dict[int, None] = {}
+        position = 0
+        while position < len(tokens):
+            skill_id, end = self._walk(tokens, position, in_text=True)
+            if skill_id is None:
+                position += 1
+            else:
+                found.setdefault(skill_id, None)
+                position = end
+        return list(found)
+
+    def gap(self, have: Iterable[str], need: Iterable[int]) -> Dict[str, Any]:
+        """Required skills split into held, related (a more specific skill or the direct parent is held) and missing"""
+        have_ids = self.ids(have)
+        matched, related, missing = [], [], []
+        for skill_id in dict.fromkeys(need):
+            if skill_id in have_ids:
+                matched.append(self.name(skill_id))
+                continue
+            via = [held for held in have_ids if skill_id in self.ancestors(held) or held == self._parents[skill_id]]
+            if via:
+                related.append({"skill": self.name(skill_id), "via": sorted(self.name(held) for held in via)})
+            else:
+                missing.append(self.name(skill_id))
+        return {"matched": matched, "related": related, "missing": missing}
+
+
+def format_skill_gap(gap: Dict[str, Any], target: str) -> str:
+    """Skill gap facts for LLM prompts"""
+    related = "; ".join(f"{entry['skill']} (has {', '.join(entry['via'])})" for entry in gap["related"])
+    return "\n".join([
+        f"SKILL MATCH FOR {target} (canonical skills):",
+        f"- Already has: {', '.join(gap['matched']) or 'none'}",
+        f"- Related skills held: {related or 'none'}",
+        f"- Missing: {', '.join(gap['missing']) or 'none'}"
+    ])
+
+
+_taxonomy: Optional[SkillTaxonomy] = None
+_taxonomy_lock = threading.Lock()
+
+
+def get_skill_taxonomy() -> SkillTaxonomy:
+    """Process-wide taxonomy, loaded from SKILL_TAXONOMY_PATH on first use"""
+    global _taxonomy
+    with _taxonomy_lock:
+        if _taxonomy is None:
+            _taxonomy = SkillTaxonomy.from_json(settings.SKILL_TAXONOMY_PATH)
+        return _taxonomy
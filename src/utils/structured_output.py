@@ -0,0 +1,162 @@
+"""
+Typed schemas for structured Gemini responses, and a tolerant JSON parser
+
+The pydantic models define what a structured analysis must contain. They are
+converted to Gemini response schemas, so the model generates JSON in that shape
+directly, and then used to validate the reply. A reply that fails
+validation gets one short repair prompt with the validation errors, instead of
+re-running the whole analysis.
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, Field, ValidationError
+
+Score = Field(ge=0, le=100, description="Integer from 0 to 100")
+
+
+class ProfileCompleteness(BaseModel):
+    """Completeness and quality assessment of a profile"""
+    completeness_score: int = Score
+    missing_sections: List[str] = []
+    strengths: List[str] = []
+    improvement_areas: List[str] = []
+    recommendations: List[str] = []
+
+
+class MatchBreakdown(BaseModel):
+    skills_match: int = Score
+    experience_match: int = Score
+    education_match: int = Score
+
+
+class JobMatch(BaseModel):
+    """Fit of a profile to one job"""
+    score: int = Score
+    breakdown: MatchBreakdown
+    missing_skills: List[str] = []
+    suggestions: List[str] = []
+
+
+# analysis_type -> schema, for GeminiClient.analyze_profile_structured
+STRUCTURED_SCHEMAS: Dict[str, Type[BaseModel]] = {
+    "profile_completeness": ProfileCompleteness,
+    "job_match": JobMatch
+}
+
+# Most {...} spans parse_json_object tries in one reply
+MAX_JSON_CANDIDATES = 100
+
+# JSON schema keys that Gemini response schemas accept
+_SCHEMA_KEYS = {"type", "format", "description", "nullable", "enum", "items", "properties", "required"}
+
+
+def response_schema(model: Type[BaseModel]) -> Dict[str, Any]:
+    """Gemini response schema (an OpenAPI subset) for a pydantic model: references inlined, unsupported keys dropped"""
+    schema = model.model_json_schema()
+    definitions = schema.get("$defs", {})
+
+    def convert(node: Dict[str, Any]) -> Dict[str, Any]:
+        if "$ref" in node:
+            node = definitions[node["$ref"].rsplit("/", 1)[-1]]
+        converted = {key: value for key, value in node.items() if key in _SCHEMA_KEYS}
+        if "properties" in node:
+            converted["properties"] = {name: convert(value) for name, value in node["properties"].items()}
+        if "items" in node:
+            converted["items"] = convert(node["items"])
+        return converted
+
+    return convert(schema)
+
+
+def parse_json_object(text: str) -> Optional[Any]:
+    """First JSON object in text: the whole text if it parses, else the first balanced {...} span that does
+
+    One left-to-right scan pairs braces outside string literals. Only outermost
+    spans, and spans nested directly in a "{" that is never closed, are parsed;
+    when one does not parse, the objects nested in it are tried in its place.
+    At most MAX_JSON_CANDIDATES spans are parsed, so stray braces in prose cost
+    linear time.
+    """
+    text = (text or "").strip()
+    try:
+        return json.loads(text)
+    except (json.JSONDecodeError, RecursionError):
+        pass
+
+    start = text.find("{")
+    if start == -1:
+        return None
+    # Closed spans as (open, close) positions, by the position of the "{" they are nested in
+    children: Dict[Optional[int], List[Tuple[int, int]]] = {}
+    open_braces: List[int] = []
+    budget = [MAX_JSON_CANDIDATES]
+    in_string, escaped = False, False
+    for position in range(start, len(text)):
+        char = text[position]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == "{":
+            open_braces.append(position)
+        elif char == "}" and open_braces:
+            opened = open_braces.pop()
+            parent = open_braces[-1] if open_braces else None
+            children.setdefault(parent, []).append((opened, position))
+            if parent is None:
+                result = _parse_spans(text, [(opened, position)], children, budget)
+                if result is not None:
+                    return result
+
+    unclosed = sorted(span for parent in open_braces for span in children.get(parent, []))
+    return _parse_spans(text, unclosed, children, budget)
+
+
+def _parse_spans(text: str, spans: List[Tuple[int, int]], children: Dict, budget: List[int]) -> Optional[Any]:
+    """First span that parses, trying the spans nested in one that does not before moving on"""
+    pending = list(reversed(spans))
+    while pending and budget[0] > 0:
+        opened, closed = pending.pop()
+        budget[0] -= 1
+        try:
+            return json.loads(text[opened:closed + 1])
+        except (json.JSONDecodeError, RecursionError):
+            pending.extend(reversed(children.get(opened, [])))
+    return None
+
+
+def parse_structured(text: str, model: Type[BaseModel]) -> Tuple[Optional[BaseModel], Optional[str]]:
+    """Validated model from a reply, or None and a short description of what is wrong"""
+    data = parse_json_object(text)
+    if data is None:
+        return None, "the reply is not a JSON object"
+    try:
+        return model.model_validate(data), None
+    except ValidationError as e:
+        return None, "; ".join(
+            f"{'.'.join(str(part) for part in error['loc']) or 'root'}: {error['msg']}" for error in e.errors()
+        )
+
+
+def build_repair_prompt(reply: str, error: str, model: Type[BaseModel]) -> str:
+    """Prompt asking the model to fix its own invalid reply; the original context is not resent"""
+    return f"""
+    This JSON does not match the required schema.
+
+    Reply:
+    {reply[:4000]}
+
+    Problems: {error}
+
+    Schema:
+    {json.dumps(response_schema(model))}
+
+    Return only the corrected JSON object.
+    """
@@ -0,0 +1,359 @@
+"""
+Tracing spans, request IDs and Prometheus-format metrics for the hot path
+"""
+
+import contextvars
+import functools
+import inspect
+import json
+import math
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+_request_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+_current_span: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_span", default=None)
+_tags: contextvars.ContextVar[Dict[str, str]] = contextvars.ContextVar("tags", default={})
+
+# Most recent finished spans, for the debug panel
+RECENT_SPANS: Deque[Dict] = deque(maxlen=1000)
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+def _escape_label(value) -> str:
+    """Escape a label value per the Prometheus text format"""
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+class _Metric:
+    """Labelled metric values guarded by a lock"""
+
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], float] = {}
+        REGISTRY.register(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _format_labels(self, key: Tuple[str, ...], extra: Optional[Dict[str, str]] = None) -> str:
+        pairs = list(zip(self.labelnames, key)) + list((extra or {}).items())
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape_label(value)}"' for name, value in pairs) + "}"
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        with self._lock:
+            return [(self.name, self._format_labels(key), value) for key, value in self._values.items()]
+
+    def values(self) -> Dict[Tuple[str, ...], float]:
+        with self._lock:
+            return dict(self._values)
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+
+    metric_type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, or is read from a callback at scrape time"""
+
+    metric_type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._functions: Dict[Tuple[str, ...], Callable[[], float]] = {}
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def set_function(self, function: Callable[[], float], **labels):
+        with self._lock:
+            self._functions[self._key(labels)] = function
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        with self._lock:
+            functions = dict(self._functions)
+        for key, function in functions.items():
+            try:
+                value = float(function())
+            except Exception:
+                continue
+            with self._lock:
+                self._values[key] = value
+        return super().samples()
+
+
+class Histogram(_Metric):
+    """Bucketed distribution of observations"""
+
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._histograms: Dict[Tuple[str, ...], Dict] = {}
+        super().__init__(name, documentation, labelnames)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            histogram = self._histograms.setdefault(key, {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0})
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram["counts"][index] += 1
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        result = []
+        with self._lock:
+            for key, histogram in self._histograms.items():
+                for bound, count in zip(self.buckets, histogram["counts"]):
+                    result.append((f"{self.name}_bucket", self._format_labels(key, {"le": repr(bound)}), count))
+                result.append((f"{self.name}_bucket", self._format_labels(key, {"le": "+Inf"}), histogram["count"]))
+                result.append((f"{self.name}_sum", self._format_labels(key), histogram["sum"]))
+                result.append((f"{self.name}_count", self._format_labels(key), histogram["count"]))
+        return result
+
+    def snapshot(self) -> Dict[Tuple[str, ...], Dict]:
+        with self._lock:
+            return {key: {"count": value["count"], "sum": value["sum"]} for key, value in self._histograms.items()}
+
+
+class MetricsRegistry:
+    """All metrics of the process, rendered in Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric):
+        with self._lock:
+            self._metrics[metric.name] = metric
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.metric_type}")
+            for name, labels, value in metric.samples():
+                formatted = repr(float(value)) if not math.isinf(value) else ("+Inf" if value > 0 else "-Inf")
+                lines.append(f"{name}{labels} {formatted}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = Histogram("linkedin_enhancer_stage_duration_seconds", "Duration of traced pipeline stages", ["stage"])
+STAGE_ERRORS = Counter("linkedin_enhancer_stage_errors_total", "Traced stages that raised an exception", ["stage"])
+CACHE_REQUESTS = Counter("linkedin_enhancer_cache_requests_total", "Cache lookups by cache and result", ["cache", "result"])
+LLM_TOKENS = Counter("linkedin_enhancer_llm_tokens_total", "LLM tokens by direction (input/output/cached) and agent", ["direction", "agent"])
+LLM_TOKENS_PER_CALL = Histogram(
+    "linkedin_enhancer_llm_tokens_per_call", "Tokens per LLM call by direction", ["direction"],
+    buckets=(100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+)
+PROMPT_SECTION_TOKENS = Histogram(
+    "linkedin_enhancer_prompt_section_tokens", "Estimated tokens per prompt section by agent route", ["route", "section"],
+    buckets=(25, 50, 100, 250, 500, 1000, 2000, 4000)
+)
+LLM_RETRIES = Counter("linkedin_enhancer_llm_retries_total", "Retried LLM calls by reason", ["reason"])
+LLM_CALLS = Counter("linkedin_enhancer_llm_calls_total", "LLM calls by outcome", ["status"])
+MODEL_FALLBACKS = Counter(
+    "linkedin_enhancer_model_fallbacks_total", "Calls moved to the fast model by degraded model and reason", ["model", "reason"]
+)
+LIMITER_WAIT_SECONDS = Histogram(
+    "linkedin_enhancer_limiter_wait_seconds", "Time spent waiting for a concurrency limiter slot", ["limiter", "priority"]
+)
+QUEUE_DEPTH = Gauge("linkedin_enhancer_queue_depth", "Jobs waiting in background queues", ["queue"])
+
+
+def new_request_id() -> str:
+    """Short random ID used to correlate spans of one request"""
+    return uuid.uuid4().hex[:12]
+
+
+def get_request_id() -> Optional[str]:
+    """ID of the request being handled in the current context"""
+    return _request_id.get()
+
+
+@contextmanager
+def request_context(request_id: Optional[str] = None) -> Iterator[str]:
+    """Tag everything in the block with a request ID, reusing the enclosing one if not given"""
+    request_id = request_id or _request_id.get() or new_request_id()
+    token = _request_id.set(request_id)
+    try:
+        yield request_id
+    finally:
+        _request_id.reset(token)
+
+
+@contextmanager
+def tagged(**tags) -> Iterator[Dict[str, str]]:
+    """Attach tags such as the agent or user to everything in the block"""
+    merged = {**_tags.get(), **{key: str(value) for key, value in tags.items() if value is not None}}
+    token = _tags.set(merged)
+    try:
+        yield merged
+    finally:
+        _tags.reset(token)
+
+
+def get_tag(name: str) -> Optional[str]:
+    """Value of a tag set by an enclosing tagged() block"""
+    return _tags.get().get(name)
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Dict]:
+    """Time a block as a named stage of the current request"""
+    record = {
+        "name": name,
+        "request_id": _request_id.get(),
+        "parent": _current_span.get(),
+        "attributes": {**_tags.get(), **attributes},
+        "start": time.time(),
+        "status": "ok"
+    }
+    token = _current_span.set(name)
+    start_time = time.perf_counter()
+    try:
+        yield record
+    except BaseException:
+        record["status"] = "error"
+        STAGE_ERRORS.inc(stage=name)
+        raise
+    finally:
+        record["duration"] = time.perf_counter() - start_time
+        _current_span.reset(token)
+        STAGE_SECONDS.observe(record["duration"], stage=name)
+        RECENT_SPANS.append(record)
+
+
+def traced(name: str):
+    """Decorator running a sync or async function inside a span"""
+    def decorator(function):
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await function(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def span_summary() -> List[Dict]:
+    """Per-stage count, mean and tail latency over the recent spans"""
+    durations: Dict[str, List[float]] = {}
+    for record in list(RECENT_SPANS):
+        durations.setdefault(record["name"], []).append(record["duration"])
+
+    summary = []
+    for name, values in sorted(durations.items()):
+        values.sort()
+        summary.append({
+            "stage": name,
+            "count": len(values),
+            "mean_ms": round(sum(values) / len(values) * 1000, 2),
+            "p50_ms": round(values[max(math.ceil(0.50 * len(values)) - 1, 0)] * 1000, 2),
+            "p95_ms": round(values[max(math.ceil(0.95 * len(values)) - 1, 0)] * 1000, 2),
+            "max_ms": round(values[-1] * 1000, 2)
+        })
+    return summary
+
+
+def recent_requests(limit: int = 5) -> List[Tuple[str, List[Dict]]]:
+    """Spans of the most recent request IDs, newest first"""
+    grouped: Dict[str, List[Dict]] = {}
+    for record in list(RECENT_SPANS):
+        if record["request_id"]:
+            grouped.setdefault(record["request_id"], []).append(record)
+    ordered = sorted(grouped.items(), key=lambda item: max(record["start"] for record in item[1]), reverse=True)
+    return ordered[:limit]
+
+
+# Extra read-only JSON endpoints served next to /metrics, path -> function(query params)
+_json_routes: Dict[str, Callable[[Dict[str, str]], Any]] = {}
+
+
+def register_json_route(path: str, function: Callable[[Dict[str, str]], Any]):
+    """Serve the result of function(query_params) as JSON at path on the metrics server"""
+    _json_routes[path] = function
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path in ("/metrics", "/"):
+            self._send(200, REGISTRY.render(), "text/plain; version=0.0.4; charset=utf-8")
+        elif url.path in _json_routes:
+            try:
+                payload = _json_routes[url.path](dict(parse_qsl(url.query)))
+                self._send(200, json.dumps(payload, default=str), "application/json")
+            except Exception as e:
+                self._send(500, json.dumps({"error": str(e)}), "application/json")
+        else:
+            self._send(404, "Not found", "text/plain")
+
+    def _send(self, status: int, body: str, content_type: str):
+        encoded = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes every few seconds would flood the console
+
+
+_metrics_server: Optional[ThreadingHTTPServer] = None
+_metrics_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> bool:
+    """Serve /metrics and registered JSON routes on a daemon thread once per process; returns whether it is running"""
+    global _metrics_server
+    with _metrics_server_lock:
+        if _metrics_server is not None:
+            return True
+        if port <= 0:
+            return False
+        try:
+            _metrics_server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        except OSError as e:
+            print(f"Error starting metrics server on port {port}: {e}")
+            return False
+        thread = threading.Thread(target=_metrics_server.serve_forever, name="metrics-server", daemon=True)
+        thread.start()
+        return True